@@ -0,0 +1,43 @@
+# pylint: disable=invalid-name
+# Measures how long it takes to parse and validate a synthetic ballot manifest
+# CSV with parse_csv.
+#
+# Usage: python -m scripts.benchmark-csv-parse [num_rows ...]
+import sys
+import time
+
+from server.util.csv_parse import parse_csv, CSVColumnType, CSVValueType
+from server.api.ballot_manifest import (
+    CONTAINER,
+    TABULATOR,
+    BATCH_NAME,
+    NUMBER_OF_BALLOTS,
+)
+
+# The columns for a ballot comparison manifest
+COLUMNS = [
+    CSVColumnType(CONTAINER, CSVValueType.TEXT, required=False),
+    CSVColumnType(TABULATOR, CSVValueType.TEXT, unique=True),
+    CSVColumnType(BATCH_NAME, CSVValueType.TEXT, unique=True),
+    CSVColumnType(NUMBER_OF_BALLOTS, CSVValueType.NUMBER),
+]
+
+
+def benchmark(num_rows: int) -> float:
+    manifest = "Container,Tabulator,Batch Name,Number of Ballots\n" + "".join(
+        f"Container {row // 100},Tabulator {row % 10},Batch {row},{row % 500 + 1}\n"
+        for row in range(num_rows)
+    )
+
+    start = time.perf_counter()
+    num_parsed_rows = sum(1 for _ in parse_csv(manifest, COLUMNS))
+    elapsed = time.perf_counter() - start
+
+    assert num_parsed_rows == num_rows
+    return elapsed
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000]
+    for size in sizes:
+        print(f"{size:>8} rows: {benchmark(size):.2f}s")
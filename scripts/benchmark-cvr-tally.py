@@ -0,0 +1,122 @@
+# pylint: disable=invalid-name
+# Measures how long it takes to tally the votes in a synthetic CVR file, using
+# the chunked tally in process_cvr_file vs. tallying each row individually.
+#
+# Usage: python -m scripts.benchmark-cvr-tally [num_ballots] [num_columns]
+import sys
+import time
+import random
+from collections import defaultdict
+from typing import Dict, List
+
+from server.api.cvrs import tally_interpretations, CVR_TALLY_CHUNK_SIZE
+from server.util.group_by import group_by
+
+CHOICES_PER_CONTEST = 4
+
+
+def new_contests_metadata(contest_names: List[str], contest_choices: List[str]):
+    contests_metadata: Dict[str, dict] = defaultdict(lambda: dict(choices=dict()))
+    for column, (contest_name, choice_name) in enumerate(
+        zip(contest_names, contest_choices)
+    ):
+        contests_metadata[contest_name]["votes_allowed"] = 1
+        contests_metadata[contest_name]["total_ballots_cast"] = 0
+        contests_metadata[contest_name]["choices"][choice_name] = dict(
+            column=column, num_votes=0
+        )
+    return contests_metadata
+
+
+def tally_row_by_row(contests_metadata, contest_names, contest_choices, rows):
+    for interpretations in rows:
+        contests_on_ballot = set()
+        interpretations_by_contest = group_by(
+            zip(contest_names, contest_choices, interpretations),
+            key=lambda tuple: tuple[0],  # contest_name
+        )
+        for contest_name, interpretations in interpretations_by_contest.items():
+            if any(interpretation == "" for _, _, interpretation in interpretations):
+                continue
+            contests_on_ballot.add(contest_name)
+            votes = sum(int(interpretation) for _, _, interpretation in interpretations)
+            if votes > contests_metadata[contest_name]["votes_allowed"]:
+                continue
+            for _, choice_name, interpretation in interpretations:
+                contests_metadata[contest_name]["choices"][choice_name][
+                    "num_votes"
+                ] += int(interpretation)
+        for contest_name in contests_on_ballot:
+            contests_metadata[contest_name]["total_ballots_cast"] += 1
+
+
+def random_row(rand: random.Random, num_contests: int) -> List[str]:
+    row = []
+    for _ in range(num_contests):
+        if rand.random() < 0.2:
+            row.extend([""] * CHOICES_PER_CONTEST)  # Contest not on ballot
+        else:
+            votes = ["0"] * CHOICES_PER_CONTEST
+            votes[rand.randrange(CHOICES_PER_CONTEST)] = "1"
+            if rand.random() < 0.01:  # Overvote
+                votes[rand.randrange(CHOICES_PER_CONTEST)] = "1"
+            row.extend(votes)
+    return row
+
+
+if __name__ == "__main__":
+    num_ballots = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    num_columns = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    num_contests = num_columns // CHOICES_PER_CONTEST
+
+    contest_names = [
+        f"Contest {contest}"
+        for contest in range(num_contests)
+        for _ in range(CHOICES_PER_CONTEST)
+    ]
+    contest_choices = [
+        f"Choice {contest}-{choice}"
+        for contest in range(num_contests)
+        for choice in range(CHOICES_PER_CONTEST)
+    ]
+    contest_columns = {
+        contest_name: [column for column, _ in columns]
+        for contest_name, columns in group_by(
+            enumerate(contest_names), key=lambda column: column[1]
+        ).items()
+    }
+
+    rand = random.Random(12345)
+    # Generate a pool of rows and cycle through it, so generating the data
+    # doesn't dominate the benchmark.
+    row_pool = [random_row(rand, num_contests) for _ in range(1000)]
+
+    row_by_row_metadata = new_contests_metadata(contest_names, contest_choices)
+    row_by_row_time = 0.0
+    chunked_metadata = new_contests_metadata(contest_names, contest_choices)
+    chunked_time = 0.0
+
+    for chunk_start in range(0, num_ballots, CVR_TALLY_CHUNK_SIZE):
+        rows = [
+            row_pool[i % len(row_pool)]
+            for i in range(
+                chunk_start, min(chunk_start + CVR_TALLY_CHUNK_SIZE, num_ballots)
+            )
+        ]
+        # process_cvr_file already joins each row for the COPY tempfile
+        joined_rows = [",".join(row) for row in rows]
+
+        start = time.perf_counter()
+        tally_row_by_row(row_by_row_metadata, contest_names, contest_choices, rows)
+        row_by_row_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        tally_interpretations(
+            chunked_metadata, contest_columns, contest_choices, joined_rows
+        )
+        chunked_time += time.perf_counter() - start
+
+    assert chunked_metadata == row_by_row_metadata
+    print(f"{num_ballots} ballots, {num_columns} columns")
+    print(f"  row by row: {row_by_row_time:.2f}s")
+    print(f"  chunked:    {chunked_time:.2f}s")
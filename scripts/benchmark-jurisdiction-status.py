@@ -0,0 +1,167 @@
+# pylint: disable=invalid-name
+# Measures how long it takes to compute the jurisdictions' round status (the
+# progress numbers the audit admin's dashboard polls for during an audit) for
+# a statewide ballot polling audit.
+#
+# Usage: FLASK_ENV=test python -m scripts.benchmark-jurisdiction-status [num_jurisdictions] [num_requests]
+#
+# Like benchmark-manifest-load, this creates a throwaway organization and
+# deletes it (along with everything in it) afterwards.
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import List, Tuple
+from sqlalchemy import event
+
+from server.app import app
+from server.database import db_session, engine as db_engine
+from server.models import *  # pylint: disable=wildcard-import
+from server.api.jurisdictions import serialize_jurisdictions
+from server.api.rounds import record_round_progress
+
+BATCHES_PER_JURISDICTION = 10
+BALLOTS_PER_BATCH = 20
+AUDIT_BOARDS_PER_JURISDICTION = 2
+
+
+def create_audit(num_jurisdictions: int) -> Election:
+    org = Organization(id=str(uuid.uuid4()), name="Benchmark Org")
+    election = Election(
+        id=str(uuid.uuid4()),
+        audit_name=f"Benchmark {uuid.uuid4()}",
+        audit_type=AuditType.BALLOT_POLLING,
+        audit_math_type=AuditMathType.BRAVO,
+        online=True,
+        organization=org,
+    )
+    contest = Contest(
+        id=str(uuid.uuid4()),
+        election=election,
+        name="Benchmark Contest",
+        is_targeted=True,
+        total_ballots_cast=1_000_000,
+        num_winners=1,
+        votes_allowed=1,
+    )
+    round = Round(id=str(uuid.uuid4()), election=election, round_num=1)
+    round_contest = RoundContest(round=round, contest=contest, sample_size=1000)
+    db_session.add_all([org, election, contest, round, round_contest])
+
+    for j in range(num_jurisdictions):
+        jurisdiction = Jurisdiction(
+            id=str(uuid.uuid4()),
+            election=election,
+            name=f"Jurisdiction {j}",
+            manifest_file=File(
+                id=str(uuid.uuid4()),
+                name="manifest.csv",
+                contents="",
+                uploaded_at=datetime.utcnow(),
+            ),
+            manifest_num_batches=BATCHES_PER_JURISDICTION,
+            manifest_num_ballots=BATCHES_PER_JURISDICTION * BALLOTS_PER_BATCH,
+        )
+        audit_boards = [
+            AuditBoard(
+                id=str(uuid.uuid4()),
+                jurisdiction=jurisdiction,
+                round_id=round.id,
+                name=f"Audit Board #{a + 1}",
+                num_sampled_ballots=0,
+                num_audited_ballots=0,
+            )
+            for a in range(AUDIT_BOARDS_PER_JURISDICTION)
+        ]
+        db_session.add_all([jurisdiction, *audit_boards])
+        for b in range(BATCHES_PER_JURISDICTION):
+            batch = Batch(
+                id=str(uuid.uuid4()),
+                jurisdiction=jurisdiction,
+                name=f"Batch {b}",
+                num_ballots=BALLOTS_PER_BATCH,
+            )
+            db_session.add(batch)
+            # Sample half of the ballots in each batch, and audit half of
+            # those
+            for position in range(1, BALLOTS_PER_BATCH + 1, 2):
+                ballot = SampledBallot(
+                    id=str(uuid.uuid4()),
+                    batch=batch,
+                    ballot_position=position,
+                    audit_board=audit_boards[b % len(audit_boards)],
+                    status=BallotStatus.AUDITED
+                    if position % 4 == 1
+                    else BallotStatus.NOT_AUDITED,
+                )
+                draw = SampledBallotDraw(
+                    sampled_ballot=ballot,
+                    round_id=round.id,
+                    contest_id=contest.id,
+                    ticket_number=str(uuid.uuid4()),
+                )
+                db_session.add_all([ballot, draw])
+                ballot.audit_board.num_sampled_ballots += 1
+                if ballot.status == BallotStatus.AUDITED:
+                    ballot.audit_board.num_audited_ballots += 1
+
+    # Set up the progress counters the way creating the round and the audit
+    # boards would
+    record_round_progress(election, round)
+    JurisdictionRoundProgress.query.filter_by(round_id=round.id).update(
+        {
+            JurisdictionRoundProgress.num_audit_boards: AUDIT_BOARDS_PER_JURISDICTION,
+            JurisdictionRoundProgress.num_audit_boards_not_signed_off: (
+                AUDIT_BOARDS_PER_JURISDICTION
+            ),
+        }
+    )
+    db_session.commit()
+    # Update the query planner's statistics for the new rows, like autovacuum
+    # would in production
+    db_session.execute("ANALYZE")
+    db_session.commit()
+    return election
+
+
+def benchmark(election: Election, num_requests: int) -> Tuple[List[float], int]:
+    # Time the work done by GET /election/<id>/jurisdiction, and count the
+    # queries it makes
+    num_queries = 0
+
+    def count_query(*_args):
+        nonlocal num_queries
+        num_queries += 1
+
+    timings = []
+    event.listen(db_engine, "before_cursor_execute", count_query)
+    try:
+        for _ in range(num_requests):
+            # Start each request with an empty session, like a real request
+            db_session.expire_all()
+            start = time.perf_counter()
+            serialize_jurisdictions(election)
+            timings.append(time.perf_counter() - start)
+    finally:
+        event.remove(db_engine, "before_cursor_execute", count_query)
+    return sorted(timings), num_queries // num_requests
+
+
+if __name__ == "__main__":
+    num_jurisdictions = int(sys.argv[1]) if len(sys.argv) > 1 else 150
+    num_requests = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    with app.app_context():
+        election = create_audit(num_jurisdictions)
+        try:
+            timings, num_queries = benchmark(election, num_requests)
+            p50 = timings[len(timings) // 2]
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            print(
+                f"{num_jurisdictions} jurisdictions, {num_requests} requests:"
+                f" p50 {p50 * 1000:.1f}ms, p95 {p95 * 1000:.1f}ms,"
+                f" {num_queries} queries per request"
+            )
+        finally:
+            db_session.delete(election.organization)
+            db_session.commit()
@@ -0,0 +1,64 @@
+# pylint: disable=invalid-name
+# Measures how long it takes to process ballot manifests of a few sizes.
+#
+# Usage: FLASK_ENV=test python -m scripts.benchmark-manifest-load [num_batches ...]
+#
+# Processing a file commits it, so this creates a throwaway organization for
+# each manifest and deletes it (along with everything in it) afterwards.
+import sys
+import time
+import uuid
+from datetime import datetime
+
+from server.database import db_session
+from server.models import *  # pylint: disable=wildcard-import
+from server.api.ballot_manifest import process_ballot_manifest_file
+
+
+def benchmark(num_batches: int) -> float:
+    org = Organization(id=str(uuid.uuid4()), name="Benchmark Org")
+    election = Election(
+        id=str(uuid.uuid4()),
+        audit_name=f"Benchmark {uuid.uuid4()}",
+        audit_type=AuditType.BALLOT_POLLING,
+        audit_math_type=AuditMathType.BRAVO,
+        online=False,
+        organization=org,
+    )
+    manifest = "Container,Batch Name,Number of Ballots\n" + "".join(
+        f"Container {batch // 100},Batch {batch},{batch % 500 + 1}\n"
+        for batch in range(num_batches)
+    )
+    jurisdiction = Jurisdiction(
+        id=str(uuid.uuid4()),
+        election=election,
+        name="Benchmark Jurisdiction",
+        manifest_file=File(
+            id=str(uuid.uuid4()),
+            name="manifest.csv",
+            contents=manifest,
+            uploaded_at=datetime.utcnow(),
+        ),
+    )
+    db_session.add_all([org, election, jurisdiction])
+    db_session.commit()
+
+    try:
+        start = time.perf_counter()
+        process_ballot_manifest_file(
+            db_session, jurisdiction, jurisdiction.manifest_file
+        )
+        elapsed = time.perf_counter() - start
+
+        assert jurisdiction.manifest_file.processing_error is None
+        assert jurisdiction.manifest_num_batches == num_batches
+        return elapsed
+    finally:
+        db_session.delete(org)
+        db_session.commit()
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 50000, 500000]
+    for size in sizes:
+        print(f"{size:>8} batches: {benchmark(size):.2f}s")
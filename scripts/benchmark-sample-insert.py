@@ -0,0 +1,79 @@
+# pylint: disable=invalid-name
+# Measures how long it takes to record a round 1 sample in the db (i.e. insert
+# the SampledBallots and SampledBallotDraws) for a few sample sizes.
+#
+# Usage: FLASK_ENV=test python -m scripts.benchmark-sample-insert [num_draws ...]
+#
+# Everything is created inside a transaction that gets rolled back, so this is
+# safe to run against a dev or test db.
+import sys
+import time
+import uuid
+
+from server.database import db_session
+from server.models import *  # pylint: disable=wildcard-import
+from server.api.rounds import BallotDraw, record_sampled_ballots
+from server.audit_math import sampler
+
+NUM_BATCHES = 200
+TABULATOR = "1"
+BALLOTS_PER_BATCH = 1000
+
+
+def benchmark(num_draws: int) -> float:
+    org = Organization(id=str(uuid.uuid4()), name="Benchmark Org")
+    election = Election(
+        id=str(uuid.uuid4()),
+        audit_name=f"Benchmark {uuid.uuid4()}",
+        audit_type=AuditType.BALLOT_POLLING,
+        audit_math_type=AuditMathType.BRAVO,
+        online=False,
+        organization=org,
+        random_seed="1234567890",
+    )
+    jurisdiction = Jurisdiction(
+        id=str(uuid.uuid4()), election=election, name="Benchmark Jurisdiction"
+    )
+    contest = Contest(
+        id=str(uuid.uuid4()), election=election, name="Contest", is_targeted=True
+    )
+    round = Round(id=str(uuid.uuid4()), election=election, round_num=1)
+    batches = [
+        Batch(
+            id=str(uuid.uuid4()),
+            jurisdiction=jurisdiction,
+            tabulator=TABULATOR,
+            name=f"Batch {i}",
+            num_ballots=BALLOTS_PER_BATCH,
+        )
+        for i in range(NUM_BATCHES)
+    ]
+    db_session.add_all([org, election, jurisdiction, contest, round, *batches])
+    db_session.flush()
+
+    batch_key_to_id = {
+        (jurisdiction.name, TABULATOR, batch.name): batch.id for batch in batches
+    }
+    manifest = {batch_key: BALLOTS_PER_BATCH for batch_key in batch_key_to_id}
+    sample_draws = [
+        BallotDraw(
+            ballot_key=ballot_key, contest_id=contest.id, ticket_number=ticket_number
+        )
+        for ticket_number, ballot_key, _ in sampler.draw_sample(
+            str(election.random_seed), manifest, num_draws, 0
+        )
+    ]
+
+    start = time.perf_counter()
+    record_sampled_ballots(election, round, sample_draws, batch_key_to_id)
+    db_session.flush()
+    elapsed = time.perf_counter() - start
+
+    db_session.rollback()
+    return elapsed
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    for size in sizes:
+        print(f"{size:>8} draws: {benchmark(size):.2f}s")
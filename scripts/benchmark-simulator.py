@@ -0,0 +1,95 @@
+# pylint: disable=invalid-name
+# Measures how long it takes to simulate audits of a 1M ballot contest with a
+# 5% margin, and compares the simulated stopping probabilities for ballot
+# polling to the ones from the closed-form BRAVO approximation.
+#
+# Usage: python -m scripts.benchmark-simulator [num_trials] [max_workers]
+import sys
+import time
+import multiprocessing
+
+from server.audit_math import simulator, bravo, supersimple, macro
+from server.audit_math.sampler_contest import Contest
+
+RISK_LIMIT = 10
+NUM_BALLOTS = 1_000_000
+NUM_BATCHES = 2000
+
+
+def benchmark(description: str, run):
+    start = time.perf_counter()
+    stopping_probabilities = run()
+    elapsed = time.perf_counter() - start
+    print(f"{description} ({elapsed:.2f}s)")
+    for round_size, probability in stopping_probabilities.items():
+        print(f"  {round_size:>6} {probability:.3f}")
+
+
+if __name__ == "__main__":
+    num_trials = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else multiprocessing.cpu_count()
+
+    contest = Contest(
+        "contest",
+        {
+            "winner": 525_000,
+            "loser": 475_000,
+            "ballots": NUM_BALLOTS,
+            "numWinners": 1,
+            "votesAllowed": 1,
+        },
+    )
+    ballots_per_batch = NUM_BALLOTS // NUM_BATCHES
+    reported_results = {
+        f"batch{batch}": {
+            "contest": {
+                "winner": ballots_per_batch * 525 // 1000,
+                "loser": ballots_per_batch * 475 // 1000,
+                "ballots": ballots_per_batch,
+            }
+        }
+        for batch in range(NUM_BATCHES)
+    }
+
+    bravo_options = bravo.get_sample_size(RISK_LIMIT, contest, None)
+    print(
+        "BRAVO closed-form sample sizes:",
+        {key: option["size"] for key, option in bravo_options.items()},
+    )
+    benchmark(
+        f"Ballot polling, {num_trials} trials, {max_workers} processes",
+        lambda: simulator.ballot_polling_stopping_probabilities(
+            RISK_LIMIT,
+            contest,
+            [500, 1000, 2000]
+            + [bravo_options[key]["size"] for key in ["0.7", "0.8", "0.9"]],
+            num_trials=num_trials,
+            max_workers=max_workers,
+        ),
+    )
+
+    supersimple_size = supersimple.get_sample_sizes(RISK_LIMIT, contest, None)
+    benchmark(
+        f"Ballot comparison, {num_trials // 10} trials, {max_workers} processes",
+        lambda: simulator.supersimple_stopping_probabilities(
+            RISK_LIMIT,
+            contest,
+            [supersimple_size, supersimple_size * 2, supersimple_size * 4],
+            discrepancy_rates={"1-over": 0.002, "1-under": 0.002},
+            num_trials=num_trials // 10,
+            max_workers=max_workers,
+        ),
+    )
+
+    macro_size = macro.get_sample_sizes(RISK_LIMIT, contest, reported_results, {})
+    benchmark(
+        f"Batch comparison, {num_trials // 100} trials, {max_workers} processes",
+        lambda: simulator.macro_stopping_probabilities(
+            RISK_LIMIT,
+            contest,
+            reported_results,
+            [macro_size // 2, macro_size, macro_size * 2],
+            num_trials=num_trials // 100,
+            max_workers=max_workers,
+        ),
+    )
@@ -0,0 +1,69 @@
+# pylint: disable=invalid-name
+# Measures how long it takes to compute the risk for a ballot comparison audit
+# of a multi-candidate contest, using the array-based computation vs. the
+# exact (Decimal) computation.
+#
+# Usage: python -m scripts.benchmark-supersimple [num_sampled_ballots ...]
+import sys
+import time
+import random
+
+from server.audit_math import supersimple
+from server.audit_math.sampler_contest import Contest
+
+RISK_LIMIT = 10
+NUM_BALLOTS = 1_000_000
+CANDIDATES = {"cand0": 0.3, "cand1": 0.27, "cand2": 0.2, "cand3": 0.13, "cand4": 0.1}
+NUM_WINNERS = 2
+DISCREPANCY_RATE = 0.01
+
+
+def benchmark(num_sampled: int):
+    rand = random.Random(12345)
+    candidates = list(CANDIDATES)
+    contest = Contest(
+        "contest",
+        {
+            **{
+                candidate: int(share * NUM_BALLOTS)
+                for candidate, share in CANDIDATES.items()
+            },
+            "ballots": NUM_BALLOTS,
+            "numWinners": NUM_WINNERS,
+            "votesAllowed": 1,
+        },
+    )
+
+    def random_cvr():
+        vote = rand.choices(candidates, weights=list(CANDIDATES.values()))[0]
+        return {
+            "contest": {candidate: int(candidate == vote) for candidate in candidates}
+        }
+
+    cvrs: supersimple.CVRS = {}
+    sample_cvrs: supersimple.SAMPLE_CVRS = {}
+    for ballot in range(num_sampled):
+        cvrs[str(ballot)] = random_cvr()
+        audited = (
+            random_cvr() if rand.random() < DISCREPANCY_RATE else cvrs[str(ballot)]
+        )
+        sample_cvrs[str(ballot)] = {"times_sampled": 1, "cvr": audited}
+
+    start = time.perf_counter()
+    p_value, _ = supersimple.compute_risk(RISK_LIMIT, contest, cvrs, sample_cvrs)
+    elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    exact_p_value, _ = supersimple.compute_risk(
+        RISK_LIMIT, contest, cvrs, sample_cvrs, exact=True
+    )
+    exact_elapsed = time.perf_counter() - start
+
+    print(f"{num_sampled:>8} ballots: {elapsed:.3f}s (exact: {exact_elapsed:.3f}s)")
+    print(f"  p-value: {p_value:.6g} (exact: {exact_p_value:.6g})")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000]
+    for size in sizes:
+        benchmark(size)
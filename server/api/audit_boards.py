@@ -5,7 +5,6 @@ from typing import List, Dict
 from flask import jsonify, request
 from xkcdpass import xkcd_password as xp
 from werkzeug.exceptions import Conflict, BadRequest
-from sqlalchemy import func
 from sqlalchemy.orm import contains_eager
 
 from . import api
@@ -79,6 +78,7 @@ def assign_sampled_ballots(
         buckets[0].add_batch(batch_key, len(sampled_ballots))
     balanced_buckets = BalancedBucketList(buckets)
 
+    audit_boards_by_id = {audit_board.id: audit_board for audit_board in audit_boards}
     for bucket in balanced_buckets.buckets:
         ballots_in_bucket = [
             ballot
@@ -89,6 +89,16 @@ def assign_sampled_ballots(
             ballot.audit_board_id = bucket.name
             db_session.add(ballot)
 
+        # Ballots that were audited in a previous round and sampled again
+        # count as already audited.
+        audit_board = audit_boards_by_id[bucket.name]
+        audit_board.num_sampled_ballots = len(ballots_in_bucket)
+        audit_board.num_audited_ballots = sum(
+            1
+            for ballot in ballots_in_bucket
+            if ballot.status != BallotStatus.NOT_AUDITED
+        )
+
 
 def assign_sampled_batches(
     jurisdiction: Jurisdiction, round: Round, audit_boards: List[AuditBoard]
@@ -132,6 +142,17 @@ def create_audit_boards(election: Election, jurisdiction: Jurisdiction, round: R
     else:
         assign_sampled_ballots(jurisdiction, round, audit_boards)
 
+    JurisdictionRoundProgress.query.filter_by(
+        round_id=round.id, jurisdiction_id=jurisdiction.id
+    ).update(
+        {
+            JurisdictionRoundProgress.num_audit_boards: len(audit_boards),
+            JurisdictionRoundProgress.num_audit_boards_not_signed_off: sum(
+                1 for audit_board in audit_boards if audit_board.num_sampled_ballots
+            ),
+        }
+    )
+
     db_session.commit()
 
     return jsonify(status="ok")
@@ -143,24 +164,10 @@ def round_status_by_audit_board(
     audit_boards = AuditBoard.query.filter_by(
         jurisdiction_id=jurisdiction_id, round_id=round_id
     ).all()
-    sampled_ballots_by_audit_board = dict(
-        SampledBallot.query.join(AuditBoard)
-        .filter_by(jurisdiction_id=jurisdiction_id)
-        .group_by(AuditBoard.id)
-        .values(AuditBoard.id, func.count())
-    )
-    audited_ballots_by_audit_board = dict(
-        SampledBallot.query.join(AuditBoard)
-        .filter_by(jurisdiction_id=jurisdiction_id)
-        .filter(SampledBallot.status != BallotStatus.NOT_AUDITED)
-        .group_by(AuditBoard.id)
-        .values(AuditBoard.id, func.count())
-    )
-
     return {
         ab.id: {
-            "numSampledBallots": sampled_ballots_by_audit_board.get(ab.id, 0),
-            "numAuditedBallots": audited_ballots_by_audit_board.get(ab.id, 0),
+            "numSampledBallots": ab.num_sampled_ballots,
+            "numAuditedBallots": ab.num_audited_ballots,
         }
         for ab in audit_boards
     }
@@ -305,6 +312,27 @@ def validate_sign_off(sign_off_request: JSONDict, audit_board: AuditBoard):
         raise Conflict("Audit board is not finished auditing all assigned ballots")
 
 
+def record_sign_off(audit_board: AuditBoard):
+    # Only sign off if the audit board hasn't already signed off, checking in
+    # the same statement so that concurrent sign-off requests can't both count.
+    num_signed_off = AuditBoard.query.filter_by(
+        id=audit_board.id, signed_off_at=None
+    ).update({AuditBoard.signed_off_at: datetime.utcnow()})
+
+    # Audit boards that weren't assigned any ballots don't count toward the
+    # jurisdiction's audit boards that need to sign off.
+    if num_signed_off > 0 and audit_board.num_sampled_ballots > 0:
+        JurisdictionRoundProgress.query.filter_by(
+            round_id=audit_board.round_id, jurisdiction_id=audit_board.jurisdiction_id
+        ).update(
+            {
+                JurisdictionRoundProgress.num_audit_boards_not_signed_off: (
+                    JurisdictionRoundProgress.num_audit_boards_not_signed_off - 1
+                )
+            }
+        )
+
+
 @api.route(
     "/election/<election_id>/jurisdiction/<jurisdiction_id>/round/<round_id>/audit-board/<audit_board_id>/sign-off",
     methods=["POST"],
@@ -318,7 +346,7 @@ def sign_off_audit_board(
 ):
     validate_sign_off(request.get_json(), audit_board)
 
-    audit_board.signed_off_at = datetime.utcnow()
+    record_sign_off(audit_board)
 
     if is_round_complete(election, round):
         end_round(election, round)
@@ -1,5 +1,7 @@
 import uuid
-from datetime import datetime
+import csv
+import tempfile
+from datetime import datetime, timedelta
 from sqlalchemy.orm.session import Session
 from flask import request, jsonify, Request
 from werkzeug.exceptions import BadRequest, NotFound
@@ -12,9 +14,11 @@ from ..util.process_file import (
     process_file,
     serialize_file,
     serialize_file_processing,
+    notify_file_uploaded,
 )
 from ..util.csv_download import csv_response
 from ..util.csv_parse import decode_csv_file, parse_csv, CSVValueType, CSVColumnType
+from .batch_tallies import clear_batch_tallies_file
 
 CONTAINER = "Container"
 TABULATOR = "Tabulator"
@@ -46,20 +50,57 @@ def process_ballot_manifest_file(
 
         manifest_csv = parse_csv(jurisdiction.manifest_file.contents, columns)
 
+        # Manifests can have hundreds of thousands of batches, so rather than
+        # creating a Batch object for each one, we write them into a tempfile
+        # and load it into the db using the COPY command (like we do for
+        # CVRs). We count up the batches and ballots as we go.
         num_batches = 0
         num_ballots = 0
-        for row in manifest_csv:
-            batch = Batch(
-                id=str(uuid.uuid4()),
-                name=row[BATCH_NAME],
-                jurisdiction_id=jurisdiction.id,
-                num_ballots=row[NUMBER_OF_BALLOTS],
-                container=row.get(CONTAINER, None),
-                tabulator=row.get(TABULATOR, None),
+        uploaded_at = datetime.utcnow()
+        with tempfile.TemporaryFile(mode="w+") as batches_tempfile:
+            batches_csv = csv.writer(batches_tempfile)
+            for row in manifest_csv:
+                # We order batches by created_at in some places, so we give
+                # each batch a distinct timestamp in manifest order.
+                created_at = uploaded_at + timedelta(microseconds=num_batches)
+                batches_csv.writerow(
+                    [
+                        str(uuid.uuid4()),
+                        jurisdiction.id,
+                        row.get(CONTAINER, None),
+                        row.get(TABULATOR, None),
+                        row[BATCH_NAME],
+                        row[NUMBER_OF_BALLOTS],
+                        created_at,
+                        created_at,
+                    ]
+                )
+                num_batches += 1
+                num_ballots += row[NUMBER_OF_BALLOTS]
+
+            # Unlike for CVRs, we run the COPY on the session's connection, so
+            # that it's part of the same transaction as the rest of the
+            # processing (and gets rolled back if processing fails).
+            batches_tempfile.seek(0)
+            cursor = session.connection().connection.cursor()
+            cursor.copy_expert(
+                """
+                COPY batch (
+                    id,
+                    jurisdiction_id,
+                    container,
+                    tabulator,
+                    name,
+                    num_ballots,
+                    created_at,
+                    updated_at
+                )
+                FROM STDIN
+                WITH (FORMAT CSV)
+                """,
+                batches_tempfile,
             )
-            session.add(batch)
-            num_batches += 1
-            num_ballots += batch.num_ballots
+            cursor.close()
 
         jurisdiction.manifest_num_ballots = num_ballots
         jurisdiction.manifest_num_batches = num_batches
@@ -91,6 +132,8 @@ def clear_ballot_manifest_file(jurisdiction: Jurisdiction):
 
     if jurisdiction.manifest_file_id:
         File.query.filter_by(id=jurisdiction.manifest_file_id).delete()
+    # The batch tallies are stored per batch, so they go along with the batches
+    clear_batch_tallies_file(jurisdiction)
     Batch.query.filter_by(jurisdiction=jurisdiction).delete()
 
 
@@ -105,6 +148,7 @@ def upload_ballot_manifest(
     validate_ballot_manifest_upload(request)
     clear_ballot_manifest_file(jurisdiction)
     save_ballot_manifest_file(request.files["manifest"], jurisdiction)
+    notify_file_uploaded(db_session, jurisdiction.manifest_file)
     db_session.commit()
     return jsonify(status="ok")
 
@@ -134,6 +178,7 @@ def download_ballot_manifest_file(
     if not jurisdiction.manifest_file:
         return NotFound()
 
+    assert jurisdiction.manifest_file.contents is not None
     return csv_response(
         jurisdiction.manifest_file.contents, jurisdiction.manifest_file.name
     )
@@ -294,6 +294,37 @@ def validate_audit_ballot(ballot_audit: JSONDict, jurisdiction: Jurisdiction):
             )
 
 
+def count_audited_ballot(ballot: SampledBallot, change: int):
+    # Update the progress counters when a ballot becomes audited (change = 1)
+    # or goes back to not audited (change = -1).
+    if ballot.audit_board:
+        ballot.audit_board.num_audited_ballots = AuditBoard.num_audited_ballots + change
+
+    # The ballot counts toward the progress of each round it was sampled in,
+    # once for each time it was drawn.
+    draws_by_round = (
+        SampledBallotDraw.query.filter_by(ballot_id=ballot.id)
+        .group_by(SampledBallotDraw.round_id)
+        .with_entities(SampledBallotDraw.round_id, func.count().label("num_draws"),)
+        .subquery()
+    )
+    JurisdictionRoundProgress.query.filter(
+        JurisdictionRoundProgress.jurisdiction_id == ballot.batch.jurisdiction_id,
+        JurisdictionRoundProgress.round_id == draws_by_round.c.round_id,
+    ).update(
+        {
+            JurisdictionRoundProgress.num_samples_audited: (
+                JurisdictionRoundProgress.num_samples_audited
+                + change * draws_by_round.c.num_draws
+            ),
+            JurisdictionRoundProgress.num_unique_audited: (
+                JurisdictionRoundProgress.num_unique_audited + change
+            ),
+        },
+        synchronize_session=False,
+    )
+
+
 @api.route(
     "/election/<election_id>/jurisdiction/<jurisdiction_id>/round/<round_id>/audit-board/<audit_board_id>/ballots/<ballot_id>",
     methods=["PUT"],
@@ -306,16 +337,23 @@ def audit_ballot(
     audit_board: AuditBoard,  # pylint: disable=unused-argument
     ballot_id: str,
 ):
-    ballot = SampledBallot.query.filter_by(
-        id=ballot_id, audit_board_id=audit_board.id
-    ).first()
+    ballot = (
+        SampledBallot.query.filter_by(id=ballot_id, audit_board_id=audit_board.id)
+        # Lock the ballot so that if it gets audited by concurrent requests,
+        # we only count the change in its status once.
+        .with_for_update().first()
+    )
     if not ballot:
         raise NotFound()
 
     ballot_audit = request.get_json()
     validate_audit_ballot(ballot_audit, jurisdiction)
 
+    was_audited = ballot.status != BallotStatus.NOT_AUDITED
     ballot.status = ballot_audit["status"]
+    is_audited = ballot.status != BallotStatus.NOT_AUDITED
+    if is_audited != was_audited:
+        count_audited_ballot(ballot, 1 if is_audited else -1)
     ballot.interpretations = [
         deserialize_interpretation(ballot.id, interpretation)
         for interpretation in ballot_audit["interpretations"]
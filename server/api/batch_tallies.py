@@ -1,5 +1,10 @@
 from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional, Tuple, cast as typing_cast
+import csv
+import tempfile
 import uuid
+from sqlalchemy import func
 from sqlalchemy.orm.session import Session
 from flask import request, jsonify, Request
 from werkzeug.exceptions import BadRequest, NotFound, Conflict
@@ -13,13 +18,97 @@ from ..util.process_file import (
     serialize_file,
     serialize_file_processing,
     UserError,
+    notify_file_uploaded,
 )
 from ..util.csv_download import csv_response
 from ..util.csv_parse import decode_csv_file, parse_csv, CSVValueType, CSVColumnType
+from ..util.jsonschema import JSONDict
+from ..audit_math import macro, sampler_contest
 
 BATCH_NAME = "Batch Name"
 
 
+# The max error for each batch depends on the contest's reported vote totals
+# and number of winners, which can change after the batch tallies file is
+# processed. So we save the max errors along with the contest info they were
+# computed from, and only use them if it still matches.
+def batch_max_errors_contest_key(contest: Contest) -> JSONDict:
+    return {
+        "numWinners": contest.num_winners,
+        "votes": {choice.id: choice.num_votes for choice in contest.choices},
+    }
+
+
+# How many batches to fetch from the db at a time when loading batch tallies
+BATCH_TALLIES_CHUNK_SIZE = 10000
+
+
+def stream_batch_tallies(
+    contest: Contest, jurisdiction_ids: List[str]
+) -> Iterator[Tuple[str, str, Dict[str, Dict[str, int]]]]:
+    """
+    Loads the batch tallies for the given jurisdictions from the db, a chunk
+    of batches at a time. Yields a tuple of (jurisdiction name, batch name,
+    tally) for each batch, ordered by jurisdiction name and then by the order
+    of the rows in the jurisdiction's batch tallies file. Each tally is in the format used
+    by audit_math.macro:
+        { contest_id: { choice_id: votes, "ballots": num_ballots }}
+    """
+    tallies = (
+        BatchTally.query.join(Batch)
+        .join(Jurisdiction)
+        .join(ContestChoice)
+        .filter(ContestChoice.contest_id == contest.id)
+        .filter(Batch.jurisdiction_id.in_(jurisdiction_ids))
+        .group_by(Jurisdiction.name, Batch.id)
+        .order_by(Jurisdiction.name, func.min(BatchTally.row_index))
+        .with_entities(
+            Jurisdiction.name,
+            Batch.name,
+            Batch.num_ballots,
+            func.json_object_agg(BatchTally.contest_choice_id, BatchTally.votes),
+        )
+        .yield_per(BATCH_TALLIES_CHUNK_SIZE)
+    )
+    for jurisdiction_name, batch_name, num_ballots, votes in tallies:
+        yield jurisdiction_name, batch_name, {
+            contest.id: {"ballots": num_ballots, **votes}
+        }
+
+
+def compute_batch_max_errors(
+    contest: Contest, batch_tallies: Dict[str, Dict[str, Dict[str, int]]]
+) -> JSONDict:
+    max_errors = macro.compute_max_errors(
+        batch_tallies, sampler_contest.from_db_contest(contest)
+    )
+    return {
+        "contest": batch_max_errors_contest_key(contest),
+        # Store the errors as strings so we get back the exact same Decimals
+        "maxErrors": {batch: str(error) for batch, error in max_errors.items()},
+    }
+
+
+def load_batch_max_errors(
+    jurisdiction: Jurisdiction, contest: Contest
+) -> Dict[str, Decimal]:
+    batch_max_errors = typing_cast(Optional[JSONDict], jurisdiction.batch_max_errors)
+    contest_key = batch_max_errors_contest_key(contest)
+    if batch_max_errors is None or batch_max_errors["contest"] != contest_key:
+        batch_max_errors = compute_batch_max_errors(
+            contest,
+            {
+                batch_name: tally
+                for _, batch_name, tally in stream_batch_tallies(
+                    contest, [jurisdiction.id]
+                )
+            },
+        )
+    return {
+        batch: Decimal(error) for batch, error in batch_max_errors["maxErrors"].items()
+    }
+
+
 def process_batch_tallies_file(
     session: Session, jurisdiction: Jurisdiction, file: File
 ):
@@ -39,7 +128,17 @@ def process_batch_tallies_file(
         )
 
         # Validate that the batch names match the ballot manifest
-        jurisdiction_batch_names = {batch.name for batch in jurisdiction.batches}
+        batches = (
+            session.query(Batch)
+            .filter_by(jurisdiction_id=jurisdiction.id)
+            .values(Batch.name, Batch.id, Batch.num_ballots)
+        )
+        batch_ids_by_name = {}
+        num_ballots_by_batch = {}
+        for batch_name, batch_id, num_ballots in batches:
+            batch_ids_by_name[batch_name] = batch_id
+            num_ballots_by_batch[batch_name] = num_ballots
+        jurisdiction_batch_names = set(batch_ids_by_name)
         tally_batch_names = {row[BATCH_NAME] for row in batch_tallies_csv}
         extra_batch_names = sorted(tally_batch_names - jurisdiction_batch_names)
         missing_batch_names = sorted(jurisdiction_batch_names - tally_batch_names)
@@ -59,9 +158,6 @@ def process_batch_tallies_file(
             )
 
         # Validate that the sum tallies for each batch don't exceed the allowed votes
-        num_ballots_by_batch = {
-            batch.name: batch.num_ballots for batch in jurisdiction.batches
-        }
         for row in batch_tallies_csv:
             allowed_tallies = (
                 num_ballots_by_batch[row[BATCH_NAME]] * contest.votes_allowed
@@ -75,17 +171,49 @@ def process_batch_tallies_file(
                     + f" of votes allowed for the contest ({contest.votes_allowed} votes per ballot)."
                 )
 
-        # Save the tallies as a JSON blob in the format needed by the
-        # audit_math.macro module, so we can easily load it up and pass it in
-        jurisdiction.batch_tallies = {
-            row[BATCH_NAME]: {
-                contest.id: {
-                    "ballots": num_ballots_by_batch[row[BATCH_NAME]],
-                    **{choice.id: row[choice.name] for choice in contest.choices},
+        # Statewide contests can have hundreds of thousands of batches, so
+        # rather than creating a BatchTally object for each batch and choice,
+        # we write them into a tempfile and load it into the db using the COPY
+        # command (like we do for ballot manifests).
+        with tempfile.TemporaryFile(mode="w+") as tallies_tempfile:
+            tallies_csv = csv.writer(tallies_tempfile)
+            for row_index, row in enumerate(batch_tallies_csv):
+                for choice in contest.choices:
+                    tallies_csv.writerow(
+                        [
+                            batch_ids_by_name[row[BATCH_NAME]],
+                            choice.id,
+                            row[choice.name],
+                            row_index,
+                        ]
+                    )
+
+            # Run the COPY on the session's connection, so that it gets rolled
+            # back if processing fails.
+            tallies_tempfile.seek(0)
+            cursor = session.connection().connection.cursor()
+            cursor.copy_expert(
+                """
+                COPY batch_tally (batch_id, contest_choice_id, votes, row_index)
+                FROM STDIN
+                WITH (FORMAT CSV)
+                """,
+                tallies_tempfile,
+            )
+            cursor.close()
+
+        jurisdiction.batch_max_errors = compute_batch_max_errors(
+            contest,
+            {
+                row[BATCH_NAME]: {
+                    contest.id: {
+                        "ballots": num_ballots_by_batch[row[BATCH_NAME]],
+                        **{choice.id: row[choice.name] for choice in contest.choices},
+                    }
                 }
-            }
-            for row in batch_tallies_csv
-        }
+                for row in batch_tallies_csv
+            },
+        )
 
     process_file(session, file, process)
 
@@ -112,7 +240,14 @@ def validate_batch_tallies_upload(
 def clear_batch_tallies_file(jurisdiction: Jurisdiction):
     if jurisdiction.batch_tallies_file:
         db_session.delete(jurisdiction.batch_tallies_file)
-        jurisdiction.batch_tallies = None
+        BatchTally.query.filter(
+            BatchTally.batch_id.in_(
+                Batch.query.filter_by(jurisdiction_id=jurisdiction.id)
+                .with_entities(Batch.id)
+                .subquery()
+            )
+        ).delete(synchronize_session=False)
+        jurisdiction.batch_max_errors = None
 
 
 @api.route(
@@ -136,6 +271,7 @@ def upload_batch_tallies(
         contents=decode_csv_file(batch_tallies.read()),
         uploaded_at=datetime.utcnow(),
     )
+    notify_file_uploaded(db_session, jurisdiction.batch_tallies_file)
     db_session.commit()
     return jsonify(status="ok")
 
@@ -165,6 +301,7 @@ def download_batch_tallies_file(
     if not jurisdiction.batch_tallies_file:
         return NotFound()
 
+    assert jurisdiction.batch_tallies_file.contents is not None
     return csv_response(
         jurisdiction.batch_tallies_file.contents, jurisdiction.batch_tallies_file.name
     )
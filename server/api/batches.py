@@ -173,6 +173,23 @@ def record_batch_results(
                 )
             )
 
+    num_draws = SampledBatchDraw.query.filter(
+        SampledBatchDraw.batch_id.in_(batch_results.keys()),
+        SampledBatchDraw.round_id == round.id,
+    ).count()
+    JurisdictionRoundProgress.query.filter_by(
+        round_id=round.id, jurisdiction_id=jurisdiction.id
+    ).update(
+        {
+            JurisdictionRoundProgress.num_samples_audited: (
+                JurisdictionRoundProgress.num_samples_audited + num_draws
+            ),
+            JurisdictionRoundProgress.num_unique_audited: (
+                JurisdictionRoundProgress.num_unique_audited + len(batch_results)
+            ),
+        }
+    )
+
     if is_round_complete(election, round):
         end_round(election, round)
 
@@ -1,14 +1,16 @@
 import uuid
-import io
 import tempfile
 import csv
 import typing
+import warnings
+from typing import Dict, List
 from collections import defaultdict
 import re
 from datetime import datetime
 from sqlalchemy.orm.session import Session
-from flask import request, jsonify, Request
+from flask import request, jsonify, Request, stream_with_context
 from werkzeug.exceptions import BadRequest, NotFound, Conflict
+import numpy
 
 from . import api
 from ..database import db_session, engine as db_engine
@@ -18,11 +20,12 @@ from ..util.process_file import (
     process_file,
     serialize_file,
     serialize_file_processing,
+    notify_file_uploaded,
 )
 from ..util.csv_download import csv_response
-from ..util.csv_parse import decode_csv_file
+from ..util.csv_parse import decode_csv_file_chunks
+from ..util.file_chunks import save_file_chunks, read_file_chunks, file_lines
 from ..util.jsonschema import JSONDict
-from ..util.group_by import group_by
 
 
 def set_contest_metadata_from_cvrs(contest: Contest):
@@ -60,13 +63,96 @@ def set_contest_metadata_from_cvrs(contest: Contest):
             choice.num_votes += choice_metadata["num_votes"]
 
 
+# Number of CVR rows to tally at once
+CVR_TALLY_CHUNK_SIZE = 10000
+
+# Codes for interpretation cells that don't contain a vote count
+BLANK = -1  # The contest isn't on the ballot
+MISSING = -2  # The row ended before this column
+
+
+def fill_blank_interpretations(interpretations: str) -> str:
+    # Each pass only fills every other cell in a run of blanks
+    text = "," + interpretations + ","
+    text = text.replace(",,", f",{BLANK},").replace(",,", f",{BLANK},")
+    return text[1:-1]
+
+
+def parse_interpretations(interpretation_rows: List[str]) -> numpy.ndarray:
+    """
+    Parses rows of comma-separated interpretations (in the format we store in
+    CvrBallot.interpretations) into a matrix with one row per ballot and one
+    column per contest choice. Every row must have the same number of cells.
+    Blank cells are parsed as BLANK. Raises ValueError if any cell isn't a
+    vote count.
+    """
+    if not interpretation_rows:
+        return numpy.zeros((0, 0), dtype=numpy.int16)
+
+    # Parsing the whole chunk as a single string of numbers is much faster than
+    # converting each cell individually. We just have to fill in the blank
+    # cells first.
+    text = fill_blank_interpretations(",".join(interpretation_rows))
+    num_rows = len(interpretation_rows)
+    num_columns = interpretation_rows[0].count(",") + 1
+    # Older versions of numpy stop parsing at a cell that isn't a number and
+    # only warn about it, so make sure that fails too.
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning)
+        # numpy wraps values that don't fit in the dtype, so parse into int64
+        # and check the range before narrowing.
+        cells = numpy.fromstring(text, dtype=numpy.int64, sep=",")
+    if cells.size != num_rows * num_columns or (cells < MISSING).any():
+        raise ValueError("Could not parse interpretations")
+    # A vote count too big for int16 is always an overvote, so capping it
+    # doesn't change the tally.
+    cells = cells.clip(max=numpy.iinfo(numpy.int16).max).astype(numpy.int16)
+    return cells.reshape(num_rows, num_columns)
+
+
+def tally_interpretations(
+    contests_metadata: Dict[str, JSONDict],
+    contest_columns: Dict[str, List[int]],
+    contest_choices: List[str],
+    interpretation_rows: List[str],
+):
+    """
+    Adds the votes in a chunk of CVR rows to the running totals in
+    contests_metadata (ContestChoice.num_votes and Contest.total_ballots_cast).
+    Contests are not on a ballot if any of their cells are blank (or all of
+    them are missing), and overvoted contests count towards
+    total_ballots_cast but not towards any choice's votes.
+    """
+    if not interpretation_rows:
+        return
+    interpretations = parse_interpretations(interpretation_rows)
+
+    for contest_name, columns in contest_columns.items():
+        contest_metadata = contests_metadata[contest_name]
+        contest_interpretations = interpretations[:, columns]
+
+        not_on_ballot = (contest_interpretations == BLANK).any(axis=1) | (
+            contest_interpretations == MISSING
+        ).all(axis=1)
+        votes = contest_interpretations.clip(min=0)
+        on_ballot = ~not_on_ballot
+        contest_metadata["total_ballots_cast"] += int(on_ballot.sum())
+
+        not_overvote = votes.sum(axis=1) <= contest_metadata["votes_allowed"]
+        choice_votes = votes[on_ballot & not_overvote].sum(axis=0)
+        for column, num_votes in zip(columns, choice_votes):
+            contest_metadata["choices"][contest_choices[column]]["num_votes"] += int(
+                num_votes
+            )
+
+
 def process_cvr_file(session: Session, jurisdiction: Jurisdiction, file: File):
     assert jurisdiction.cvr_file_id == file.id
 
     def process():
-        cvrs = csv.reader(
-            io.StringIO(jurisdiction.cvr_file.contents, newline=None), delimiter=","
-        )
+        # CVR files can be huge, so we stream the file out of the db line by
+        # line rather than loading it all at once.
+        cvrs = csv.reader(file_lines(read_file_chunks(session, file)), delimiter=",")
 
         # Parse out all the initial metadata
         _election_name = next(cvrs)[0]
@@ -103,6 +189,13 @@ def process_cvr_file(session: Session, jurisdiction: Jurisdiction, file: File):
             # Will be counted below
             contests_metadata[contest_name]["total_ballots_cast"] = 0
 
+        # Map each contest to the interpretation columns for its choices
+        num_columns = min(len(contest_names), len(contest_choices))
+        contest_columns: Dict[str, List[int]] = defaultdict(list)
+        for column, contest_name in enumerate(contest_names[:num_columns]):
+            contest_columns[contest_name].append(column)
+        interpretations_chunk: List[str] = []
+
         batch_key_to_id = {
             (batch.tabulator, batch.name): batch.id for batch in jurisdiction.batches
         }
@@ -127,48 +220,48 @@ def process_cvr_file(session: Session, jurisdiction: Jurisdiction, file: File):
                 ] = row[:first_contest_column]
                 interpretations = row[first_contest_column:]
                 db_batch_id = batch_key_to_id[(tabulator_number, batch_id)]
+                # Store the interpretation columns as a Postgres array literal
+                # (e.g. {1,0,-1,-1}) - we can pick out the columns for a
+                # contest for just the ballots that get sampled using the
+                # contest metadata we stored above
+                ballots_row_interpretations = ",".join(interpretations)
                 ballots_csv.writerow(
                     [
                         db_batch_id,
                         record_id,
                         imprinted_id,
-                        # Store the raw interpretation columns to save time/space -
-                        # we can parse them on demand for just the ballots that get
-                        # sampled using the contest metadata we stored above
-                        ",".join(interpretations),
+                        "{"
+                        + fill_blank_interpretations(ballots_row_interpretations)
+                        + "}",
                     ]
                 )
 
                 # Add to our running totals for ContestChoice.num_votes and
-                # Contest.total_ballots_cast
-                contests_on_ballot = set()
-                interpretations_by_contest = group_by(
-                    zip(contest_names, contest_choices, interpretations),
-                    key=lambda tuple: tuple[0],  # contest_name
-                )
-                for contest_name, interpretations in interpretations_by_contest.items():
-                    # Skip contests not on ballot
-                    if any(
-                        interpretation == "" for _, _, interpretation in interpretations
-                    ):
-                        continue
-                    contests_on_ballot.add(contest_name)
-
-                    # Skip overvotes
-                    votes = sum(
-                        int(interpretation) for _, _, interpretation in interpretations
+                # Contest.total_ballots_cast. Tallying row by row is slow for
+                # millions of ballots, so we tally in chunks of rows at a time.
+                if len(interpretations) != num_columns:
+                    # Pad (or trim) the row to one cell per contest choice
+                    interpretations = (interpretations + [str(MISSING)] * num_columns)[
+                        :num_columns
+                    ]
+                    interpretations_chunk.append(",".join(interpretations))
+                else:
+                    interpretations_chunk.append(ballots_row_interpretations)
+                if len(interpretations_chunk) == CVR_TALLY_CHUNK_SIZE:
+                    tally_interpretations(
+                        contests_metadata,
+                        contest_columns,
+                        contest_choices,
+                        interpretations_chunk,
                     )
-                    if votes > contests_metadata[contest_name]["votes_allowed"]:
-                        continue
-
-                    for _, choice_name, interpretation in interpretations:
-                        contests_metadata[contest_name]["choices"][choice_name][
-                            "num_votes"
-                        ] += int(interpretation)
-
-                for contest_name in contests_on_ballot:
-                    contests_metadata[contest_name]["total_ballots_cast"] += 1
+                    interpretations_chunk = []
 
+            tally_interpretations(
+                contests_metadata,
+                contest_columns,
+                contest_choices,
+                interpretations_chunk,
+            )
             jurisdiction.cvr_contests_metadata = contests_metadata
 
             # In order to use COPY, we have to bypass SQLAlchemy and use
@@ -229,12 +322,13 @@ def validate_cvr_upload(
 # We save the CVR file, and bgcompute finds it and processes it in
 # the background.
 def save_cvr_file(cvr, jurisdiction: Jurisdiction):
-    cvr_string = decode_csv_file(cvr.read())
     jurisdiction.cvr_file = File(
-        id=str(uuid.uuid4()),
-        name=cvr.filename,
-        contents=cvr_string,
-        uploaded_at=datetime.utcnow(),
+        id=str(uuid.uuid4()), name=cvr.filename, uploaded_at=datetime.utcnow(),
+    )
+    # CVR files can be huge, so we decode and save them in chunks rather than
+    # reading the whole file into memory.
+    save_file_chunks(
+        db_session, jurisdiction.cvr_file, decode_csv_file_chunks(cvr.stream)
     )
 
 
@@ -261,6 +355,7 @@ def upload_cvrs(
     validate_cvr_upload(request, election, jurisdiction)
     clear_cvr_file(jurisdiction)
     save_cvr_file(request.files["cvrs"], jurisdiction)
+    notify_file_uploaded(db_session, jurisdiction.cvr_file)
     db_session.commit()
     return jsonify(status="ok")
 
@@ -288,7 +383,10 @@ def download_cvr_file(
     if not jurisdiction.cvr_file:
         return NotFound()
 
-    return csv_response(jurisdiction.cvr_file.contents, jurisdiction.cvr_file.name)
+    return csv_response(
+        stream_with_context(read_file_chunks(db_session, jurisdiction.cvr_file)),
+        jurisdiction.cvr_file.name,
+    )
 
 
 @api.route(
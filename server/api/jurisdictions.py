@@ -1,11 +1,12 @@
-from typing import Dict, Optional, Mapping
+from typing import Dict, List, Optional, Mapping
 import enum
 import uuid
 import datetime
 import csv
 import io
 from flask import jsonify, request
-from sqlalchemy import func
+from sqlalchemy import func, and_
+from sqlalchemy.orm import joinedload
 from werkzeug.exceptions import Conflict
 
 from . import api
@@ -13,7 +14,11 @@ from ..models import *  # pylint: disable=wildcard-import
 from ..database import db_session
 from ..auth import restrict_access, UserType
 from .rounds import get_current_round, sampled_all_ballots
-from ..util.process_file import serialize_file, serialize_file_processing
+from ..util.process_file import (
+    serialize_file,
+    serialize_file_processing,
+    notify_file_uploaded,
+)
 from ..util.jsonschema import JSONDict
 from ..util.csv_parse import decode_csv_file
 from ..util.csv_download import csv_response
@@ -46,6 +51,27 @@ def serialize_jurisdiction(
     return json_jurisdiction
 
 
+def serialize_jurisdictions(election: Election) -> List[JSONDict]:
+    current_round = get_current_round(election)
+    round_status = round_status_by_jurisdiction(election, current_round)
+    # Load each jurisdiction's files along with it, rather than lazy-loading
+    # them one jurisdiction at a time in serialize_jurisdiction.
+    jurisdictions = (
+        Jurisdiction.query.filter_by(election_id=election.id)
+        .order_by(Jurisdiction.name)
+        .options(
+            joinedload(Jurisdiction.manifest_file),
+            joinedload(Jurisdiction.batch_tallies_file),
+            joinedload(Jurisdiction.cvr_file),
+        )
+        .all()
+    )
+    return [
+        serialize_jurisdiction(election, jurisdiction, round_status[jurisdiction.id])
+        for jurisdiction in jurisdictions
+    ]
+
+
 class JurisdictionStatus(str, enum.Enum):
     NOT_STARTED = "NOT_STARTED"
     IN_PROGRESS = "IN_PROGRESS"
@@ -64,157 +90,145 @@ def round_status_by_jurisdiction(
 
 
 def ballot_round_status(election: Election, round: Round) -> Dict[str, JSONDict]:
-    audit_boards_set_up = dict(
-        AuditBoard.query.filter_by(round_id=round.id)
-        .group_by(AuditBoard.jurisdiction_id)
-        .values(AuditBoard.jurisdiction_id, func.count())
+    # The audit admin's dashboard polls for these progress numbers throughout
+    # the audit, so rather than counting the sample on each request, we read
+    # the counters we keep in JurisdictionRoundProgress, along with the
+    # offline results for offline audits, in one query.
+    offline_result_counts = (
+        JurisdictionResult.query.filter_by(round_id=round.id)
+        .group_by(JurisdictionResult.jurisdiction_id)
+        .with_entities(
+            JurisdictionResult.jurisdiction_id, func.count().label("num_results")
+        )
+        .cte("offline_result_counts")
     )
-    audit_boards_with_ballots_not_signed_off = (
-        dict(
-            AuditBoard.query.filter_by(round_id=round.id, signed_off_at=None)
-            .join(SampledBallot)
-            .group_by(AuditBoard.jurisdiction_id)
-            .values(AuditBoard.jurisdiction_id, func.count(AuditBoard.id.distinct()))
+    offline_batch_result_totals = (
+        OfflineBatchResult.query.join(Jurisdiction)
+        .filter_by(election_id=election.id)
+        .group_by(OfflineBatchResult.jurisdiction_id)
+        .with_entities(
+            OfflineBatchResult.jurisdiction_id,
+            func.sum(OfflineBatchResult.result).label("total_votes"),
+            func.count(OfflineBatchResult.batch_name.distinct()).label("num_batches"),
         )
-        if election.online
-        else {}
+        .cte("offline_batch_result_totals")
     )
 
-    ballots_in_round = (
-        SampledBallot.query.join(SampledBallotDraw)
-        .filter_by(round_id=round.id)
-        .distinct(SampledBallot.id)
-        .subquery()
-    )
-    ballot_count_by_jurisdiction = dict(
-        SampledBallot.query.join(
-            ballots_in_round, SampledBallot.id == ballots_in_round.columns.id
+    def count(column):
+        return func.coalesce(column, 0)
+
+    jurisdictions = (
+        Jurisdiction.query.filter_by(election_id=election.id)
+        .outerjoin(
+            JurisdictionRoundProgress,
+            and_(
+                JurisdictionRoundProgress.jurisdiction_id == Jurisdiction.id,
+                JurisdictionRoundProgress.round_id == round.id,
+            ),
         )
-        .join(Batch)
-        .group_by(Batch.jurisdiction_id)
-        .values(Batch.jurisdiction_id, func.count())
-    )
-    audited_ballot_count_by_jurisdiction = dict(
-        SampledBallot.query.join(
-            ballots_in_round, SampledBallot.id == ballots_in_round.columns.id
+        .outerjoin(
+            offline_result_counts,
+            offline_result_counts.c.jurisdiction_id == Jurisdiction.id,
+        )
+        .outerjoin(
+            offline_batch_result_totals,
+            offline_batch_result_totals.c.jurisdiction_id == Jurisdiction.id,
+        )
+        .with_entities(
+            Jurisdiction.id,
+            Jurisdiction.manifest_num_ballots,
+            Jurisdiction.finalized_offline_batch_results_at,
+            count(JurisdictionRoundProgress.num_samples).label("num_samples"),
+            count(JurisdictionRoundProgress.num_samples_audited).label(
+                "num_samples_audited"
+            ),
+            count(JurisdictionRoundProgress.num_unique).label("num_ballots"),
+            count(JurisdictionRoundProgress.num_unique_audited).label(
+                "num_ballots_audited"
+            ),
+            count(JurisdictionRoundProgress.num_audit_boards).label("num_set_up"),
+            count(JurisdictionRoundProgress.num_audit_boards_not_signed_off).label(
+                "num_not_signed_off"
+            ),
+            count(offline_result_counts.c.num_results).label("num_offline_results"),
+            count(offline_batch_result_totals.c.total_votes).label(
+                "offline_batch_result_total"
+            ),
+            count(offline_batch_result_totals.c.num_batches).label(
+                "num_offline_batches"
+            ),
         )
-        .filter(SampledBallot.status != BallotStatus.NOT_AUDITED)
-        .join(Batch)
-        .group_by(Batch.jurisdiction_id)
-        .values(Batch.jurisdiction_id, func.count(SampledBallot.id))
+        .all()
     )
 
-    sample_count_by_jurisdiction = dict(
-        SampledBallotDraw.query.filter_by(round_id=round.id)
-        .join(SampledBallot)
-        .join(Batch)
-        .group_by(Batch.jurisdiction_id)
-        .values(Batch.jurisdiction_id, func.count())
-    )
-    audited_sample_count_by_jurisdiction = dict(
-        SampledBallotDraw.query.filter_by(round_id=round.id)
-        .join(SampledBallot)
-        .filter(SampledBallot.status != BallotStatus.NOT_AUDITED)
-        .join(Batch)
-        .group_by(Batch.jurisdiction_id)
-        .values(Batch.jurisdiction_id, func.count())
-    )
+    did_sample_all_ballots = sampled_all_ballots(round, election)
 
     # Since we require that JAs record results for all contests at once, we
     # only need to check if any JurisdictionResult exists to know if all
     # results have been recorded.
-    jurisdictions_with_offline_results_recorded = (
-        {
-            jurisdiction_id
-            for jurisdiction_id, in (
-                JurisdictionResult.query.filter_by(round_id=round.id)
-                .group_by(JurisdictionResult.jurisdiction_id)
-                .values(JurisdictionResult.jurisdiction_id)
-            )
-        }
-        if not election.online
-        else {}
-    )
-
-    did_sample_all_ballots = sampled_all_ballots(round, election)
-
-    # Special case: if we sampled all ballots, provide progress reports based
-    # on the offline batch results
-    jurisdiction_offline_batch_result_totals = (
-        dict(
-            OfflineBatchResult.query.join(Jurisdiction)
-            .filter_by(election_id=election.id)
-            .group_by(Jurisdiction.id)
-            .values(Jurisdiction.id, func.sum(OfflineBatchResult.result))
-        )
-        if did_sample_all_ballots
-        else {}
-    )
+    def offline_results_recorded(jurisdiction) -> bool:
+        return bool(jurisdiction.num_offline_results > 0)
 
-    def num_samples(jurisdiction: Jurisdiction) -> int:
+    def num_samples(jurisdiction) -> int:
         # Special case: if we sampled all ballots, we know the number of
         # ballots from the manifest
         if did_sample_all_ballots:
-            return jurisdiction.manifest_num_ballots or 0
-        return sample_count_by_jurisdiction.get(jurisdiction.id, 0)
+            return int(jurisdiction.manifest_num_ballots or 0)
+        return int(jurisdiction.num_samples)
 
-    def num_ballots(jurisdiction: Jurisdiction) -> int:
+    def num_ballots(jurisdiction) -> int:
         if did_sample_all_ballots:
-            return jurisdiction.manifest_num_ballots or 0
-        return ballot_count_by_jurisdiction.get(jurisdiction.id, 0)
+            return int(jurisdiction.manifest_num_ballots or 0)
+        return int(jurisdiction.num_ballots)
 
     # NOT_STARTED = the jurisdiction hasn’t set up any audit boards
     # IN_PROGRESS = the audit boards are set up
     # COMPLETE =
     # - if online, all of the audit boards have signed off on their ballots
     # - if offline, the offline results have been recorded for all contests
-    def status(jurisdiction: Jurisdiction) -> JurisdictionStatus:
-        num_set_up = audit_boards_set_up.get(jurisdiction.id, 0)
-        num_sampled = num_samples(jurisdiction)
-
+    def status(jurisdiction) -> JurisdictionStatus:
         # Special case: jurisdictions that don't get any ballots assigned are
         # COMPLETE from the get-go
-        if num_sampled == 0:
+        if num_samples(jurisdiction) == 0:
             return JurisdictionStatus.COMPLETE
-        if num_set_up == 0:
+        if jurisdiction.num_set_up == 0:
             return JurisdictionStatus.NOT_STARTED
 
         if election.online:
-            num_not_signed_off = audit_boards_with_ballots_not_signed_off.get(
-                jurisdiction.id, 0
-            )
-            if num_not_signed_off > 0:
+            if jurisdiction.num_not_signed_off > 0:
                 return JurisdictionStatus.IN_PROGRESS
         elif did_sample_all_ballots:
             if jurisdiction.finalized_offline_batch_results_at is None:
                 return JurisdictionStatus.IN_PROGRESS
         else:
-            if jurisdiction.id not in jurisdictions_with_offline_results_recorded:
+            if not offline_results_recorded(jurisdiction):
                 return JurisdictionStatus.IN_PROGRESS
 
         return JurisdictionStatus.COMPLETE
 
-    def num_samples_audited(jurisdiction: Jurisdiction) -> int:
+    # Special case: if we sampled all ballots, provide progress reports based
+    # on the offline batch results
+    def num_samples_audited(jurisdiction) -> int:
         if election.online:
-            return audited_sample_count_by_jurisdiction.get(jurisdiction.id, 0)
+            return int(jurisdiction.num_samples_audited)
         elif did_sample_all_ballots:
-            return jurisdiction_offline_batch_result_totals.get(jurisdiction.id, 0)
+            return int(jurisdiction.offline_batch_result_total)
         else:
             return (
                 num_samples(jurisdiction)
-                if jurisdiction.id in jurisdictions_with_offline_results_recorded
+                if offline_results_recorded(jurisdiction)
                 else 0
             )
 
-    def num_ballots_audited(jurisdiction: Jurisdiction) -> int:
+    def num_ballots_audited(jurisdiction) -> int:
         if election.online:
-            return audited_ballot_count_by_jurisdiction.get(jurisdiction.id, 0)
+            return int(jurisdiction.num_ballots_audited)
         elif did_sample_all_ballots:
-            return jurisdiction_offline_batch_result_totals.get(jurisdiction.id, 0)
+            return int(jurisdiction.offline_batch_result_total)
         else:
             return (
                 num_ballots(jurisdiction)
-                if jurisdiction.id in jurisdictions_with_offline_results_recorded
+                if offline_results_recorded(jurisdiction)
                 else 0
             )
 
@@ -226,120 +240,82 @@ def ballot_round_status(election: Election, round: Round) -> Dict[str, JSONDict]
             "numUnique": num_ballots(jurisdiction),
             "numUniqueAudited": num_ballots_audited(jurisdiction),
         }
-        for jurisdiction in election.jurisdictions
+        for jurisdiction in jurisdictions
     }
 
     # Special case: when all ballots sampled, also add a count of batches
     # submitted.
     if did_sample_all_ballots:
-        num_batches_by_jurisdiction = dict(
-            OfflineBatchResult.query.join(Jurisdiction)
-            .filter_by(election_id=election.id)
-            .group_by(Jurisdiction.id)
-            .values(
-                Jurisdiction.id, func.count(OfflineBatchResult.batch_name.distinct())
-            )
-        )
-        for jurisdiction_id in statuses:
-            statuses[jurisdiction_id][
+        for jurisdiction in jurisdictions:
+            statuses[jurisdiction.id][
                 "numBatchesAudited"
-            ] = num_batches_by_jurisdiction.get(jurisdiction_id, 0)
+            ] = jurisdiction.num_offline_batches
 
     return statuses
 
 
 def batch_round_status(election: Election, round: Round) -> Dict[str, JSONDict]:
-    jurisdictions_with_audit_boards = set(
-        jurisdiction_id
-        for jurisdiction_id, in AuditBoard.query.filter_by(round_id=round.id).values(
-            AuditBoard.jurisdiction_id.distinct()
-        )
-    )
-
-    sample_count_by_jurisdiction = dict(
-        SampledBatchDraw.query.filter_by(round_id=round.id)
-        .join(Batch)
-        .group_by(Batch.jurisdiction_id)
-        .values(
-            Batch.jurisdiction_id, func.count(SampledBatchDraw.ticket_number.distinct())
+    # Like ballot_round_status, we read the progress counters we keep in
+    # JurisdictionRoundProgress. A batch counts as audited once any results
+    # are recorded for it.
+    def count(column):
+        return func.coalesce(column, 0)
+
+    jurisdictions = (
+        Jurisdiction.query.filter_by(election_id=election.id)
+        .outerjoin(
+            JurisdictionRoundProgress,
+            and_(
+                JurisdictionRoundProgress.jurisdiction_id == Jurisdiction.id,
+                JurisdictionRoundProgress.round_id == round.id,
+            ),
         )
-    )
-    audited_sample_count_by_jurisdiction = dict(
-        SampledBatchDraw.query.filter_by(round_id=round.id)
-        .join(Batch)
-        .join(BatchResult)
-        .group_by(Batch.jurisdiction_id)
-        .having(func.count(BatchResult.batch_id) > 0)
-        .values(
-            Batch.jurisdiction_id, func.count(SampledBatchDraw.ticket_number.distinct())
+        .with_entities(
+            Jurisdiction.id,
+            count(JurisdictionRoundProgress.num_samples).label("num_samples"),
+            count(JurisdictionRoundProgress.num_samples_audited).label(
+                "num_samples_audited"
+            ),
+            count(JurisdictionRoundProgress.num_unique).label("num_batches"),
+            count(JurisdictionRoundProgress.num_unique_audited).label(
+                "num_batches_audited"
+            ),
+            count(JurisdictionRoundProgress.num_audit_boards).label("num_set_up"),
         )
+        .all()
     )
 
-    batch_count_by_jurisdiction = dict(
-        Batch.query.join(SampledBatchDraw)
-        .filter_by(round_id=round.id)
-        .group_by(Batch.jurisdiction_id)
-        .values(Batch.jurisdiction_id, func.count(Batch.id.distinct()))
-    )
-    audited_batch_count_by_jurisdiction = dict(
-        Batch.query.join(SampledBatchDraw)
-        .filter_by(round_id=round.id)
-        .join(BatchResult)
-        .group_by(Batch.jurisdiction_id)
-        .having(func.count(BatchResult.batch_id) > 0)
-        .values(Batch.jurisdiction_id, func.count(Batch.id.distinct()))
-    )
-
-    def num_samples(jurisdiction_id: str) -> int:
-        return sample_count_by_jurisdiction.get(jurisdiction_id, 0)
-
-    def num_samples_audited(jurisdiction_id: str) -> int:
-        return audited_sample_count_by_jurisdiction.get(jurisdiction_id, 0)
-
-    def num_batches(jurisdiction_id: str) -> int:
-        return batch_count_by_jurisdiction.get(jurisdiction_id, 0)
-
-    def num_batches_audited(jurisdiction_id: str) -> int:
-        return audited_batch_count_by_jurisdiction.get(jurisdiction_id, 0)
-
     # NOT_STARTED = the jurisdiction hasn’t set up any audit boards
     # IN_PROGRESS = the audit boards are set up
     # COMPLETE = all the batch results are recorded
-    def status(jurisdiction_id: str) -> JurisdictionStatus:
+    def status(jurisdiction) -> JurisdictionStatus:
         # Special case: jurisdictions that don't get any batches assigned are
         # COMPLETE from the get-go
-        if num_samples(jurisdiction_id) == 0:
+        if jurisdiction.num_samples == 0:
             return JurisdictionStatus.COMPLETE
-        if jurisdiction_id not in jurisdictions_with_audit_boards:
+        if jurisdiction.num_set_up == 0:
             return JurisdictionStatus.NOT_STARTED
-        if num_samples_audited(jurisdiction_id) < num_samples(jurisdiction_id):
+        if jurisdiction.num_samples_audited < jurisdiction.num_samples:
             return JurisdictionStatus.IN_PROGRESS
         else:
             return JurisdictionStatus.COMPLETE
 
     return {
-        j.id: {
-            "status": status(j.id),
-            "numSamples": num_samples(j.id),
-            "numSamplesAudited": num_samples_audited(j.id),
-            "numUnique": num_batches(j.id),
-            "numUniqueAudited": num_batches_audited(j.id),
+        jurisdiction.id: {
+            "status": status(jurisdiction),
+            "numSamples": jurisdiction.num_samples,
+            "numSamplesAudited": jurisdiction.num_samples_audited,
+            "numUnique": jurisdiction.num_batches,
+            "numUniqueAudited": jurisdiction.num_batches_audited,
         }
-        for j in election.jurisdictions
+        for jurisdiction in jurisdictions
     }
 
 
 @api.route("/election/<election_id>/jurisdiction", methods=["GET"])
 @restrict_access([UserType.AUDIT_ADMIN])
 def list_jurisdictions(election: Election):
-    current_round = get_current_round(election)
-    round_status = round_status_by_jurisdiction(election, current_round)
-
-    json_jurisdictions = [
-        serialize_jurisdiction(election, jurisdiction, round_status[jurisdiction.id])
-        for jurisdiction in election.jurisdictions
-    ]
-    return jsonify({"jurisdictions": json_jurisdictions})
+    return jsonify({"jurisdictions": serialize_jurisdictions(election)})
 
 
 @api.route("/election/<election_id>/jurisdiction/file", methods=["GET"])
@@ -357,6 +333,7 @@ def download_jurisdictions_file(election: Election):
     if not election.jurisdictions_file:
         return NotFound()
 
+    assert election.jurisdictions_file.contents is not None
     return csv_response(
         election.jurisdictions_file.contents, election.jurisdictions_file.name
     )
@@ -424,6 +401,7 @@ def update_jurisdictions_file(election: Election):
     if old_jurisdictions_file:
         db_session.delete(old_jurisdictions_file)
     db_session.add(election)
+    notify_file_uploaded(db_session, election.jurisdictions_file)
     db_session.commit()
 
     return jsonify(status="ok")
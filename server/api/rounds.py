@@ -2,21 +2,31 @@ import uuid
 from collections import defaultdict
 from typing import Optional, NamedTuple, List, Tuple, Dict, cast as typing_cast
 from datetime import datetime
+from decimal import Decimal
 from flask import jsonify, request
 from jsonschema import validate
 from werkzeug.exceptions import BadRequest, Conflict
-from sqlalchemy import and_
+from sqlalchemy import and_, or_
 
 from . import api
 from ..database import db_session
 from ..models import *  # pylint: disable=wildcard-import
 from ..auth import restrict_access, UserType
+from ..config import SAMPLE_DRAW_MAX_WORKERS
 from . import sample_sizes as sample_sizes_module
 from ..util.isoformat import isoformat
 from ..util.group_by import group_by
 from ..util.jsonschema import JSONDict
-from ..audit_math import sampler, ballot_polling, macro, supersimple, sampler_contest
-from .cvrs import set_contest_metadata_from_cvrs
+from ..audit_math import (
+    sampler,
+    ballot_polling,
+    bravo,
+    macro,
+    supersimple,
+    sampler_contest,
+)
+from .cvrs import set_contest_metadata_from_cvrs, BLANK
+from .batch_tallies import load_batch_max_errors, stream_batch_tallies
 
 
 def get_current_round(election: Election) -> Optional[Round]:
@@ -114,14 +124,46 @@ def count_audited_votes(election: Election, round: Round):
             db_session.add(result)
 
 
-# Get round-by-round audit results
+# Get round-by-round audit results, in round order
 def contest_results_by_round(contest: Contest) -> Dict[str, Dict[str, int]]:
     results_by_round: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
-    for result in contest.results:
+    results = (
+        RoundContestResult.query.filter_by(contest_id=contest.id)
+        .join(Round)
+        .order_by(Round.round_num)
+    )
+    for result in results:
         results_by_round[result.round_id][result.contest_choice_id] = result.result
     return results_by_round
 
 
+# Get the audit results for a contest in a single round
+def round_contest_results(round_contest: RoundContest) -> Dict[str, int]:
+    return dict(
+        RoundContestResult.query.filter_by(
+            round_id=round_contest.round_id, contest_id=round_contest.contest_id
+        ).values(RoundContestResult.contest_choice_id, RoundContestResult.result)
+    )
+
+
+# Load the BRAVO state saved at the end of the latest ended round (or the
+# latest one before <before_round_num>) for this contest, if any.
+def saved_bravo_state(
+    contest: Contest, before_round_num: int = None
+) -> Optional[bravo.BravoState]:
+    query = (
+        RoundContest.query.filter_by(contest_id=contest.id)
+        .join(Round)
+        .filter(Round.ended_at.isnot(None))
+    )
+    if before_round_num is not None:
+        query = query.filter(Round.round_num < before_round_num)
+    latest_round_contest = query.order_by(Round.round_num.desc()).first()
+    if latest_round_contest and latest_round_contest.bravo_state:
+        return bravo.BravoState.from_json(latest_round_contest.bravo_state)
+    return None
+
+
 # { batch_key: { contest_id: { choice_id: votes }}}
 BatchTallies = Dict[Tuple[str, str], Dict[str, Dict[str, int]]]
 
@@ -130,22 +172,36 @@ def batch_tallies(election: Election) -> BatchTallies:
     # We only support one contest for batch audits
     assert len(list(election.contests)) == 1
     contest = list(election.contests)[0]
+    jurisdiction_ids = [jurisdiction.id for jurisdiction in contest.jurisdictions]
 
     # Validate the batch tallies files. We can't do this validation when they
     # are uploaded because we need all of the jurisdictions' files.
-    total_votes_by_choice: Dict[str, int] = defaultdict(int)
-    for jurisdiction in contest.jurisdictions:
-        batch_tallies = typing_cast(BatchTallies, jurisdiction.batch_tallies)
-        if batch_tallies is None:
-            raise Conflict(
-                "Some jurisdictions haven't uploaded their batch tallies files yet."
+    num_jurisdictions_without_tallies = (
+        Jurisdiction.query.filter(Jurisdiction.id.in_(jurisdiction_ids))
+        .outerjoin(File, Jurisdiction.batch_tallies_file_id == File.id)
+        .filter(
+            or_(
+                File.processing_completed_at.is_(None),
+                File.processing_error.isnot(None),
             )
-        for tally in batch_tallies.values():
-            for choice_id, votes in tally[contest.id].items():
-                total_votes_by_choice[choice_id] += votes
+        )
+        .count()
+    )
+    if num_jurisdictions_without_tallies > 0:
+        raise Conflict(
+            "Some jurisdictions haven't uploaded their batch tallies files yet."
+        )
 
+    total_votes_by_choice = dict(
+        BatchTally.query.join(Batch)
+        .filter(Batch.jurisdiction_id.in_(jurisdiction_ids))
+        .join(ContestChoice)
+        .filter_by(contest_id=contest.id)
+        .group_by(BatchTally.contest_choice_id)
+        .values(BatchTally.contest_choice_id, func.sum(BatchTally.votes))
+    )
     for choice in contest.choices:
-        if total_votes_by_choice[choice.id] > choice.num_votes:
+        if total_votes_by_choice.get(choice.id, 0) > choice.num_votes:
             raise Conflict(
                 f"Total votes in batch tallies files for contest choice {choice.name}"
                 f" ({total_votes_by_choice[choice.id]}) is greater than the"
@@ -155,9 +211,25 @@ def batch_tallies(election: Election) -> BatchTallies:
     # Key each batch by jurisdiction name and batch name since batch names
     # are only guaranteed unique within a jurisdiction
     return {
-        (jurisdiction.name, batch_name): tally
+        (jurisdiction_name, batch_name): tally
+        for jurisdiction_name, batch_name, tally in stream_batch_tallies(
+            contest, jurisdiction_ids
+        )
+    }
+
+
+def batch_max_errors(election: Election) -> Dict[Tuple[str, str], Decimal]:
+    # We only support one contest for batch audits
+    assert len(list(election.contests)) == 1
+    contest = list(election.contests)[0]
+
+    # Key each batch the same way as in batch_tallies
+    return {
+        (jurisdiction.name, batch_name): max_error
         for jurisdiction in contest.jurisdictions
-        for batch_name, tally in jurisdiction.batch_tallies.items()  # type: ignore
+        for batch_name, max_error in load_batch_max_errors(
+            jurisdiction, contest
+        ).items()
     }
 
 
@@ -219,7 +291,12 @@ def cvrs_for_contest(contest: Contest) -> supersimple.CVRS:
             JSONDict, jurisdiction.cvr_contests_metadata
         )
         choices_metadata = cvr_contests_metadata[contest.name]["choices"]
+        choice_ids = [
+            choice_name_to_id[choice_name] for choice_name in choices_metadata
+        ]
 
+        # Pick out the interpretation for each contest choice from the CVR.
+        # We saved the column index for each choice when we parsed the CVR.
         interpretations_by_ballot = (
             CvrBallot.query.join(Batch)
             .filter_by(jurisdiction_id=jurisdiction.id)
@@ -230,25 +307,26 @@ def cvrs_for_contest(contest: Contest) -> supersimple.CVRS:
                     CvrBallot.ballot_position == SampledBallot.ballot_position,
                 ),
             )
-            .values(SampledBallot.id, CvrBallot.interpretations)
+            .values(
+                SampledBallot.id,
+                *[
+                    CvrBallot.interpretations[choice_metadata["column"]]
+                    for choice_metadata in choices_metadata.values()
+                ],
+            )
         )
 
-        for ballot_key, interpretations_str in interpretations_by_ballot:
-            ballot_cvr: supersimple.CVR = {contest.id: {}}
-            # interpretations is the raw CVR string: 1,0,0,1,0,1,0. We need to
-            # pick out the interpretation for each contest choice. We saved the
-            # column index for each choice when we parsed the CVR.
-            interpretations = interpretations_str.split(",")
-            for choice_name, choice_metadata in choices_metadata.items():
-                interpretation = interpretations[choice_metadata["column"]]
-                # If the interpretations are empty, it means the contest wasn't
-                # on the ballot, so we should skip this contest entirely for
-                # this ballot.
-                if interpretation == "":
-                    ballot_cvr = {}
-                else:
-                    choice_id = choice_name_to_id[choice_name]
-                    ballot_cvr[contest.id][choice_id] = int(interpretation)
+        for ballot_key, *interpretations in interpretations_by_ballot:
+            # If the interpretations are blank (or the row didn't have that
+            # many columns), it means the contest wasn't on the ballot, so we
+            # should skip this contest entirely for this ballot.
+            if any(
+                interpretation is None or interpretation == BLANK
+                for interpretation in interpretations
+            ):
+                ballot_cvr: supersimple.CVR = {}
+            else:
+                ballot_cvr = {contest.id: dict(zip(choice_ids, interpretations))}
 
             cvrs[ballot_key] = ballot_cvr
 
@@ -313,13 +391,38 @@ def calculate_risk_measurements(election: Election, round: Round):
 
         if election.audit_type == AuditType.BALLOT_POLLING:
             assert election.audit_math_type is not None
-            p_values, is_complete = ballot_polling.compute_risk(
-                election.risk_limit,
-                sampler_contest.from_db_contest(contest),
-                contest_results_by_round(contest),
-                AuditMathType(election.audit_math_type),
-                round_sizes(election),
-            )
+            math_type = AuditMathType(election.audit_math_type)
+            contest_for_sampler = sampler_contest.from_db_contest(contest)
+            if math_type == AuditMathType.MINERVA:
+                p_values, is_complete = ballot_polling.compute_risk(
+                    election.risk_limit,
+                    contest_for_sampler,
+                    contest_results_by_round(contest),
+                    math_type,
+                    round_sizes(election),
+                )
+            else:
+                # Fold this round's results into the state saved at the end of
+                # the previous round, and save the new state for the next
+                # round. If the previous round didn't save a state, start over
+                # from all of the rounds' results.
+                previous_bravo_state = saved_bravo_state(contest, round.round_num)
+                bravo_state = bravo.update_state(
+                    contest_for_sampler,
+                    previous_bravo_state,
+                    {round.id: round_contest_results(round_contest)}
+                    if previous_bravo_state
+                    else contest_results_by_round(contest),
+                )
+                round_contest.bravo_state = bravo_state.to_json()
+                p_values, is_complete = ballot_polling.compute_risk(
+                    election.risk_limit,
+                    contest_for_sampler,
+                    {},
+                    math_type,
+                    {},
+                    bravo_state=bravo_state,
+                )
             p_value = max(p_values.values())
         elif election.audit_type == AuditType.BATCH_COMPARISON:
             p_value, is_complete = macro.compute_risk(
@@ -327,6 +430,7 @@ def calculate_risk_measurements(election: Election, round: Round):
                 sampler_contest.from_db_contest(contest),
                 batch_tallies(election),
                 cumulative_batch_results(election),
+                batch_max_errors(election),
             )
         else:
             assert election.audit_type == AuditType.BALLOT_COMPARISON
@@ -457,6 +561,28 @@ def sampled_all_ballots(round: Round, election: Election):
     )
 
 
+def round_contest_for(round: Round, contest: Contest) -> RoundContest:
+    return next(
+        round_contest
+        for round_contest in round.round_contests
+        if round_contest.contest.id == contest.id
+    )
+
+
+# Load the sampler state saved when the previous round's sample was drawn for
+# this contest, so we can resume sampling from there. If there's no saved
+# state, returns a fresh one, which will start sampling from the beginning.
+def previous_sampler_state(
+    election: Election, round: Round, contest: Contest
+) -> sampler.SamplerState:
+    previous_round = get_previous_round(election, round)
+    if previous_round:
+        previous_round_contest = RoundContest.query.get((previous_round.id, contest.id))
+        if previous_round_contest and previous_round_contest.sampler_state:
+            return sampler.SamplerState.from_json(previous_round_contest.sampler_state)
+    return sampler.SamplerState()
+
+
 class BallotDraw(NamedTuple):
     # ballot_key: ((jurisdiction name, batch name), ballot_position)
     ballot_key: Tuple[Tuple[str, str], int]
@@ -518,63 +644,116 @@ def sample_ballots(
     contests: List[Contest],
     sample_sizes: Dict[str, int],
 ):
-    def draw_sample_for_contest(contest: Contest, sample_size: int) -> List[BallotDraw]:
-        # Compute the total number of ballot samples in all rounds leading up to
-        # this one. Note that this corresponds to the number of SampledBallotDraws,
-        # not SampledBallots.
-        num_previously_sampled = SampledBallotDraw.query.filter_by(
-            contest_id=contest.id
-        ).count()
-
-        # Create the pool of ballots to sample (aka manifest) by combining the
-        # manifests from every jurisdiction in the contest's universe.
-        # Audits must be deterministic and repeatable for the same real world
-        # inputs. So the sampler expects the same input for the same real world
-        # data. Thus, we use the jurisdiction name and batch keys
-        # (deterministic real world ids) instead of the jurisdiction and batch
-        # ids (non-deterministic uuids that we generate for each audit).
-        manifest = {
-            (jurisdiction.name, batch.tabulator, batch.name): batch.num_ballots
-            for jurisdiction in contest.jurisdictions
-            for batch in jurisdiction.batches
-        }
-
-        # Do the math! i.e. compute the actual sample
-        sample = sampler.draw_sample(
-            str(election.random_seed), manifest, sample_size, num_previously_sampled
+    # Snapshot the manifests of every jurisdiction in the election once, so we
+    # don't have to reload them for each contest.
+    # Audits must be deterministic and repeatable for the same real world
+    # inputs. So the sampler expects the same input for the same real world
+    # data. Thus, we use the jurisdiction name and batch keys
+    # (deterministic real world ids) instead of the jurisdiction and batch
+    # ids (non-deterministic uuids that we generate for each audit).
+    batches = (
+        Batch.query.join(Jurisdiction)
+        .filter_by(election_id=election.id)
+        .values(
+            Jurisdiction.id,
+            Jurisdiction.name,
+            Batch.tabulator,
+            Batch.name,
+            Batch.num_ballots,
+            Batch.id,
         )
-        return [
-            BallotDraw(
-                ballot_key=ballot_key,
-                contest_id=contest.id,
-                ticket_number=ticket_number,
-            )
-            for (ticket_number, ballot_key, _) in sample
-        ]
+    )
+    manifests_by_jurisdiction: Dict[str, Dict[Tuple[str, str, str], int]] = (
+        defaultdict(dict)
+    )
+    # Also create a mapping from batch keys used in the sampling back to batch ids
+    batch_key_to_id = {}
+    for (
+        jurisdiction_id,
+        jurisdiction_name,
+        tabulator,
+        batch_name,
+        num_ballots,
+        batch_id,
+    ) in batches:
+        batch_key = (jurisdiction_name, tabulator, batch_name)
+        manifests_by_jurisdiction[jurisdiction_id][batch_key] = num_ballots
+        batch_key_to_id[batch_key] = batch_id
+
+    # Compute the total number of ballot samples in all rounds leading up to
+    # this one for each contest. Note that this corresponds to the number of
+    # SampledBallotDraws, not SampledBallots.
+    num_previously_sampled: Dict[str, int] = dict(
+        SampledBallotDraw.query.filter(
+            SampledBallotDraw.contest_id.in_([contest.id for contest in contests])
+        )
+        .group_by(SampledBallotDraw.contest_id)
+        .values(SampledBallotDraw.contest_id, func.count())
+    )
 
-    # Draw a sample for each contest
-    samples = [
-        draw_sample_for_contest(contest, sample_sizes[contest.id])
+    sample_requests = [
+        sampler.SampleRequest(
+            # Create the pool of ballots to sample (aka manifest) by combining
+            # the manifests from every jurisdiction in the contest's universe.
+            manifest={
+                batch_key: num_ballots
+                for jurisdiction in contest.jurisdictions
+                for batch_key, num_ballots in manifests_by_jurisdiction[
+                    jurisdiction.id
+                ].items()
+            },
+            sample_size=sample_sizes[contest.id],
+            num_sampled=num_previously_sampled.get(contest.id, 0),
+            # We pick up from where the previous round's sample left off (if
+            # the sampler state was saved) and save the state for the next
+            # round. We prefetch enough tickets for a next round of the same
+            # size.
+            state=previous_sampler_state(election, round, contest),
+            prefetch=sample_sizes[contest.id],
+        )
         for contest in contests
     ]
 
-    # Group all sample draws by ballot
-    sample_draws_by_ballot = group_by(
+    # Do the math! i.e. compute the actual sample for each contest. Contests
+    # are sampled in parallel, and the results come back in the same order as
+    # the contests.
+    samples = []
+    for contest, (sample, sampler_state) in zip(
+        contests,
+        sampler.draw_samples(
+            str(election.random_seed), sample_requests, SAMPLE_DRAW_MAX_WORKERS
+        ),
+    ):
+        round_contest_for(round, contest).sampler_state = sampler_state.to_json()
+        samples.append(
+            [
+                BallotDraw(
+                    ballot_key=ballot_key,
+                    contest_id=contest.id,
+                    ticket_number=ticket_number,
+                )
+                for (ticket_number, ballot_key, _) in sample
+            ]
+        )
+
+    record_sampled_ballots(
+        election,
+        round,
         [sample_draw for sample in samples for sample_draw in sample],
-        key=lambda sample_draw: sample_draw.ballot_key,
+        batch_key_to_id,
     )
 
-    # Create a mapping from batch keys used in the sampling back to batch ids
-    batches = (
-        Batch.query.join(Jurisdiction)
-        .filter_by(election_id=election.id)
-        .with_entities(Jurisdiction.name, Batch)
-        .all()
+
+def record_sampled_ballots(
+    election: Election,
+    round: Round,
+    sample_draws: List[BallotDraw],
+    batch_key_to_id: Dict[Tuple[str, str, str], str],
+):
+    # Group all sample draws by ballot
+    sample_draws_by_ballot = group_by(
+        sample_draws, key=lambda sample_draw: sample_draw.ballot_key,
     )
-    batch_key_to_id = {
-        (jurisdiction_name, batch.tabulator, batch.name): batch.id
-        for (jurisdiction_name, batch) in batches
-    }
 
     # Record which ballots are sampled in the db.
     # Note that a ballot may be sampled more than once (within a round or
@@ -583,30 +762,52 @@ def sample_ballots(
     # SampledBallotDraw. That way we can ensure that we don't need to actually
     # look at a real-world ballot that we've already audited, even if it gets
     # sampled again.
-    for ballot_key, sample_draws in sample_draws_by_ballot.items():
+    # Since samples can have tens of thousands of ballots, we load the ballots
+    # sampled in previous rounds with one query and insert the new rows in
+    # bulk, rather than querying and adding each ballot one at a time.
+    existing_ballot_ids = {
+        (batch_id, ballot_position): ballot_id
+        for ballot_id, batch_id, ballot_position in SampledBallot.query.join(Batch)
+        .join(Jurisdiction)
+        .filter_by(election_id=election.id)
+        .values(SampledBallot.id, SampledBallot.batch_id, SampledBallot.ballot_position)
+    }
+
+    new_ballots = []
+    new_draws = []
+    for ballot_key, ballot_draws in sample_draws_by_ballot.items():
         batch_key, ballot_position = ballot_key
         batch_id = batch_key_to_id[batch_key]
 
-        sampled_ballot = SampledBallot.query.filter_by(
-            batch_id=batch_id, ballot_position=ballot_position
-        ).first()
-        if not sampled_ballot:
-            sampled_ballot = SampledBallot(
-                id=str(uuid.uuid4()),
-                batch_id=batch_id,
-                ballot_position=ballot_position,
-                status=BallotStatus.NOT_AUDITED,
+        ballot_id = existing_ballot_ids.get((batch_id, ballot_position))
+        if ballot_id is None:
+            ballot_id = str(uuid.uuid4())
+            new_ballots.append(
+                dict(
+                    id=ballot_id,
+                    batch_id=batch_id,
+                    ballot_position=ballot_position,
+                    status=BallotStatus.NOT_AUDITED,
+                )
             )
-            db_session.add(sampled_ballot)
 
-        for sample_draw in sample_draws:
-            sampled_ballot_draw = SampledBallotDraw(
-                ballot_id=sampled_ballot.id,
-                round_id=round.id,
-                contest_id=sample_draw.contest_id,
-                ticket_number=sample_draw.ticket_number,
+        for sample_draw in ballot_draws:
+            new_draws.append(
+                dict(
+                    ballot_id=ballot_id,
+                    round_id=round.id,
+                    contest_id=sample_draw.contest_id,
+                    ticket_number=sample_draw.ticket_number,
+                )
             )
-            db_session.add(sampled_ballot_draw)
+
+    # The bulk inserts bypass the ORM, so make sure the round (and anything
+    # else pending) is written first.
+    db_session.flush()
+    if new_ballots:
+        db_session.execute(SampledBallot.__table__.insert(), new_ballots)
+    if new_draws:
+        db_session.execute(SampledBallotDraw.__table__.insert(), new_draws)
 
 
 def sample_batches(
@@ -637,13 +838,21 @@ def sample_batches(
         for jurisdiction_name, batch_name, batch_id in batches
     }
 
+    sampler_state = previous_sampler_state(election, round, contest)
     sample = sampler.draw_ppeb_sample(
         str(election.random_seed),
         sampler_contest.from_db_contest(contest),
         sample_sizes[contest.id],
         num_previously_sampled,
         batch_tallies(election),
+        state=sampler_state,
+        prefetch=sample_sizes[contest.id],
+        # Audits that drew earlier rounds using the replicated batch list keep
+        # using it, so the whole audit can be reproduced the same way.
+        replicated=num_previously_sampled > 0 and not sampler_state.weighted,
+        max_errors=batch_max_errors(election),
     )
+    round_contest_for(round, contest).sampler_state = sampler_state.to_json()
 
     for (ticket_number, batch_key, _) in sample:
         sampled_batch_draw = SampledBatchDraw(
@@ -654,6 +863,69 @@ def sample_batches(
         db_session.add(sampled_batch_draw)
 
 
+def record_round_progress(election: Election, round: Round):
+    # Set up the progress counters for each jurisdiction in the round (see
+    # JurisdictionRoundProgress) by counting the sample we just drew. Ballots
+    # and batches that were audited in a previous round and sampled again
+    # already count as audited.
+    if election.audit_type == AuditType.BATCH_COMPARISON:
+        is_audited = BatchResult.batch_id.isnot(None)
+        sample_counts = (
+            SampledBatchDraw.query.filter_by(round_id=round.id)
+            .join(Batch)
+            .outerjoin(BatchResult)
+            .group_by(Batch.jurisdiction_id)
+            .with_entities(
+                Batch.jurisdiction_id,
+                func.count(SampledBatchDraw.ticket_number.distinct()).label(
+                    "num_samples"
+                ),
+                func.count(SampledBatchDraw.ticket_number.distinct())
+                .filter(is_audited)
+                .label("num_samples_audited"),
+                func.count(Batch.id.distinct()).label("num_unique"),
+                func.count(Batch.id.distinct())
+                .filter(is_audited)
+                .label("num_unique_audited"),
+            )
+        )
+    else:
+        is_audited = SampledBallot.status != BallotStatus.NOT_AUDITED
+        sample_counts = (
+            SampledBallotDraw.query.filter_by(round_id=round.id)
+            .join(SampledBallot)
+            .join(Batch)
+            .group_by(Batch.jurisdiction_id)
+            .with_entities(
+                Batch.jurisdiction_id,
+                func.count().label("num_samples"),
+                func.count().filter(is_audited).label("num_samples_audited"),
+                func.count(SampledBallot.id.distinct()).label("num_unique"),
+                func.count(SampledBallot.id.distinct())
+                .filter(is_audited)
+                .label("num_unique_audited"),
+            )
+        )
+
+    counts_by_jurisdiction = {
+        counts.jurisdiction_id: counts._asdict() for counts in sample_counts
+    }
+    no_samples = dict(
+        num_samples=0, num_samples_audited=0, num_unique=0, num_unique_audited=0
+    )
+    progress = [
+        {
+            **no_samples,
+            **counts_by_jurisdiction.get(jurisdiction.id, {}),
+            "round_id": round.id,
+            "jurisdiction_id": jurisdiction.id,
+        }
+        for jurisdiction in election.jurisdictions
+    ]
+    if progress:
+        db_session.execute(JurisdictionRoundProgress.__table__.insert(), progress)
+
+
 CREATE_ROUND_REQUEST_SCHEMA = {
     "type": "object",
     "properties": {
@@ -731,6 +1003,7 @@ def create_round(election: Election):
             set_contest_metadata_from_cvrs(contest)
 
     draw_sample(election, round, sample_sizes)
+    record_round_progress(election, round)
 
     db_session.commit()
 
@@ -1,5 +1,6 @@
-from typing import Dict
+from typing import Dict, Tuple
 from collections import Counter
+import hashlib
 from flask import jsonify
 from werkzeug.exceptions import BadRequest
 
@@ -26,15 +27,29 @@ def sample_size_options(
     def sample_sizes_for_contest(contest: Contest):
         assert election.risk_limit is not None
         if election.audit_type == AuditType.BALLOT_POLLING:
-            sample_results = (
-                None if round_one else rounds.contest_results_by_round(contest)
+            math_type = AuditMathType(election.audit_math_type)
+            # For BRAVO, the state saved at the end of the latest round
+            # already includes all of the rounds' results.
+            bravo_state = (
+                rounds.saved_bravo_state(contest)
+                if not round_one and math_type == AuditMathType.BRAVO
+                else None
             )
+            if round_one:
+                sample_results = None
+            elif bravo_state:
+                sample_results = {}
+            else:
+                sample_results = rounds.contest_results_by_round(contest)
             sample_size_options = ballot_polling.get_sample_size(
                 election.risk_limit,
                 sampler_contest.from_db_contest(contest),
                 sample_results,
-                AuditMathType(election.audit_math_type),
-                rounds.round_sizes(election),
+                math_type,
+                rounds.round_sizes(election)
+                if math_type == AuditMathType.MINERVA
+                else {},
+                bravo_state=bravo_state,
             )
             # Remove unnecessary "type" field from options, add "key" field
             return {
@@ -57,6 +72,7 @@ def sample_size_options(
                 sampler_contest.from_db_contest(contest),
                 rounds.batch_tallies(election),
                 cumulative_batch_results,
+                rounds.batch_max_errors(election),
             )
             return {"macro": {"key": "macro", "size": sample_size, "prob": None}}
 
@@ -111,11 +127,76 @@ def sample_size_options(
     }
 
 
+# Computes a version stamp for all of the inputs to computing the round one
+# sample size options for an election: the audit settings, the contests and
+# choices (including vote totals), the jurisdictions (which change whenever a
+# manifest, batch tallies, or CVR file is uploaded or processed), and the
+# round sizes. If any of these change, so does the version stamp.
+def sample_size_options_version(election: Election) -> str:
+    inputs = [
+        (
+            election.risk_limit,
+            election.audit_type,
+            election.audit_math_type,
+            election.updated_at,
+        ),
+        list(
+            Contest.query.filter_by(election_id=election.id)
+            .order_by(Contest.id)
+            .values(Contest.id, Contest.updated_at)
+        ),
+        list(
+            ContestChoice.query.join(Contest)
+            .filter_by(election_id=election.id)
+            .order_by(ContestChoice.id)
+            .values(ContestChoice.id, ContestChoice.updated_at)
+        ),
+        list(
+            Contest.query.filter_by(election_id=election.id)
+            .join(Contest.jurisdictions)
+            .order_by(Contest.id, Jurisdiction.id)
+            .values(Contest.id, Jurisdiction.id)
+        ),
+        list(
+            Jurisdiction.query.filter_by(election_id=election.id)
+            .order_by(Jurisdiction.id)
+            .values(Jurisdiction.id, Jurisdiction.updated_at)
+        ),
+        sorted(rounds.round_sizes(election).items()),
+    ]
+    return hashlib.sha256(repr(inputs).encode()).hexdigest()
+
+
+# The audit setup flow polls /sample-sizes, and computing the sample sizes can
+# be slow (e.g. for batch comparison audits, we have to load the batch tallies
+# for every jurisdiction). So we cache the round one sample size options for
+# each election, along with the version stamp of the inputs they were
+# computed from, and only recompute them when the version stamp changes.
+ROUND_ONE_SAMPLE_SIZE_OPTIONS_CACHE: Dict[
+    str, Tuple[str, Dict[str, Dict[str, ballot_polling.SampleSizeOption]]]
+] = {}
+
+
+def cached_round_one_sample_size_options(
+    election: Election,
+) -> Dict[str, Dict[str, ballot_polling.SampleSizeOption]]:
+    version = sample_size_options_version(election)
+    cached = ROUND_ONE_SAMPLE_SIZE_OPTIONS_CACHE.get(election.id)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    options = sample_size_options(election, round_one=True)
+    ROUND_ONE_SAMPLE_SIZE_OPTIONS_CACHE[election.id] = (version, options)
+    return options
+
+
 @api.route("/election/<election_id>/sample-sizes", methods=["GET"])
 @restrict_access([UserType.AUDIT_ADMIN])
 def get_sample_sizes(election: Election):
     sample_sizes = {
         contest_id: list(options.values())
-        for contest_id, options in sample_size_options(election, round_one=True).items()
+        for contest_id, options in cached_round_one_sample_size_options(
+            election
+        ).items()
     }
     return jsonify({"sampleSizes": sample_sizes})
@@ -15,6 +15,7 @@ from ..util.process_file import (
     UserError,
     serialize_file,
     serialize_file_processing,
+    notify_file_uploaded,
 )
 
 CONTEST_NAME = "Contest Name"
@@ -102,6 +103,7 @@ def upload_standardized_contests_file(election: Election):
         uploaded_at=datetime.utcnow(),
     )
     election.standardized_contests = None
+    notify_file_uploaded(db_session, election.standardized_contests_file)
     db_session.commit()
 
     return jsonify(status="ok")
@@ -21,6 +21,7 @@ def get_sample_size(
     sample_results: Optional[Dict[str, Dict[str, int]]],
     math_type: AuditMathType,
     round_sizes: Dict[int, int],
+    bravo_state: bravo.BravoState = None,
 ) -> Dict[str, SampleSizeOption]:
     """
     Compute sample size using the specified math.
@@ -30,6 +31,11 @@ def get_sample_size(
         - contest: The contest we're auditing
         - sample_results: the sample results by round
         - mathtype: which math to use (Minerva or BRAVO at the moment)
+        - round_sizes: the number of ballots drawn in each round (only used
+          by Minerva)
+        - bravo_state: (optional) the BRAVO state saved after an earlier
+          round, in which case sample_results only needs to contain the
+          rounds since then (only used by BRAVO)
     Outputs:
         - A sample size dictionary containing sample sizes for different
           finishing probabilities
@@ -39,7 +45,9 @@ def get_sample_size(
         return minerva.get_sample_size(risk_limit, contest, sample_results, round_sizes)
     else:
         # Default to BRAVO math
-        return bravo.get_sample_size(risk_limit, contest, sample_results)
+        return bravo.get_sample_size(
+            risk_limit, contest, sample_results, state=bravo_state
+        )
 
 
 def compute_risk(
@@ -48,10 +56,13 @@ def compute_risk(
     sample_results: Dict[str, Dict[str, int]],
     math_type: AuditMathType,
     round_sizes: Dict[int, int],
+    bravo_state: bravo.BravoState = None,
 ) -> Tuple[Dict[Tuple[str, str], float], bool]:
 
     if math_type == AuditMathType.MINERVA:
         return minerva.compute_risk(risk_limit, contest, sample_results, round_sizes)
     else:
         # Default to BRAVO
-        return bravo.compute_risk(risk_limit, contest, sample_results)
+        return bravo.compute_risk(
+            risk_limit, contest, sample_results, state=bravo_state
+        )
@@ -9,8 +9,9 @@ targeted is being audited completely independently.
 import math
 from decimal import Decimal, ROUND_CEILING
 from collections import defaultdict
-from typing import Dict, Tuple, Optional
-from scipy import stats
+from typing import Any, Dict, Tuple, Optional, Union
+import numpy as np
+from scipy import stats, special
 
 from .sampler_contest import Contest
 
@@ -63,12 +64,13 @@ def get_expected_sample_sizes(
         z_w = (2 * s_w).ln()
         z_l = (2 - 2 * s_w).ln()
 
-        T = min(get_test_statistics(contest.margins, sample_results).values())
+        log_T = min(get_log_test_statistics(contest.margins, sample_results).values())
 
-        weighted_alpha = (Decimal(1.0) / alpha) / T
+        # ln((1 / alpha) / T)
+        log_weighted_alpha = -alpha.ln() - Decimal(log_T)
         return int(
             (
-                (weighted_alpha.ln() + (z_w / Decimal(2))) / (p_w * z_w + p_l * z_l)
+                (log_weighted_alpha + (z_w / Decimal(2))) / (p_w * z_w + p_l * z_l)
             ).quantize(Decimal(1), rounding=ROUND_CEILING)
         )
 
@@ -125,6 +127,70 @@ def get_test_statistics(
     return T
 
 
+def get_log_test_statistics(
+    margins: Dict[str, Dict], sample_results: Dict[str, int]
+) -> Dict[Tuple[str, str], float]:
+    """
+    Computes log(T*), the natural log of the test statistic from an existing
+    sample. This is equivalent to get_test_statistics, but sums
+    votes * log(swl / 0.5) using floats instead of multiplying
+    Decimal(swl / 0.5) ** votes, which is much faster for large samples. It
+    also can't overflow or underflow, since log(T*) grows linearly with the
+    size of the sample.
+
+    Inputs:
+        margins        - the margins for the contest being audited
+        sample_results - mapping of candidates to votes in the (cumulative)
+                         sample:
+                {
+                    candidate1: sampled_votes,
+                    candidate2: sampled_votes,
+                    ...
+                }
+
+    Outputs:
+        log_T - Mapping of (winner, loser) pairs to the log of their test
+                statistic based on sample_results
+    """
+    winners = list(margins["winners"])
+    losers = list(margins["losers"])
+
+    # Handle the no-losers case
+    if not losers:
+        return {(winner, ""): 0.0 for winner in winners}
+
+    # Compute all of the pairs at once, with one row per winner and one column
+    # per loser
+    swl = np.array(
+        [
+            [margins["winners"][winner]["swl"][loser] for loser in losers]
+            for winner in winners
+        ]
+    )
+    winner_votes = np.array(
+        [sample_results.get(winner) or 0 for winner in winners], dtype=float
+    )
+    loser_votes = np.array(
+        [sample_results.get(loser) or 0 for loser in losers], dtype=float
+    )
+    # xlogy(votes, x) is votes * log(x), but is 0 when votes is 0 (avoiding a
+    # degenerate case where x is 0 and votes is also 0)
+    log_T = special.xlogy(winner_votes[:, np.newaxis], swl / 0.5) + special.xlogy(
+        loser_votes[np.newaxis, :], (1 - swl) / 0.5
+    )
+
+    return {
+        (winner, loser): float(log_T[w, l])
+        for w, winner in enumerate(winners)
+        for l, loser in enumerate(losers)
+    }
+
+
+# How many sizes to check at once when searching for a sample size in
+# bravo_sample_sizes. The initial estimate is usually within a few ballots.
+SAMPLE_SIZE_SEARCH_BLOCK_SIZE = 4
+
+
 def bravo_sample_sizes(
     alpha: Decimal,
     p_w: Decimal,
@@ -207,14 +273,26 @@ def bravo_sample_sizes(
     # Get a guarantee. (Perhaps contrary to intuition, using
     # math.ceil instead of math.floor can lead to a
     # larger sample.)
+    # We want the smallest size (starting from our estimate) whose test
+    # statistic exceeds the threshold. Since the quantiles are discrete, the
+    # test statistic doesn't always increase with the size, so we can't
+    # bisect. Instead, we compute the quantiles for a block of sizes at once,
+    # doubling the block each time it doesn't contain a match.
+    block_size = SAMPLE_SIZE_SEARCH_BLOCK_SIZE
     searching = True
     while searching:
-        x_c = Decimal(stats.binom.ppf(1.0 - p_completion, size, float(p_w2)))
-        test_stat = x_c * plus + (size - x_c) * minus
-        if test_stat > threshold:
-            searching = False
+        sizes = range(size, size + block_size)
+        x_cs = stats.binom.ppf(1.0 - p_completion, sizes, float(p_w2))
+        for block_index, x_c in enumerate(x_cs):
+            x_c = Decimal(x_c)
+            test_stat = x_c * plus + (sizes[block_index] - x_c) * minus
+            if test_stat > threshold:
+                size = sizes[block_index]
+                searching = False
+                break
         else:
-            size += 1
+            size += block_size
+            block_size *= 2
 
     # The preceding fussiness notwithstanding, we use a simple
     # adjustment to account for "other" votes beyond p_w and p_r.
@@ -292,10 +370,94 @@ def compute_cumulative_sample(sample_results):
     return cumulative_sample
 
 
+class BravoState:
+    """
+    The cumulative sample and the log of the test statistic for each (winner,
+    loser) pair after some number of rounds of an audit. Since log(T*) is a
+    sum over the sampled votes, saving the state at the end of each round lets
+    the next round fold in just its own results, instead of recomputing the
+    test statistics from every earlier round's results.
+    """
+
+    sample_results: Dict[str, int]  # Cumulative votes for each candidate
+    log_test_statistics: Dict[Tuple[str, str], float]  # See get_log_test_statistics
+
+    def __init__(
+        self,
+        sample_results: Dict[str, int],
+        log_test_statistics: Dict[Tuple[str, str], float],
+    ):
+        self.sample_results = sample_results
+        self.log_test_statistics = log_test_statistics
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "sampleResults": self.sample_results,
+            # Pairs are tuples, which can't be JSON object keys. log(T*) is
+            # -inf if a loser with no reported votes got votes in the sample,
+            # and JSON has no infinity, so we store non-finite values as
+            # strings (e.g. "-inf").
+            "logTestStatistics": [
+                [winner, loser, log_T if math.isfinite(log_T) else str(log_T)]
+                for (winner, loser), log_T in self.log_test_statistics.items()
+            ],
+        }
+
+    @staticmethod
+    def from_json(state: Dict[str, Any]) -> "BravoState":
+        return BravoState(
+            state["sampleResults"],
+            {
+                (winner, loser): float(log_T)
+                for winner, loser, log_T in state["logTestStatistics"]
+            },
+        )
+
+
+def update_state(
+    contest: Contest,
+    state: Optional[BravoState],
+    sample_results: Optional[Dict[str, Dict[str, int]]],
+) -> BravoState:
+    """
+    Folds new rounds of sample results into a BravoState.
+
+    Inputs:
+        contest        - a sampler_contest object for the contest being audited
+        state          - the state after the previous rounds, or None if there
+                         weren't any
+        sample_results - mapping of candidates to votes in the sample for each
+                         new round:
+                { "round": {
+                    candidate1: sampled_votes,
+                    candidate2: sampled_votes,
+                    ...
+                }}
+
+    Outputs:
+        state - the state after the new rounds
+    """
+    new_sample = compute_cumulative_sample(sample_results or {})
+    new_log_T = get_log_test_statistics(contest.margins, new_sample)
+    previous_sample = state.sample_results if state else {}
+    previous_log_T = state.log_test_statistics if state else {}
+    return BravoState(
+        {
+            candidate: previous_sample.get(candidate, 0) + new_sample[candidate]
+            for candidate in contest.candidates
+        },
+        {
+            pair: previous_log_T.get(pair, 0.0) + log_T
+            for pair, log_T in new_log_T.items()
+        },
+    )
+
+
 def get_sample_size(
     risk_limit: int,
     contest: Contest,
     sample_results: Optional[Dict[str, Dict[str, int]]],
+    state: BravoState = None,
 ) -> Dict[str, "SampleSizeOption"]:  # type: ignore
     """
     Computes initial sample size parameterized by likelihood that the
@@ -312,6 +474,9 @@ def get_sample_size(
                             candidate2: sampled_votes,
                             ...
                         }
+        state          - (optional) a BravoState saved after an earlier
+                         round, in which case sample_results only needs to
+                         contain the rounds since then
 
     Outputs:
         samples - dictionary mapping confirmation likelihood to sample size:
@@ -336,12 +501,7 @@ def get_sample_size(
     samples: Dict = {}
 
     # Get cumulative sample results
-    cumulative_sample = {}
-    if sample_results:
-        cumulative_sample = compute_cumulative_sample(sample_results)
-    else:
-        for candidate in contest.candidates:
-            cumulative_sample[candidate] = 0
+    cumulative_sample = update_state(contest, state, sample_results).sample_results
 
     asn = get_expected_sample_sizes(alpha, contest, cumulative_sample)
 
@@ -438,7 +598,11 @@ def get_sample_size(
 
 
 def compute_risk(
-    risk_limit: int, contest: Contest, sample_results: Dict[str, Dict[str, int]]
+    risk_limit: int,
+    contest: Contest,
+    sample_results: Dict[str, Dict[str, int]],
+    exact: bool = False,
+    state: BravoState = None,
 ) -> Tuple[Dict[Tuple[str, str], float], bool]:
     """
     Computes the risk-value of <sample_results> based on results in <contest>.
@@ -452,6 +616,15 @@ def compute_risk(
                     candidate2: sampled_votes,
                     ...
                 }}
+        exact          - if True, computes the test statistics exactly using
+                         Decimals (see get_test_statistics) instead of in log
+                         space using floats (see get_log_test_statistics).
+                         This is much slower, and is meant for verifying the
+                         log space computation.
+        state          - (optional) a BravoState saved after an earlier
+                         round, in which case sample_results only needs to
+                         contain the rounds since then (not supported with
+                         exact=True)
 
     Outputs:
         measurements    - the p-value of the hypotheses that the election
@@ -463,27 +636,33 @@ def compute_risk(
     assert alpha < 1, "The risk-limit must be less than one!"
 
     # Get cumulative sample results
-    cumulative_sample = {}
-    if sample_results:
-        cumulative_sample = compute_cumulative_sample(sample_results)
+    updated_state = update_state(contest, state, sample_results)
+    cumulative_sample = updated_state.sample_results
+
+    risks: Dict[Tuple[str, str], Union[Decimal, float]]
+    if exact:
+        assert state is None, "Can't compute exact risks from a saved state"
+        T = get_test_statistics(contest.margins, cumulative_sample)
+        risks = {pair: 1 / T[pair] for pair in T}
     else:
-        for candidate in contest.candidates:
-            cumulative_sample[candidate] = 0
-    T = get_test_statistics(contest.margins, cumulative_sample)
+        log_T = updated_state.log_test_statistics
+        # The risk is 1 / T. For tiny values of T, this overflows to infinity
+        # (just like converting the exact risk to a float would).
+        with np.errstate(over="ignore"):
+            risks = {pair: float(np.exp(-log_T[pair])) for pair in log_T}
 
     measurements = {}
 
     # If we've done a full hand recount
     if sum(cumulative_sample.values()) >= contest.ballots:
-        for pair in T:
+        for pair in risks:
             measurements[pair] = 0.0
         return measurements, True
 
     finished = True
-    for pair in T:
-        raw = 1 / T[pair]
-        measurements[pair] = float(raw)
+    for pair, risk in risks.items():
+        measurements[pair] = float(risk)
 
-        if raw > alpha:
+        if risk > alpha:
             finished = False
     return measurements, finished
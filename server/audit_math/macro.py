@@ -118,10 +118,40 @@ def compute_max_error(
     return error
 
 
+def compute_max_errors(
+    reported_results: Dict[Any, Dict[str, Dict[str, int]]], contest: Contest
+) -> Dict[Any, Decimal]:
+    """
+    Computes the maximum possible error in every batch for this contest (see
+    compute_max_error). The max errors only depend on the reported results,
+    so callers can compute them once and pass them to compute_U,
+    get_sample_sizes, compute_risk, and sampler.draw_ppeb_sample instead of
+    having each of those recompute them.
+
+    Inputs:
+        reported_results - the reported votes in every batch, of the same
+                           form as in compute_U
+        contest          - a sampler_contest object of the contest to compute
+                           the error for
+
+    Outputs:
+        max_errors - mapping of batch to its maximum possible overstatement
+                {
+                    'batch': error,
+                    ...
+                }
+    """
+    return {
+        batch: compute_max_error(reported_results[batch], contest)
+        for batch in reported_results
+    }
+
+
 def compute_U(
-    reported_results: Dict[str, Dict[str, Dict[str, int]]],
+    reported_results: Dict[Any, Dict[str, Dict[str, int]]],
     sample_results: Dict[Any, Dict[str, Dict[str, int]]],
     contest: Contest,
+    max_errors: Dict[Any, Decimal] = None,
 ) -> Decimal:
     """
     Computes U, the sum of the batch-wise relative overstatement limits,
@@ -141,6 +171,8 @@ def compute_U(
                            }
         contest         - a sampler_contest object of the contest to compute
                           the error for
+        max_errors      - (optional) the max error for every batch, as
+                          computed by compute_max_errors
 
     Outputs:
         U - the sum of the maximum possible overstatement for each batch
@@ -149,6 +181,8 @@ def compute_U(
     for batch in reported_results:
         if batch in sample_results:
             U += compute_error(reported_results[batch], sample_results[batch], contest)
+        elif max_errors is not None:
+            U += max_errors[batch]
         else:
             U += compute_max_error(reported_results[batch], contest)
 
@@ -160,6 +194,7 @@ def get_sample_sizes(
     contest: Contest,
     reported_results: Dict[Any, Dict[str, Dict[str, int]]],
     sample_results: Dict[Any, Dict[str, Dict[str, int]]],
+    max_errors: Dict[Any, Decimal] = None,
 ) -> int:
     """
     Computes initial sample sizes parameterized by likelihood that the
@@ -185,6 +220,8 @@ def get_sample_sizes(
         sample_results - if a sample has already been drawn, this will
                          contain its results, of the same form as
                          reported_results
+        max_errors     - (optional) the max error for every batch, as
+                         computed by compute_max_errors
 
     Outputs:
         samples - dictionary mapping confirmation likelihood to sample size:
@@ -202,7 +239,7 @@ def get_sample_sizes(
 
     # Computing U with the max error for already sampled batches knocked out
     # to try to provide a sense of "how close" the audit is to finishing.
-    U = compute_U(reported_results, sample_results, contest)
+    U = compute_U(reported_results, sample_results, contest, max_errors)
 
     if U == 0:
         return 1
@@ -227,6 +264,7 @@ def compute_risk(
     contest: Contest,
     reported_results: Dict[Any, Dict[str, Dict[str, int]]],
     sample_results: Dict[Any, Dict[str, Dict[str, int]]],
+    max_errors: Dict[Any, Decimal] = None,
 ) -> Tuple[float, bool]:
     """
     Computes the risk-value of <sample_results> based on results in <contest>.
@@ -250,6 +288,8 @@ def compute_risk(
         sample_results - if a sample has already been drawn, this will
                          contain its results, of the same form as
                          reported_results
+        max_errors     - (optional) the max error for every batch, as
+                         computed by compute_max_errors
     Outputs:
         measurements    - the p-value of the hypotheses that the election
                           result is correct based on the sample for each
@@ -265,13 +305,16 @@ def compute_risk(
 
     p = Decimal(1.0)
 
+    if max_errors is None:
+        max_errors = compute_max_errors(reported_results, contest)
+
     # Computing U without the sample preserves conservative-ness
-    U = compute_U(reported_results, {}, contest)
+    U = compute_U(reported_results, {}, contest, max_errors)
 
     for batch in sample_results:
         e_p = compute_error(reported_results[batch], sample_results[batch], contest)
 
-        u_p = compute_max_error(reported_results[batch], contest)
+        u_p = max_errors[batch]
 
         # If this happens, we need a full hand recount
         if e_p == Decimal("inf") or u_p == Decimal("inf"):
@@ -1,27 +1,443 @@
+# pylint: disable=invalid-name
 """
-An implementation of Minerva
+Library for performing a Minerva ballot polling risk-limiting audit, as
+described by Zagórski, McClearn, Morin, Vora, and Vora here:
+https://arxiv.org/abs/2008.02315
+
+Minerva is a round-by-round version of BRAVO. Instead of comparing the
+likelihood of the exact sequence of ballots drawn under the reported outcome
+and under a tie (as BRAVO does), it compares the probabilities that the
+winner would get at least as many votes in the sample as they did, given
+that the audit hadn't already stopped in an earlier round. This uses the
+information in each round's sample size, so it can stop with far fewer
+ballots than BRAVO when rounds are large.
+
+Like BRAVO, each (winner, loser) pair is tested separately, using only the
+ballots in the sample that have a vote for one of the two. Within those
+ballots, the number of votes for the winner in each round is binomially
+distributed. Computing the distributions for later rounds requires
+convolving the distribution left over from earlier rounds with the current
+round's binomial distribution, which we do with FFTs, and we cache the
+distributions for each sequence of rounds so that later rounds (and the
+sample size search) only have to compute one more convolution.
+
+Note that this library works for one contest at a time, as if each contest being
+targeted is being audited completely independently.
 """
-# TODO: remove the following once we are using the arguments
-# pylint: disable=unused-argument
-from typing import Dict, Tuple, Optional
+import functools
+import math
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from scipy import signal, special, stats
 
 from .sampler_contest import Contest
 
+# How many sequences of rounds to cache the distributions for (see
+# minerva_round). Each entry holds a few arrays the size of the sample.
+MINERVA_ROUND_CACHE_SIZE = 100
+
+# The probabilities of stopping that we compute sample sizes for
+QUANTS = [0.7, 0.8, 0.9]
+
+
+class MinervaRound(NamedTuple):
+    """
+    The distributions of the number of votes for the winner in the sample
+    (out of the ballots with a vote for the winner or the loser) after a
+    round of the audit, under the null hypothesis (a tie) and the
+    alternative hypothesis (the reported results).
+
+        null_tail - null_tail[k] is the probability under the null hypothesis
+                    that the sample has at least k votes for the winner and
+                    the audit didn't stop in an earlier round
+        alt_tail  - the same, under the alternative hypothesis
+        kmin      - the smallest number of votes for the winner that would
+                    stop the audit in this round, or None if the audit can't
+                    stop in this round
+        null_pmf  - null_pmf[k] is the probability under the null hypothesis
+                    that the sample has exactly k votes for the winner and the
+                    audit didn't stop in this round or an earlier one
+        alt_pmf   - the same, under the alternative hypothesis
+    """
+
+    null_tail: np.ndarray
+    alt_tail: np.ndarray
+    kmin: Optional[int]
+    null_pmf: np.ndarray
+    alt_pmf: np.ndarray
+
+
+def binom_pmf(n: int, p: float) -> np.ndarray:
+    """
+    Returns the probability mass function of the binomial distribution with
+    <n> trials and success probability <p>, for 0 through <n> successes. This
+    is the same as stats.binom.pmf(np.arange(n + 1), n, p), but computing it
+    in log space with gammaln is several times faster.
+    """
+    k = np.arange(n + 1)
+    log_pmf = (
+        special.gammaln(n + 1)
+        - special.gammaln(k + 1)
+        - special.gammaln(n - k + 1)
+        + special.xlogy(k, p)
+        + special.xlog1py(n - k, -p)
+    )
+    return np.exp(log_pmf)
+
+
+def tail(pmf: np.ndarray) -> np.ndarray:
+    # tail[k] = sum(pmf[k:]). Summing from the end adds the small
+    # probabilities together first, which keeps the tail accurate.
+    return np.cumsum(pmf[::-1])[::-1]
 
-def get_sample_size(
-    risk_limit: int,
-    contest: Contest,
-    sample_results: Optional[Dict[str, Dict[str, int]]],
-    round_sizes: Dict[int, int],
-) -> Dict[str, "SampleSizeOption"]:  # type: ignore
 
-    raise Exception("Not implemented!")
+def convolve(previous_pmf: np.ndarray, round_pmf: np.ndarray) -> np.ndarray:
+    # Convolving with FFTs is much faster than convolving directly, but it
+    # leaves a bit of numerical noise (including small negative
+    # probabilities) around zero. That only affects probabilities too small
+    # to make a difference to whether the audit stops.
+    return np.clip(signal.fftconvolve(previous_pmf, round_pmf), 0, None)
+
+
+def compute_round(
+    alpha: float, p: float, previous_round: Optional[MinervaRound], round_size: int,
+) -> MinervaRound:
+    """
+    Computes the distributions for a round of <round_size> ballots (with a
+    vote for the winner or the loser), following <previous_round> (or None if
+    this is the first round).
+
+    Inputs:
+        alpha          - the risk limit, as a fraction
+        p              - the winner's share of the votes for the winner and
+                         the loser
+        previous_round - the distributions for the previous round
+        round_size     - the number of ballots in this round with a vote for
+                         the winner or the loser
+
+    Outputs:
+        the distributions for this round (see MinervaRound)
+    """
+    round_null_pmf = binom_pmf(round_size, 0.5)
+    round_alt_pmf = binom_pmf(round_size, p)
+
+    if previous_round is None:
+        null_pmf, alt_pmf = round_null_pmf, round_alt_pmf
+    else:
+        null_pmf = convolve(previous_round.null_pmf, round_null_pmf)
+        alt_pmf = convolve(previous_round.alt_pmf, round_alt_pmf)
+
+    null_tail = tail(null_pmf)
+    alt_tail = tail(alt_pmf)
+
+    # The audit stops if the null tail is at most alpha times the
+    # alternative tail
+    (stopping_votes,) = np.nonzero((alpha * alt_tail >= null_tail) & (alt_tail > 0))
+    kmin = int(stopping_votes[0]) if len(stopping_votes) else None
+
+    if kmin is not None:
+        null_pmf = null_pmf.copy()
+        alt_pmf = alt_pmf.copy()
+        null_pmf[kmin:] = 0
+        alt_pmf[kmin:] = 0
+
+    return MinervaRound(null_tail, alt_tail, kmin, null_pmf, alt_pmf)
+
+
+@functools.lru_cache(maxsize=MINERVA_ROUND_CACHE_SIZE)
+def minerva_round(alpha: float, p: float, round_sizes: Tuple[int, ...]) -> MinervaRound:
+    """
+    Returns the distributions for the last of <round_sizes> (the number of
+    ballots with a vote for the winner or the loser in each round). The
+    distributions for each earlier round are cached too, so adding a round
+    only has to compute one more convolution.
+    """
+    previous_round = (
+        minerva_round(alpha, p, round_sizes[:-1]) if len(round_sizes) > 1 else None
+    )
+    minerva_round_ = compute_round(alpha, p, previous_round, round_sizes[-1])
+    # Since we share these arrays between callers, make sure nobody changes them
+    for array in [
+        minerva_round_.null_tail,
+        minerva_round_.alt_tail,
+        minerva_round_.null_pmf,
+        minerva_round_.alt_pmf,
+    ]:
+        array.setflags(write=False)
+    return minerva_round_
+
+
+def pair_sample(
+    winner: str, loser: str, sample_results: Optional[Dict[str, Dict[str, int]]]
+) -> Tuple[Tuple[int, ...], List[int]]:
+    """
+    Returns the number of sampled ballots with a vote for <winner> or <loser>
+    in each round, and the cumulative number of votes for <winner> at the end
+    of each round.
+    """
+    round_sizes = []
+    cumulative_winner_votes = []
+    winner_votes = 0
+    for round_results in (sample_results or {}).values():
+        round_winner_votes = round_results.get(winner) or 0
+        round_loser_votes = round_results.get(loser) or 0
+        round_sizes.append(round_winner_votes + round_loser_votes)
+        winner_votes += round_winner_votes
+        cumulative_winner_votes.append(winner_votes)
+    return tuple(round_sizes), cumulative_winner_votes
+
+
+def compute_pair_risk(
+    alpha: float, p: float, round_sizes: Tuple[int, ...], winner_votes: List[int],
+) -> Tuple[float, bool]:
+    """
+    Computes the Minerva risk for a (winner, loser) pair, i.e. the ratio of
+    the null tail to the alternative tail at the number of votes for the
+    winner in the sample, for each round in turn. Returns the risk for the
+    round in which the audit stopped, or the last round if it hasn't stopped.
+    """
+    risk = 1.0
+    for round_num in range(1, len(round_sizes) + 1):
+        minerva_round_ = minerva_round(alpha, p, round_sizes[:round_num])
+        k = winner_votes[round_num - 1]
+        alt_tail = minerva_round_.alt_tail[k]
+        risk = float(minerva_round_.null_tail[k] / alt_tail) if alt_tail > 0 else 1.0
+        if risk <= alpha:
+            return risk, True
+    return risk, False
 
 
 def compute_risk(
     risk_limit: float,
     contest: Contest,
     sample_results: Dict[str, Dict[str, int]],
-    round_sizes: Dict[int, int],
+    round_sizes: Dict[int, int],  # pylint: disable=unused-argument
 ) -> Tuple[Dict[Tuple[str, str], float], bool]:
-    raise Exception("Not implemented!")
+    """
+    Computes the risk-value of <sample_results> based on results in <contest>.
+
+    Inputs:
+        risk_limit     - the risk-limit for this audit
+        contest        - a sampler_contest object for the contest being measured
+        sample_results - mapping of candidates to votes in the sample for each
+                         round, in round order:
+                { "round1": {
+                    candidate1: sampled_votes,
+                    candidate2: sampled_votes,
+                    ...
+                }, ...}
+        round_sizes    - mapping of round number to the number of ballots
+                         drawn in that round. Minerva only needs the number of
+                         ballots with a vote for each (winner, loser) pair in
+                         each round, which we get from sample_results.
+
+    Outputs:
+        measurements    - the p-value of the hypotheses that the election
+                          result is correct based on the sample, for each
+                          winner-loser pair.
+        confirmed       - a boolean indicating whether the audit can stop
+    """
+    alpha = risk_limit / 100
+    assert alpha < 1, "The risk-limit must be less than one!"
+
+    winners = contest.margins["winners"]
+    losers = contest.margins["losers"]
+
+    # If we've done a full hand recount
+    num_sampled = sum(
+        sum(round_results.values()) for round_results in (sample_results or {}).values()
+    )
+    if num_sampled >= contest.ballots:
+        pairs = [(winner, loser) for winner in winners for loser in losers or [""]]
+        return {pair: 0.0 for pair in pairs}, True
+
+    # With no losers, there's no way for the reported outcome to be wrong
+    if not losers:
+        return {(winner, ""): 0.0 for winner in winners}, True
+
+    measurements = {}
+    finished = True
+    for winner in winners:
+        for loser in losers:
+            pair_round_sizes, winner_votes = pair_sample(winner, loser, sample_results)
+            p = winners[winner]["swl"][loser]
+            if not pair_round_sizes or p <= 0.5:
+                measurements[(winner, loser)] = 1.0
+                finished = False
+                continue
+
+            risk, pair_finished = compute_pair_risk(
+                alpha, p, pair_round_sizes, winner_votes
+            )
+            measurements[(winner, loser)] = risk
+            finished = finished and pair_finished
+
+    return measurements, finished
+
+
+def next_round_stopping_prob(
+    alpha: float,
+    p: float,
+    previous_round: Optional[MinervaRound],
+    winner_votes: int,
+    round_size: int,
+) -> float:
+    """
+    Computes the probability that the audit will stop after a round of
+    <round_size> more ballots (with a vote for the winner or the loser),
+    assuming the reported results are correct, given the sample so far.
+    """
+    kmin = compute_round(alpha, p, previous_round, round_size).kmin
+    if kmin is None:
+        return 0.0
+    return float(stats.binom.sf(kmin - winner_votes - 1, round_size, p))
+
+
+def next_round_size(
+    alpha: float,
+    p: float,
+    previous_round: Optional[MinervaRound],
+    winner_votes: int,
+    max_round_size: int,
+    quant: float,
+    stopping_probs: Dict[int, float],
+) -> Optional[int]:
+    """
+    Finds the smallest round size (counting only ballots with a vote for the
+    winner or the loser) for which the probability of stopping after the
+    round is at least <quant>, or None if no round size up to
+    <max_round_size> will do. Since the votes are discrete, the stopping
+    probability doesn't always increase with the round size, so this is an
+    approximation: we double the round size until it's big enough, and then
+    bisect.
+
+    <stopping_probs> caches the stopping probability for each round size, so
+    it can be shared between searches for different quants.
+    """
+
+    def stopping_prob(round_size: int) -> float:
+        if round_size not in stopping_probs:
+            stopping_probs[round_size] = next_round_stopping_prob(
+                alpha, p, previous_round, winner_votes, round_size
+            )
+        return stopping_probs[round_size]
+
+    low, high = 0, 1
+    while stopping_prob(high) < quant:
+        if high >= max_round_size:
+            return None
+        low, high = high, min(high * 2, max_round_size)
+
+    # Invariant: stopping_prob(low) < quant <= stopping_prob(high)
+    while high - low > 1:
+        mid = (low + high) // 2
+        if stopping_prob(mid) < quant:
+            low = mid
+        else:
+            high = mid
+    return high
+
+
+def get_sample_size(
+    risk_limit: int,
+    contest: Contest,
+    sample_results: Optional[Dict[str, Dict[str, int]]],
+    round_sizes: Dict[int, int],  # pylint: disable=unused-argument
+) -> Dict[str, "SampleSizeOption"]:  # type: ignore
+    """
+    Computes the sample size for the next round, parameterized by the
+    likelihood that the audit will stop after the round, assuming the
+    reported results are correct. We compute this for the (winner, loser)
+    pair with the smallest margin.
+
+    Inputs:
+        risk_limit     - the risk-limit for this audit
+        contest        - a sampler_contest object of the contest being audited
+        sample_results - mapping of candidates to votes in the sample for each
+                         previous round, in round order (see compute_risk)
+        round_sizes    - mapping of round number to the number of ballots
+                         drawn in that round (see compute_risk)
+
+    Outputs:
+        samples - dictionary mapping confirmation likelihood to sample size:
+                {
+                    likelihood1: sample_size,
+                    likelihood2: sample_size,
+                    ...
+                }
+    """
+    alpha = risk_limit / 100
+    assert alpha < 1, "The risk-limit must be less than one!"
+
+    margins = contest.margins
+
+    # With no losers, there's nothing to audit
+    if not margins["losers"]:
+        return {"asn": {"type": "ASN", "size": 1, "prob": 1.0}}
+
+    # Get smallest p_w - p_l
+    worse_winner = min(margins["winners"], key=lambda w: margins["winners"][w]["p_w"])
+    best_loser = max(margins["losers"], key=lambda l: margins["losers"][l]["p_l"])
+    p_w = margins["winners"][worse_winner]["p_w"]
+    p_l = margins["losers"][best_loser]["p_l"]
+    p = margins["winners"][worse_winner]["swl"][best_loser]
+
+    num_ballots = contest.ballots
+
+    # Handles ties
+    if p <= 0.5:
+        return {
+            str(quant): {"type": None, "size": num_ballots, "prob": quant}
+            for quant in QUANTS
+        }
+
+    pair_round_sizes, winner_votes = pair_sample(
+        worse_winner, best_loser, sample_results
+    )
+    previous_round = (
+        minerva_round(alpha, p, pair_round_sizes) if pair_round_sizes else None
+    )
+    previous_winner_votes = winner_votes[-1] if winner_votes else 0
+
+    # Only p_w + p_l of the ballots we draw will have a vote for the winner or
+    # the loser.
+    p_wl = p_w + p_l
+    max_round_size = math.floor(num_ballots * p_wl)
+
+    samples: Dict = {}
+    stopping_probs: Dict[int, float] = {}
+    for quant in QUANTS:
+        round_size = next_round_size(
+            alpha,
+            p,
+            previous_round,
+            previous_winner_votes,
+            max_round_size,
+            quant,
+            stopping_probs,
+        )
+        size = (
+            num_ballots
+            if round_size is None
+            else min(math.ceil(round_size / p_wl), num_ballots)
+        )
+        samples[str(quant)] = {"type": None, "size": size, "prob": quant}
+
+    # If the computed sample size is a good chunk of the ballots, recommend
+    # auditing all ballots, since this is actually less work than auditing a
+    # large proportion (for large elections).
+    large_election_threshold = 100000
+    all_ballots_threshold = num_ballots * 0.25
+    if (
+        num_ballots > large_election_threshold
+        and samples["0.9"]["size"] >= all_ballots_threshold
+    ):
+        return {
+            "all-ballots": {
+                "type": "all-ballots",
+                "size": contest.ballots,
+                "prob": None,
+            }
+        }
+
+    return samples
@@ -1,15 +1,331 @@
 # pylint: disable=invalid-name
 # Handles generating sample sizes and taking samples
-from typing import cast, Any, Dict, List, Tuple
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
 from decimal import Decimal
+from bisect import bisect_right
+from itertools import accumulate
+import heapq
 import consistent_sampler
 
 from . import macro
+from ..util.process_pool import spawn_process_pool
 from .sampler_contest import Contest
 
 
+def ticket_index(manifest: Dict[Any, int]) -> Tuple[List[Any], List[int]]:
+    """
+    Builds a prefix-sum index over the batches in a ballot manifest, so that
+    the nth ballot (0-indexed, in manifest order) can be located without
+    expanding the manifest into a list of ballots.
+
+    Inputs:
+        manifest - mapping of batches to the ballots they contain
+
+    Outputs:
+        (batches, cumulative_counts) - the batches in manifest order and the
+            running total of ballots through each batch
+    """
+    batches = list(manifest)
+    return batches, list(accumulate(manifest[batch] for batch in batches))
+
+
+def ballot_at_index(
+    index: Tuple[List[Any], List[int]], ballot_num: int, first_position: int = 1
+) -> Tuple[Any, int]:
+    """
+    Maps the nth ballot (0-indexed) in a manifest to its (batch, ballot
+    position) id, where ballot positions within a batch start at
+    <first_position>.
+    """
+    batches, cumulative_counts = index
+    i = bisect_right(cumulative_counts, ballot_num)
+    batch_start = cumulative_counts[i - 1] if i > 0 else 0
+    return (batches[i], ballot_num - batch_start + first_position)
+
+
+def manifest_fingerprint(
+    seed: str, manifest: Dict[Any, int], first_position: int = 1
+) -> str:
+    """
+    Hashes the inputs that determine a ticket stream, so we can tell whether a
+    saved SamplerState can be used to continue sampling. Batch order doesn't
+    affect the tickets, so it doesn't affect the fingerprint either.
+    """
+    return consistent_sampler.sha256_hex(
+        (
+            consistent_sampler.sha256_hex(seed),
+            first_position,
+            sorted(
+                repr((batch, num_ballots)) for batch, num_ballots in manifest.items()
+            ),
+        )
+    )
+
+
+# Ticket numbers are strings of the form "0.ddd...", so these sort before and
+# after every ticket number, respectively.
+NO_TICKETS_LOADED = "0"
+ALL_TICKETS_LOADED = "1"
+
+
+def _to_tuple(value: Any) -> Any:
+    # JSON turns our tuple ids into lists, so we turn them back into tuples
+    if isinstance(value, list):
+        return tuple(_to_tuple(item) for item in value)
+    return value
+
+
+class SamplerState:
+    """
+    A resumable cursor into the stream of tickets generated by lazy_sampler
+    (or weighted_sampler) for a given seed and manifest. Saving the state
+    after drawing a sample lets us draw the next sample without redrawing
+    every earlier ticket.
+
+    For lazy_sampler: any ballot whose first ticket number is at most
+    <loaded_through> has its current ticket in <tickets> (a heap). Ballots
+    that haven't been loaded yet all have larger first ticket numbers, so as
+    long as the smallest ticket in the heap is at most <loaded_through>, it's
+    the next ticket in the stream.
+
+    For weighted_sampler: each draw only depends on the draw number, so we
+    just need to remember how many times each batch has been drawn.
+
+    A new state (with no fingerprint) gets initialized for the seed and
+    manifest the first time it's used.
+    """
+
+    fingerprint: Optional[str]  # manifest_fingerprint of the seed and manifest
+    num_sampled: int  # How many tickets have been drawn so far
+    loaded_through: str  # See above
+    tickets: List[consistent_sampler.Ticket]  # Heap of untrimmed tickets
+    weighted: bool  # Whether this state was created by weighted_sampler
+    times_sampled: Dict[Any, int]  # Number of times each batch was drawn
+
+    def __init__(
+        self,
+        fingerprint: Optional[str] = None,
+        num_sampled: int = 0,
+        loaded_through: str = NO_TICKETS_LOADED,
+        tickets: List[consistent_sampler.Ticket] = None,
+        weighted: bool = False,
+        times_sampled: Dict[Any, int] = None,
+    ):
+        self.fingerprint = fingerprint
+        self.num_sampled = num_sampled
+        self.loaded_through = loaded_through
+        self.tickets = tickets or []
+        self.weighted = weighted
+        self.times_sampled = times_sampled or {}
+
+    def reset(self, fingerprint: str, weighted: bool = False):
+        self.fingerprint = fingerprint
+        self.num_sampled = 0
+        self.loaded_through = NO_TICKETS_LOADED
+        self.tickets = []
+        self.weighted = weighted
+        self.times_sampled = {}
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "fingerprint": self.fingerprint,
+            "numSampled": self.num_sampled,
+            "loadedThrough": self.loaded_through,
+            "tickets": [list(ticket) for ticket in self.tickets],
+            "weighted": self.weighted,
+            # Batch ids are tuples, which can't be JSON object keys
+            "timesSampled": [list(item) for item in self.times_sampled.items()],
+        }
+
+    @staticmethod
+    def from_json(state: Dict[str, Any]) -> "SamplerState":
+        return SamplerState(
+            state["fingerprint"],
+            state["numSampled"],
+            state["loadedThrough"],
+            [
+                consistent_sampler.Ticket(ticket_number, _to_tuple(id), generation)
+                for ticket_number, id, generation in state["tickets"]
+            ],
+            state.get("weighted", False),
+            {
+                _to_tuple(batch): times_sampled
+                for batch, times_sampled in state.get("timesSampled", [])
+            },
+        )
+
+
+def _load_tickets(
+    state: SamplerState,
+    seed: str,
+    manifest: Dict[Any, int],
+    first_position: int,
+    n: int,
+):
+    """
+    Loads the first tickets of the <n> not-yet-loaded ballots with the
+    smallest first ticket numbers into the state.
+    """
+    index = ticket_index(manifest)
+    seed_hash = consistent_sampler.sha256_hex(seed)
+    loaded_through = state.loaded_through
+
+    def unloaded_first_tickets() -> Iterator[Tuple[str, int]]:
+        ballot_num = 0
+        for batch in manifest:
+            for position in range(first_position, manifest[batch] + first_position):
+                ticket_number = consistent_sampler.first_fraction(
+                    (batch, position), seed, seed_hash
+                )
+                if ticket_number > loaded_through:
+                    yield (ticket_number, ballot_num)
+                ballot_num += 1
+
+    first_tickets = heapq.nsmallest(n, unloaded_first_tickets())
+    for ticket_number, ballot_num in first_tickets:
+        heapq.heappush(
+            state.tickets,
+            consistent_sampler.Ticket(
+                ticket_number, ballot_at_index(index, ballot_num, first_position), 1
+            ),
+        )
+    state.loaded_through = (
+        first_tickets[-1][0] if len(first_tickets) == n else ALL_TICKETS_LOADED
+    )
+
+
+def lazy_sampler(
+    seed: str,
+    manifest: Dict[Any, int],
+    take: int,
+    drop: int = 0,
+    digits: int = 18,
+    first_position: int = 1,
+    state: SamplerState = None,
+    prefetch: int = 0,
+) -> Iterator[Tuple[str, Tuple[Any, int], int]]:
+    """
+    Generates the same tickets, in the same order, as
+    consistent_sampler.sampler(ballots, seed, with_replacement=True, ...) would
+    for the list of ballots [(batch, 1), ..., (batch, num_ballots), ...] in
+    the manifest - without ever building that list.
+
+    Every ballot still gets a first ticket number (that's what makes the
+    sample reproducible), but we only hold on to the smallest ones we need.
+    When sampling with replacement, a ballot can only be drawn in the next n
+    draws if its first ticket number is among the n smallest not yet loaded
+    (every ballot with a smaller first ticket would have to be drawn before
+    it), so the draws never need to look past those.
+
+    If a SamplerState is passed in, sampling resumes from it (as long as it
+    was created for the same seed and manifest and hasn't drawn more than
+    <drop> tickets) and the state is updated in place, so it can be saved and
+    used to resume the next sample. <prefetch> extra first tickets are loaded
+    so that a subsequent sample of about that size can be drawn from the
+    saved state without going back over the whole manifest.
+    """
+    fingerprint = manifest_fingerprint(seed, manifest, first_position)
+    if state is None:
+        state = SamplerState(fingerprint)
+    elif state.fingerprint != fingerprint or state.num_sampled > drop:
+        state.reset(fingerprint)
+
+    while state.num_sampled < drop + take:
+        if not state.tickets or state.tickets[0].ticket_number > state.loaded_through:
+            if state.loaded_through == ALL_TICKETS_LOADED:
+                return
+            _load_tickets(
+                state,
+                seed,
+                manifest,
+                first_position,
+                drop + take - state.num_sampled + prefetch,
+            )
+            continue
+
+        ticket = heapq.heappop(state.tickets)
+        heapq.heappush(state.tickets, consistent_sampler.next_ticket(ticket))
+        state.num_sampled += 1
+        if state.num_sampled > drop:
+            yield (
+                consistent_sampler.trim(ticket.ticket_number, digits),
+                ticket.id,
+                ticket.generation,
+            )
+
+
+def weighted_fingerprint(seed: str, weights: Dict[Any, Decimal]) -> str:
+    """
+    Like manifest_fingerprint, but for the weights passed to weighted_sampler.
+    """
+    return consistent_sampler.sha256_hex(
+        (
+            "weighted",
+            consistent_sampler.sha256_hex(seed),
+            sorted(repr((batch, str(weight))) for batch, weight in weights.items()),
+        )
+    )
+
+
+def weighted_sampler(
+    seed: str,
+    weights: Dict[Any, Decimal],
+    take: int,
+    drop: int = 0,
+    digits: int = 9,
+    state: SamplerState = None,
+) -> Iterator[Tuple[str, Any, int]]:
+    """
+    Draws a sample with replacement where each batch is drawn with probability
+    proportional to its weight.
+
+    Each draw gets a pseudorandom ticket number in (0, 1) computed from the
+    seed and the draw number (using the same hash as consistent_sampler), which
+    picks out a batch by bisecting into the cumulative weights. This uses
+    O(batches) memory and O(log batches) time per draw, no matter how uneven
+    the weights are.
+
+    Outputs tuples of the same form as lazy_sampler: (ticket number, batch,
+    number of times the batch has been drawn). If a SamplerState is passed in,
+    sampling resumes from it (see lazy_sampler).
+    """
+    fingerprint = weighted_fingerprint(seed, weights)
+    if state is None:
+        state = SamplerState(fingerprint, weighted=True)
+    elif state.fingerprint != fingerprint or state.num_sampled > drop:
+        state.reset(fingerprint, weighted=True)
+
+    batches = list(weights)
+    if not batches:
+        return
+    cumulative_weights = list(accumulate(weights[batch] for batch in batches))
+    total_weight = cumulative_weights[-1]
+    seed_hash = consistent_sampler.sha256_hex(seed)
+
+    while state.num_sampled < drop + take:
+        state.num_sampled += 1
+        ticket_number = consistent_sampler.first_fraction(
+            state.num_sampled, seed, seed_hash
+        )
+        i = bisect_right(cumulative_weights, Decimal(ticket_number) * total_weight)
+        # Guard against rounding the target up to the total weight
+        batch = batches[min(i, len(batches) - 1)]
+        state.times_sampled[batch] = state.times_sampled.get(batch, 0) + 1
+        if state.num_sampled > drop:
+            yield (
+                consistent_sampler.trim(ticket_number, digits),
+                batch,
+                state.times_sampled[batch],
+            )
+
+
 def draw_sample(
-    seed: str, manifest: Dict[Any, int], sample_size: int, num_sampled=0
+    seed: str,
+    manifest: Dict[Any, int],
+    sample_size: int,
+    num_sampled=0,
+    state: SamplerState = None,
+    prefetch: int = 0,
 ) -> List[Tuple[str, Tuple[Any, int], int]]:
     """
     Draws uniform random sample with replacement of size <sample_size> from the
@@ -25,6 +341,10 @@ def draw_sample(
                     }
         sample_size - number of tickets to randomly draw
         num_sampled - number of tickets that have already been sampled
+        state - (optional) a SamplerState saved after drawing the previous
+                sample, which will be updated to resume the next sample
+        prefetch - (optional) number of extra tickets to load into the state
+                   for the next sample
 
     Outputs:
         sample - list of 'tickets', consisting of:
@@ -38,28 +358,72 @@ def draw_sample(
                 ]
     """
 
-    ballots: List[Tuple[str, int]] = []
-    # First build a faux list of ballots
-    for batch in manifest:
-        for i in range(manifest[batch]):
-            ballots.append((batch, i + 1))
-
-    return cast(
-        # The signature of `consistent_sampler.sampler` can't be represented by
-        # mypy yet, so it is typed as a less specific version of what it really
-        # is. This casts it back to the more specific version.
-        List[Tuple[str, Tuple[str, int], int]],
-        list(
-            consistent_sampler.sampler(
-                ballots,
-                seed=seed,
-                take=sample_size + num_sampled,
-                with_replacement=True,
-                output="tuple",
-                digits=18,
-            )
-        )[num_sampled:],
+    return list(
+        lazy_sampler(
+            seed,
+            manifest,
+            take=sample_size,
+            drop=num_sampled,
+            state=state,
+            prefetch=prefetch,
+        )
+    )
+
+
+class SampleRequest(NamedTuple):
+    # The arguments to draw_sample for one contest's sample
+    manifest: Dict[Any, int]
+    sample_size: int
+    num_sampled: int
+    state: SamplerState
+    prefetch: int
+
+
+def _draw_sample_for_request(
+    seed: str, request: SampleRequest
+) -> Tuple[List[Tuple[str, Tuple[Any, int], int]], SamplerState]:
+    state = request.state or SamplerState()
+    sample = draw_sample(
+        seed,
+        request.manifest,
+        request.sample_size,
+        request.num_sampled,
+        state=state,
+        prefetch=request.prefetch,
     )
+    return sample, state
+
+
+def draw_samples(
+    seed: str, requests: List[SampleRequest], max_workers: int = 1
+) -> List[Tuple[List[Tuple[str, Tuple[Any, int], int]], SamplerState]]:
+    """
+    Draws a sample for each request (e.g. for each targeted contest in a
+    round). If there's more than one request and max_workers > 1, the samples
+    are drawn in parallel in separate processes, so drawing them all takes
+    about as long as drawing the largest one.
+
+    Inputs:
+        seed - random seed
+        requests - list of SampleRequests
+        max_workers - the maximum number of processes to use
+
+    Outputs:
+        list of (sample, state) pairs, in the same order as the requests, where
+        sample is the output of draw_sample and state is the SamplerState
+        updated to resume the next sample. Since each sample only depends on
+        its own request, the results are the same no matter how many
+        processes are used.
+    """
+    if len(requests) <= 1 or max_workers <= 1:
+        return [_draw_sample_for_request(seed, request) for request in requests]
+
+    with spawn_process_pool(min(max_workers, len(requests))) as executor:
+        futures = [
+            executor.submit(_draw_sample_for_request, seed, request)
+            for request in requests
+        ]
+        return [future.result() for future in futures]
 
 
 def draw_ppeb_sample(
@@ -68,6 +432,10 @@ def draw_ppeb_sample(
     sample_size: int,
     num_sampled: int,
     batch_results: Dict[Any, Dict[str, Dict[str, int]]],
+    state: SamplerState = None,
+    prefetch: int = 0,
+    replicated: bool = False,
+    max_errors: Dict[Any, Decimal] = None,
 ) -> List[Tuple[str, Tuple[str, int], int]]:
     """
     Draws sample with replacement of size <sample_size> from the
@@ -76,6 +444,12 @@ def draw_ppeb_sample(
     Stark further applied PPEB to batch audits here: https://www.stat.berkeley.edu/~stark/Preprints/ppebwrwd08.pdf
     For use with batch audits like MACRO.
 
+    Batches are drawn with probability proportional to their maximum possible
+    error using weighted_sampler. Audits that were started before we had
+    weighted_sampler approximated this by sampling uniformly from a list of
+    batches in which each batch was repeated in proportion to its error.
+    Passing replicated=True reproduces those draws exactly.
+
     Inputs:
         seed    - the random seed to use in sampling
         sample_size - number of ballots to randomly draw
@@ -90,6 +464,14 @@ def draw_ppeb_sample(
                             }
                             ...
                         }
+        state - (optional) a SamplerState saved after drawing the previous
+                sample, which will be updated to resume the next sample
+        prefetch - (optional) number of extra tickets to load into the state
+                   for the next sample (only used if replicated=True)
+        replicated - (optional) whether to use the replicated batch list
+                     instead of weighted_sampler
+        max_errors - (optional) the max error for every batch, as computed
+                     by macro.compute_max_errors
 
     Outputs:
         sample - list of 'tickets', consisting of:
@@ -105,51 +487,64 @@ def draw_ppeb_sample(
 
     assert batch_results, "Must have batch-level results to use MACRO"
 
-    U = macro.compute_U(batch_results, {}, contest)
+    if max_errors is None:
+        max_errors = macro.compute_max_errors(batch_results, contest)
+
+    U = macro.compute_U(batch_results, {}, contest, max_errors)
 
     # This can only be the case if we've already recounted
     if U == 0:
         return []
 
-    # Map each batch to its weighted probability of being picked
-    batch_to_prob: Dict[str, Decimal] = {}
-    min_prob = Decimal(1.0)
-    # Get u_ps
+    # Map each batch to its maximum possible error. Probability of being
+    # picked is directly related to how much this batch contributes to the
+    # overall possible error.
+    batch_to_error: Dict[Any, Decimal] = {}
     for batch in batch_results:
-        error = macro.compute_max_error(batch_results[batch], contest)
+        error = max_errors[batch]
 
         # Set a floor on the error so it can't go to 0
         if error == 0:
             error = Decimal(1) / Decimal(contest.ballots)
 
-        # Probability of being picked is directly related to how much this
-        # batch contributes to the overall possible error
+        batch_to_error[batch] = error
+
+    if not replicated:
+        return list(
+            weighted_sampler(
+                seed, batch_to_error, take=sample_size, drop=num_sampled, state=state
+            )
+        )
+
+    # Map each batch to its weighted probability of being picked
+    batch_to_prob: Dict[Any, Decimal] = {}
+    min_prob = Decimal(1.0)
+    for batch, error in batch_to_error.items():
         batch_to_prob[batch] = error / U
 
         if error / U < min_prob:
             min_prob = error / U
 
-    sample_from = []
     # Now build faux list of batches, where each batch appears a number of
-    # times proportional to its prob
-    for batch in batch_to_prob:
-        times = int(batch_to_prob[batch] / min_prob)
-
-        for i in range(times):
-            # We have to create "unique" records for the sampler, so we add
-            # a 'n' to the batch name so we know which duplicate it is.
-            sample_from.append((batch, i))
+    # times proportional to its prob. We have to create "unique" records for
+    # the sampler, so each duplicate is identified by (batch, n). Rather than
+    # building the list, we describe it like a manifest and let lazy_sampler
+    # expand it on the fly.
+    faux_manifest = {
+        batch: int(batch_to_prob[batch] / min_prob) for batch in batch_to_prob
+    }
 
     # Now draw the sample
-    faux_sample = list(
-        consistent_sampler.sampler(
-            sample_from,
-            seed=seed,
-            take=sample_size + num_sampled,
-            with_replacement=True,
-            output="tuple",
-        )
-    )[num_sampled:]
+    faux_sample = lazy_sampler(
+        seed,
+        faux_manifest,
+        take=sample_size,
+        drop=num_sampled,
+        digits=9,
+        first_position=0,
+        state=state,
+        prefetch=prefetch,
+    )
 
     # here we take off the decimals.
     sample = []
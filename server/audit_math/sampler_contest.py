@@ -2,30 +2,58 @@
 A Module containing the Contest class, which encapsulates useful info for RLA
 computations.
 """
-from typing import Dict
+from typing import Dict, Tuple
+import functools
 import operator
 
+# How many Contest objects to keep in the from_db_contest cache
+CONTEST_CACHE_SIZE = 1000
+
 
 def from_db_contest(db_contest):
     """
     Builds sampler_contest object from the database
 
+    Computing the margins for a contest isn't free, and we need them several
+    times for each contest when computing sample sizes, drawing samples, and
+    measuring risk. So we cache the Contest objects we build, keyed on all of
+    the contest info they're built from (including the choices' vote counts
+    and the total ballots cast). If any of that info changes, we'll build a
+    new Contest. Callers must not modify the returned object, since it may
+    be shared.
+
     Inputs:
         db_contest - a contest object as defined in server/models.py
 
     Outputs:
         Contest - A contest object
     """
-    name = db_contest.id
+    return cached_contest(
+        db_contest.id,
+        db_contest.total_ballots_cast,
+        db_contest.num_winners,
+        db_contest.votes_allowed,
+        tuple((choice.id, choice.num_votes) for choice in db_contest.choices),
+    )
+
+
+@functools.lru_cache(maxsize=CONTEST_CACHE_SIZE)
+def cached_contest(
+    name: str,
+    ballots: int,
+    num_winners: int,
+    votes_allowed: int,
+    choice_votes: Tuple[Tuple[str, int], ...],
+):
     info_dict = {
-        "ballots": db_contest.total_ballots_cast,
-        "numWinners": db_contest.num_winners,
-        "votesAllowed": db_contest.votes_allowed,
+        "ballots": ballots,
+        "numWinners": num_winners,
+        "votesAllowed": votes_allowed,
     }
 
     # Initialize the choices in this contest and how many votes each received
-    for choice in db_contest.choices:
-        info_dict[choice.id] = choice.num_votes
+    for choice_id, num_votes in choice_votes:
+        info_dict[choice_id] = num_votes
 
     return Contest(name, info_dict)
 
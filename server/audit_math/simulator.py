@@ -0,0 +1,290 @@
+"""
+Monte Carlo simulation of audits, for estimating the probability that an
+audit will stop (i.e. confirm the reported outcome) with a sample of a given
+size. Unlike the closed-form approximations we use to compute sample size
+options, this works the same way for every audit type: we simulate drawing
+samples assuming the reported outcome is correct, and then run the same
+compute_risk functions that we use to measure risk in a real audit.
+
+Each simulated audit (trial) gets its own random number stream, spawned
+from a single seed, so the results are reproducible and don't depend on how
+many processes the trials are spread across.
+"""
+from typing import Any, Callable, Dict, List, Optional
+from decimal import Decimal
+import functools
+import numpy as np
+
+from ..models import AuditMathType
+from ..util.process_pool import spawn_process_pool
+from .sampler_contest import Contest
+from . import ballot_polling, supersimple, macro
+
+# A function that simulates one audit using the given random number generator
+# and returns, for each of the given round sizes, whether the audit would
+# stop with a sample of that size.
+SimulateTrial = Callable[[np.random.Generator, List[int]], List[bool]]
+
+DEFAULT_NUM_TRIALS = 1000
+
+# Kinds of discrepancies, in the format used by supersimple.get_sample_sizes
+DISCREPANCY_TYPES = ["1-over", "2-over", "1-under", "2-under"]
+
+
+def stopping_probabilities(
+    simulate_trial: SimulateTrial,
+    round_sizes: List[int],
+    num_trials: int = DEFAULT_NUM_TRIALS,
+    seed: int = 0,
+    max_workers: int = 1,
+) -> Dict[int, float]:
+    """
+    Runs <num_trials> simulated audits and computes the fraction of them that
+    stopped with each round size.
+
+    Inputs:
+        simulate_trial - a function that simulates one audit (see
+                         SimulateTrial). It must be picklable (e.g. a
+                         functools.partial of a module-level function) to run
+                         in multiple processes.
+        round_sizes    - the sample sizes to compute stopping probabilities for
+        num_trials     - the number of audits to simulate
+        seed           - seed for the random number generators
+        max_workers    - the maximum number of processes to use
+
+    Outputs:
+        stopping probabilities - mapping of round size to the probability
+                                 that the audit stops with a sample of that
+                                 size:
+                {
+                    round_size1: probability,
+                    round_size2: probability,
+                    ...
+                }
+    """
+    round_sizes = sorted(set(round_sizes))
+    trial_seeds = np.random.SeedSequence(seed).spawn(num_trials)
+
+    if max_workers <= 1 or num_trials <= 1:
+        stops = _run_trials(simulate_trial, round_sizes, trial_seeds)
+    else:
+        # Split the trials into a few chunks per process, so that a process
+        # that gets slow trials doesn't hold everything up.
+        num_chunks = min(num_trials, max_workers * 4)
+        chunks = [trial_seeds[i::num_chunks] for i in range(num_chunks)]
+        with spawn_process_pool(min(max_workers, num_chunks)) as executor:
+            futures = [
+                executor.submit(_run_trials, simulate_trial, round_sizes, chunk)
+                for chunk in chunks
+            ]
+            stops = np.sum([future.result() for future in futures], axis=0)
+
+    return {
+        round_size: float(num_stops) / num_trials
+        for round_size, num_stops in zip(round_sizes, stops)
+    }
+
+
+def _run_trials(
+    simulate_trial: SimulateTrial,
+    round_sizes: List[int],
+    trial_seeds: List[np.random.SeedSequence],
+) -> np.ndarray:
+    # Returns the number of trials that stopped with each round size
+    stops = np.zeros(len(round_sizes), dtype=int)
+    for trial_seed in trial_seeds:
+        stops += simulate_trial(np.random.default_rng(trial_seed), round_sizes)
+    return stops
+
+
+def ballot_polling_trial(
+    risk_limit: int,
+    contest: Contest,
+    math_type: AuditMathType,
+    rng: np.random.Generator,
+    round_sizes: List[int],
+) -> List[bool]:
+    """
+    Simulates a ballot polling audit, drawing ballots uniformly at random
+    with replacement (like sampler.draw_sample) from a contest whose reported
+    results are correct.
+    """
+    candidates = list(contest.candidates)
+    vote_probs = np.array(
+        [contest.candidates[candidate] / contest.ballots for candidate in candidates]
+    )
+
+    stops = []
+    tally = np.zeros(len(candidates), dtype=int)
+    num_sampled = 0
+    for round_size in round_sizes:
+        num_draws = round_size - num_sampled
+        if contest.votes_allowed == 1:
+            # Each ballot has a vote for one candidate or no vote at all. If
+            # every ballot has a vote, rounding can make the probability of
+            # no vote slightly negative, so we clamp it.
+            probs = np.append(vote_probs, max(0.0, 1 - vote_probs.sum()))
+            tally += rng.multinomial(num_draws, probs)[:-1]
+        else:
+            tally += rng.binomial(num_draws, vote_probs)
+        num_sampled = round_size
+
+        sample_results = {
+            "round1": dict(zip(candidates, (int(votes) for votes in tally)))
+        }
+        _, finished = ballot_polling.compute_risk(
+            risk_limit, contest, sample_results, math_type, {1: round_size}
+        )
+        stops.append(finished)
+    return stops
+
+
+def supersimple_trial(
+    risk_limit: int,
+    contest: Contest,
+    discrepancy_rates: Dict[str, float],
+    rng: np.random.Generator,
+    round_sizes: List[int],
+) -> List[bool]:
+    """
+    Simulates a ballot comparison audit in which each sampled ballot has a
+    discrepancy of each type (see DISCREPANCY_TYPES) with the given
+    probability. The discrepancies are between the winner with the fewest
+    votes and the loser with the most votes, i.e. the pair with the smallest
+    margin.
+    """
+    winner = min(contest.winners, key=lambda winner: contest.winners[winner])
+    loser = max(contest.losers, key=lambda loser: contest.losers[loser])
+    no_votes = {candidate: 0 for candidate in contest.candidates}
+    reported_and_audited_cvrs = {
+        None: (no_votes, no_votes),
+        "1-over": ({**no_votes, winner: 1}, no_votes),
+        "2-over": ({**no_votes, winner: 1}, {**no_votes, loser: 1}),
+        "1-under": (no_votes, {**no_votes, winner: 1}),
+        "2-under": ({**no_votes, loser: 1}, {**no_votes, winner: 1}),
+    }
+
+    discrepancy_types: List[Optional[str]] = [None, *DISCREPANCY_TYPES]
+    discrepancy_probs = [
+        discrepancy_rates.get(discrepancy_type, 0)
+        for discrepancy_type in DISCREPANCY_TYPES
+    ]
+    discrepancies = rng.choice(
+        len(discrepancy_types),
+        size=max(round_sizes),
+        p=[max(0.0, 1 - sum(discrepancy_probs)), *discrepancy_probs],
+    )
+
+    # Each draw is (almost certainly) a different ballot, so we give each one
+    # its own ballot id.
+    cvrs: supersimple.CVRS = {}
+    sample_cvrs: supersimple.SAMPLE_CVRS = {}
+    stops = []
+    for round_size in round_sizes:
+        for ballot in range(len(sample_cvrs), round_size):
+            reported, audited = reported_and_audited_cvrs[
+                discrepancy_types[discrepancies[ballot]]
+            ]
+            cvrs[str(ballot)] = {contest.name: reported}
+            sample_cvrs[str(ballot)] = {
+                "times_sampled": 1,
+                "cvr": {contest.name: audited},
+            }
+        _, finished = supersimple.compute_risk(risk_limit, contest, cvrs, sample_cvrs)
+        stops.append(finished)
+    return stops
+
+
+def macro_trial(
+    risk_limit: int,
+    contest: Contest,
+    reported_results: Dict[Any, Dict[str, Dict[str, int]]],
+    max_errors: Dict[Any, Decimal],
+    rng: np.random.Generator,
+    round_sizes: List[int],
+) -> List[bool]:
+    """
+    Simulates a batch comparison audit, drawing batches with replacement with
+    probability proportional to their maximum possible error (like
+    sampler.draw_ppeb_sample), in which the reported results are correct.
+    """
+    batches = list(reported_results)
+    batch_errors = np.array([float(max_errors[batch]) for batch in batches])
+    draws = rng.choice(
+        len(batches), size=max(round_sizes), p=batch_errors / batch_errors.sum()
+    )
+
+    stops = []
+    sample_results: Dict[Any, Dict[str, Dict[str, int]]] = {}
+    num_sampled = 0
+    for round_size in round_sizes:
+        for draw in draws[num_sampled:round_size]:
+            sample_results[batches[draw]] = reported_results[batches[draw]]
+        num_sampled = round_size
+        _, finished = macro.compute_risk(
+            risk_limit, contest, reported_results, sample_results, max_errors
+        )
+        stops.append(finished)
+    return stops
+
+
+def ballot_polling_stopping_probabilities(
+    risk_limit: int,
+    contest: Contest,
+    round_sizes: List[int],
+    math_type: AuditMathType = AuditMathType.BRAVO,
+    num_trials: int = DEFAULT_NUM_TRIALS,
+    seed: int = 0,
+    max_workers: int = 1,
+) -> Dict[int, float]:
+    return stopping_probabilities(
+        functools.partial(ballot_polling_trial, risk_limit, contest, math_type),
+        round_sizes,
+        num_trials,
+        seed,
+        max_workers,
+    )
+
+
+def supersimple_stopping_probabilities(
+    risk_limit: int,
+    contest: Contest,
+    round_sizes: List[int],
+    discrepancy_rates: Dict[str, float] = None,
+    num_trials: int = DEFAULT_NUM_TRIALS,
+    seed: int = 0,
+    max_workers: int = 1,
+) -> Dict[int, float]:
+    return stopping_probabilities(
+        functools.partial(
+            supersimple_trial, risk_limit, contest, discrepancy_rates or {}
+        ),
+        round_sizes,
+        num_trials,
+        seed,
+        max_workers,
+    )
+
+
+def macro_stopping_probabilities(
+    risk_limit: int,
+    contest: Contest,
+    reported_results: Dict[Any, Dict[str, Dict[str, int]]],
+    round_sizes: List[int],
+    num_trials: int = DEFAULT_NUM_TRIALS,
+    seed: int = 0,
+    max_workers: int = 1,
+) -> Dict[int, float]:
+    return stopping_probabilities(
+        functools.partial(
+            macro_trial,
+            risk_limit,
+            contest,
+            reported_results,
+            macro.compute_max_errors(reported_results, contest),
+        ),
+        round_sizes,
+        num_trials,
+        seed,
+        max_workers,
+    )
@@ -1,7 +1,8 @@
 # pylint: disable=invalid-name
 import math
 from decimal import Decimal, ROUND_CEILING
-from typing import Dict, Tuple, TypedDict, Optional
+from typing import Dict, List, NamedTuple, Tuple, TypedDict, Optional, Union
+import numpy as np
 
 from .sampler_contest import Contest
 
@@ -118,80 +119,138 @@ def compute_discrepancies(
                     }
     """
 
-    discrepancies: Dict[str, Discrepancy] = {}
-    for ballot in sample_cvr:
-        # Typechecker needs us to pull these out into variables
-        ballot_sample_cvr = sample_cvr[ballot]["cvr"]
-        ballot_cvr = cvrs[ballot]
-        assert ballot_cvr is not None
-
-        # We want to be conservative, so we will ignore the case where there are
-        # negative errors (i.e. errors that favor the winner. We can do that
-        # by setting these to zero and evaluating whether an error is greater
-        # than zero (i.e. positive).
-        e_r = Decimal(0.0)
-        e_int = 0
-
-        found = False
+    errors = compute_errors(contest, cvrs, sample_cvr)
 
-        # Special case: if ballot can't be found by audit board, count it as a
-        # two-vote overstatement
-        if ballot_sample_cvr is None:
-            e_int = 2
-            e_weighted = Decimal(e_int) / Decimal(
+    discrepancies: Dict[str, Discrepancy] = {}
+    for i in np.flatnonzero(errors.found):
+        ballot = errors.ballots[i]
+        if sample_cvr[ballot]["cvr"] is None:
+            weighted_error = Decimal(2) / Decimal(
                 contest.diluted_margin * contest.ballots
             )
-            found = True
-
+        elif errors.last_pair_margin[i] == 0:
+            # In this case the error is undefined
+            weighted_error = Decimal("inf")
         else:
-            for winner in contest.winners:
-                for loser in contest.losers:
-
-                    if contest.name in ballot_cvr:
-                        v_w = ballot_cvr[contest.name][winner]
-                        v_l = ballot_cvr[contest.name][loser]
-                    else:
-                        v_w = 0
-                        v_l = 0
-
-                    if contest.name in ballot_sample_cvr:
-                        a_w = ballot_sample_cvr[contest.name][winner]
-                        a_l = ballot_sample_cvr[contest.name][loser]
-                    else:
-                        a_w = 0
-                        a_l = 0
-
-                    V_wl = contest.candidates[winner] - contest.candidates[loser]
-
-                    e = (v_w - a_w) - (v_l - a_l)
-
-                    if e:
-                        # we found a discrepancy!
-                        found = True
-
-                    if V_wl == 0:
-                        # In this case the error is undefined
-                        e_weighted = Decimal("inf")
-                    else:
-                        e_weighted = Decimal(e) / Decimal(V_wl)
-
-                    if e_weighted > e_r:
-                        e_r = e_weighted
-                        e_int = e
-
-        if found:
-            discrepancies[ballot] = Discrepancy(
-                counted_as=e_int,
-                weighted_error=e_weighted,
-                discrepancy_cvr={
-                    "reported_as": ballot_cvr,
-                    "audited_as": ballot_sample_cvr,
-                },
+            weighted_error = Decimal(int(errors.last_pair_error[i])) / Decimal(
+                int(errors.last_pair_margin[i])
             )
+        discrepancies[ballot] = Discrepancy(
+            counted_as=int(errors.counted_as[i]),
+            weighted_error=weighted_error,
+            discrepancy_cvr={
+                "reported_as": cvrs[ballot],
+                "audited_as": sample_cvr[ballot]["cvr"],
+            },
+        )
 
     return discrepancies
 
 
+class Errors(NamedTuple):
+    """
+    The errors found in each sampled ballot (see compute_errors). Each array
+    has one entry per ballot, in the same order as <ballots>.
+    """
+
+    ballots: List[str]
+    found: np.ndarray  # Whether the ballot has a discrepancy
+    counted_as: np.ndarray  # The error for the pair with the largest weighted error
+    weighted_error: np.ndarray  # The weighted error used to compute the risk
+    last_pair_error: np.ndarray  # The error for the last (winner, loser) pair
+    last_pair_margin: np.ndarray  # The reported margin of the last pair
+
+
+def compute_errors(contest: Contest, cvrs: CVRS, sample_cvr: SAMPLE_CVRS) -> Errors:
+    """
+    Computes the errors in each sampled ballot for every (winner, loser) pair
+    at once, using arrays with one row per ballot:
+        - reported votes and audited votes (one column per candidate)
+        - errors and weighted errors (one column per pair)
+
+    For each ballot, we record:
+        - counted_as: the error for the pair with the largest positive weighted
+          error, or 0 if there isn't one. We want to be conservative, so we
+          ignore negative errors (errors that favor the winner).
+        - weighted_error: the weighted error for the last pair, which is what
+          we use to compute the risk (as a float, for speed).
+    A ballot that the audit board couldn't find counts as a two-vote
+    overstatement.
+    """
+    ballots = list(sample_cvr)
+    winners = list(contest.winners)
+    losers = list(contest.losers)
+    candidates = winners + losers
+
+    def votes(cvr: Optional[CVR]) -> List[int]:
+        if cvr is None or contest.name not in cvr:
+            return [0] * len(candidates)
+        return [cvr[contest.name][candidate] for candidate in candidates]
+
+    def reported_cvr(ballot: str) -> CVR:
+        ballot_cvr = cvrs[ballot]
+        assert ballot_cvr is not None
+        return ballot_cvr
+
+    reported = np.array(
+        [votes(reported_cvr(ballot)) for ballot in ballots], dtype=np.int64
+    ).reshape(len(ballots), len(candidates))
+    audited = np.array(
+        [votes(sample_cvr[ballot]["cvr"]) for ballot in ballots], dtype=np.int64
+    ).reshape(len(ballots), len(candidates))
+    not_found = np.array(
+        [sample_cvr[ballot]["cvr"] is None for ballot in ballots], dtype=bool
+    )
+
+    # The error for each pair is (v_w - a_w) - (v_l - a_l), with the pairs
+    # ordered by winner and then loser
+    differences = reported - audited
+    num_winners = len(winners)
+    errors = (
+        differences[:, :num_winners, np.newaxis]
+        - differences[:, np.newaxis, num_winners:]
+    ).reshape(len(ballots), num_winners * len(losers))
+    margins = np.array(
+        [
+            contest.candidates[winner] - contest.candidates[loser]
+            for winner in winners
+            for loser in losers
+        ],
+        dtype=np.int64,
+    )
+
+    # The error is undefined (infinite) if the pair is tied
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weighted_errors = np.where(margins == 0, np.inf, errors / margins)
+
+    found = not_found | (errors != 0).any(axis=1)
+    counted_as = np.zeros(len(ballots), dtype=np.int64)
+    if margins.size:
+        # argmax picks the first pair with the largest weighted error
+        max_pairs = np.argmax(weighted_errors, axis=1)
+        max_weighted_errors = weighted_errors[np.arange(len(ballots)), max_pairs]
+        counted_as = np.where(
+            max_weighted_errors > 0, errors[np.arange(len(ballots)), max_pairs], 0
+        )
+        last_pair_error = errors[:, -1]
+        last_pair_margin = np.full(len(ballots), margins[-1])
+        weighted_error = weighted_errors[:, -1].copy()
+    else:
+        last_pair_error = np.zeros(len(ballots), dtype=np.int64)
+        last_pair_margin = np.zeros(len(ballots), dtype=np.int64)
+        weighted_error = np.zeros(len(ballots))
+
+    if not_found.any():
+        counted_as[not_found] = 2
+        weighted_error[not_found] = 2 / (contest.diluted_margin * contest.ballots)
+    # Ballots without a discrepancy don't count towards the risk
+    weighted_error[~found] = 0
+
+    return Errors(
+        ballots, found, counted_as, weighted_error, last_pair_error, last_pair_margin,
+    )
+
+
 def get_sample_sizes(
     risk_limit: int, contest: Contest, sample_results: Optional[Dict[str, int]]
 ) -> int:
@@ -257,7 +316,11 @@ def get_sample_sizes(
 
 
 def compute_risk(
-    risk_limit: int, contest: Contest, cvrs: CVRS, sample_cvr: SAMPLE_CVRS,
+    risk_limit: int,
+    contest: Contest,
+    cvrs: CVRS,
+    sample_cvr: SAMPLE_CVRS,
+    exact: bool = False,
 ) -> Tuple[float, bool]:
     """
     Computes the risk-value of <sample_results> based on results in <contest>.
@@ -287,6 +350,11 @@ def compute_risk(
                     ...
                 }
 
+        exact      - if True, computes the p-value exactly using Decimals,
+                     ballot by ballot, instead of summing logs using floats.
+                     This is much slower, and is meant for verifying the
+                     float computation.
+
     Outputs:
         measurements    - the p-value of the hypotheses that the election
                           result is correct based on the sample, for each winner-loser pair.
@@ -295,17 +363,48 @@ def compute_risk(
     alpha = Decimal(risk_limit) / 100
     assert alpha < 1
 
-    p = Decimal(1.0)
-
     N = contest.ballots
-    V = Decimal(contest.diluted_margin * N)
 
-    if contest.diluted_margin == 0:
-        U = Decimal("inf")
+    p: Union[Decimal, float]
+    if exact:
+        p, result = compute_exact_p_value(alpha, contest, cvrs, sample_cvr)
+    elif not contest.diluted_margin:
+        # If the contest is a tie, each ballot's p-value is 1 - 1/(infinity)
+        # divided by 1 - e_r/infinity, i.e. 1
+        p, result = Decimal(1.0), False
     else:
-        U = 2 * gamma / Decimal(contest.diluted_margin)
+        # p is the product of each ballot's p-value (raised to the number of
+        # times it was sampled):
+        #   (1 - 1/U) / (1 - e_r / (2 * gamma / V))
+        # We sum the logs instead, which is faster and can't underflow.
+        errors = compute_errors(contest, cvrs, sample_cvr)
+        times_sampled = np.array(
+            [sample_cvr[ballot]["times_sampled"] for ballot in errors.ballots]
+        )
+        V = contest.diluted_margin * N
+        U = 2 * float(gamma) / contest.diluted_margin
+        log_p_b = np.log1p(-1 / U) - np.log1p(
+            -errors.weighted_error * V / (2 * float(gamma))
+        )
+        log_p = float(np.dot(times_sampled, log_p_b))
+        p = math.exp(log_p)
+        result = log_p < math.log(alpha)
+
+    if len(sample_cvr) >= N:
+        # We've done a full hand recount
+        return 0, True
+
+    return float(p), result
+
+
+def compute_exact_p_value(
+    alpha: Decimal, contest: Contest, cvrs: CVRS, sample_cvr: SAMPLE_CVRS
+) -> Tuple[Decimal, bool]:
+    # Computes the p-value ballot by ballot using Decimals
+    p = Decimal(1.0)
 
-    result = False
+    N = contest.ballots
+    V = Decimal(contest.diluted_margin * N)
 
     discrepancies = compute_discrepancies(contest, cvrs, sample_cvr)
 
@@ -327,11 +426,4 @@ def compute_risk(
         multiplicity = sample_cvr[ballot]["times_sampled"]
         p *= p_b ** multiplicity
 
-    if 0 < p < alpha:
-        result = True
-
-    if len(sample_cvr) >= N:
-        # We've done a full hand recount
-        return 0, True
-
-    return float(p), result
+    return p, 0 < p < alpha
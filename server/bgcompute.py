@@ -1,6 +1,13 @@
-import time
+import sys
+import select as py_select
+import multiprocessing
+import multiprocessing.connection
+from typing import Callable, List, Optional
+import psycopg2
+from sqlalchemy.orm import Query
 
 from server.app import app
+from server.config import BGCOMPUTE_NUM_WORKERS, DATABASE_URL
 from server.database import db_session
 from server.models import *  # pylint: disable=wildcard-import
 from server.util.jurisdiction_bulk_update import process_jurisdictions_file
@@ -8,21 +15,30 @@ from server.api.standardized_contests import process_standardized_contests_file
 from server.api.ballot_manifest import process_ballot_manifest_file
 from server.api.batch_tallies import process_batch_tallies_file
 from server.api.cvrs import process_cvr_file
+from server.util.process_file import BGCOMPUTE_CHANNEL
 
 
 def bgcompute():
-    bgcompute_update_election_jurisdictions_file()
-    bgcompute_update_standardized_contests_file()
-    bgcompute_update_ballot_manifest_file()
-    bgcompute_update_batch_tallies_file()
-    bgcompute_update_cvr_file()
-
-
-def bgcompute_update_election_jurisdictions_file() -> int:
-    files = (
-        File.query.join(Election, File.id == Election.jurisdictions_file_id)
-        .filter(File.processing_started_at.is_(None))
-        .all()
+    for task in BGCOMPUTE_TASKS:
+        task()
+
+
+def unprocessed_files(query: Query, limit: Optional[int]) -> List[File]:
+    query = query.filter(File.processing_started_at.is_(None)).order_by(
+        File.uploaded_at, File.id
+    )
+    if limit is None:
+        return query.all()
+    # When we're only taking some of the files (i.e. in a worker pool), skip
+    # any files that other workers have locked, so that workers never wait on
+    # each other or process the same file. The lock lasts until process_file
+    # commits.
+    return query.with_for_update(skip_locked=True, of=File).limit(limit).all()
+
+
+def bgcompute_update_election_jurisdictions_file(limit: Optional[int] = None) -> int:
+    files = unprocessed_files(
+        File.query.join(Election, File.id == Election.jurisdictions_file_id), limit
     )
 
     for file in files:
@@ -50,11 +66,10 @@ def bgcompute_update_election_jurisdictions_file() -> int:
     return len(files)
 
 
-def bgcompute_update_standardized_contests_file() -> int:
-    files = (
-        File.query.join(Election, File.id == Election.standardized_contests_file_id)
-        .filter(File.processing_started_at.is_(None))
-        .all()
+def bgcompute_update_standardized_contests_file(limit: Optional[int] = None) -> int:
+    files = unprocessed_files(
+        File.query.join(Election, File.id == Election.standardized_contests_file_id),
+        limit,
     )
 
     for file in files:
@@ -84,11 +99,9 @@ def bgcompute_update_standardized_contests_file() -> int:
     return len(files)
 
 
-def bgcompute_update_ballot_manifest_file() -> int:
-    files = (
-        File.query.join(Jurisdiction, File.id == Jurisdiction.manifest_file_id)
-        .filter(File.processing_started_at.is_(None))
-        .all()
+def bgcompute_update_ballot_manifest_file(limit: Optional[int] = None) -> int:
+    files = unprocessed_files(
+        File.query.join(Jurisdiction, File.id == Jurisdiction.manifest_file_id), limit
     )
 
     for file in files:
@@ -117,11 +130,10 @@ def bgcompute_update_ballot_manifest_file() -> int:
     return len(files)
 
 
-def bgcompute_update_batch_tallies_file() -> int:
-    files = (
-        File.query.join(Jurisdiction, File.id == Jurisdiction.batch_tallies_file_id)
-        .filter(File.processing_started_at.is_(None))
-        .all()
+def bgcompute_update_batch_tallies_file(limit: Optional[int] = None) -> int:
+    files = unprocessed_files(
+        File.query.join(Jurisdiction, File.id == Jurisdiction.batch_tallies_file_id),
+        limit,
     )
 
     for file in files:
@@ -152,11 +164,9 @@ def bgcompute_update_batch_tallies_file() -> int:
     return len(files)
 
 
-def bgcompute_update_cvr_file() -> int:
-    files = (
-        File.query.join(Jurisdiction, File.id == Jurisdiction.cvr_file_id)
-        .filter(File.processing_started_at.is_(None))
-        .all()
+def bgcompute_update_cvr_file(limit: Optional[int] = None) -> int:
+    files = unprocessed_files(
+        File.query.join(Jurisdiction, File.id == Jurisdiction.cvr_file_id), limit
     )
 
     for file in files:
@@ -185,10 +195,97 @@ def bgcompute_update_cvr_file() -> int:
     return len(files)
 
 
-def bgcompute_forever():
+# Each bgcompute task processes files of one type. Tasks are listed in priority
+# order - file types that are quick to process come first, so they don't get
+# stuck waiting behind big CVR files.
+BGCOMPUTE_TASKS: List[Callable[..., int]] = [
+    bgcompute_update_election_jurisdictions_file,
+    bgcompute_update_standardized_contests_file,
+    bgcompute_update_ballot_manifest_file,
+    bgcompute_update_batch_tallies_file,
+    bgcompute_update_cvr_file,
+]
+# CVRs are the only files that can take a long time to process.
+SMALL_FILE_BGCOMPUTE_TASKS = BGCOMPUTE_TASKS[:-1]
+
+
+# Processes the highest priority file that's waiting (if any). Returns True if
+# a file was found. Files are claimed using SELECT ... FOR UPDATE SKIP LOCKED,
+# so multiple workers can call this at the same time without waiting on each
+# other or processing the same file.
+def bgcompute_next_file(tasks: List[Callable[..., int]]) -> bool:
+    for task in tasks:
+        if task(limit=1) > 0:
+            return True
+    return False
+
+
+# How long to wait for a notification before checking for files anyway, in
+# case we somehow missed one.
+FALLBACK_POLL_SECONDS = 60
+
+
+def listen_for_uploads():
+    # Listen on a dedicated connection in autocommit mode, so that
+    # notifications are delivered as soon as they arrive rather than between
+    # transactions.
+    connection = psycopg2.connect(DATABASE_URL)
+    connection.autocommit = True
+    connection.cursor().execute(f"LISTEN {BGCOMPUTE_CHANNEL}")
+    return connection
+
+
+# Blocks until a file is uploaded (see notify_file_uploaded) or the timeout
+# passes.
+def wait_for_upload(connection, timeout: float):
+    if py_select.select([connection], [], [], timeout) != ([], [], []):
+        connection.poll()
+        connection.notifies.clear()
+
+
+def bgcompute_worker(tasks: List[Callable[..., int]]):
+    # Start listening before we check for files, so we don't miss any uploads
+    # in between.
+    connection = listen_for_uploads()
     while True:
-        bgcompute()
-        time.sleep(2)
+        found_file = bgcompute_next_file(tasks)
+        # End the transaction, releasing any file locks we're still holding
+        # (e.g. if something went wrong before the file was processed).
+        db_session.rollback()
+        # Once we've processed all the waiting files, sleep until there's a new
+        # one, rather than polling the db.
+        if not found_file:
+            wait_for_upload(connection, FALLBACK_POLL_SECONDS)
+
+
+def bgcompute_forever(num_workers: int = BGCOMPUTE_NUM_WORKERS):
+    if num_workers <= 1:
+        bgcompute_worker(BGCOMPUTE_TASKS)
+        return
+
+    # The first worker only processes small files, so that they never wait
+    # behind CVRs. The rest process all files in priority order. We spawn
+    # fresh processes rather than forking so that each worker opens its own
+    # database connections.
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(
+            target=bgcompute_worker,
+            args=(SMALL_FILE_BGCOMPUTE_TASKS if i == 0 else BGCOMPUTE_TASKS,),
+            name=f"bgcompute-{i}",
+            daemon=True,
+        )
+        for i in range(num_workers)
+    ]
+    for worker in workers:
+        worker.start()
+
+    # If any worker dies, stop all of them and exit, so the process manager
+    # can restart us.
+    multiprocessing.connection.wait(worker.sentinel for worker in workers)
+    for worker in workers:
+        worker.terminate()
+    sys.exit(1)
 
 
 if __name__ == "__main__":
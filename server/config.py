@@ -143,3 +143,32 @@ def read_jurisdictionadmin_auth0_creds() -> Tuple[str, str, str]:
 ) = read_jurisdictionadmin_auth0_creds()
 
 SENTRY_DSN = os.environ.get("SENTRY_DSN")
+
+
+def read_sample_draw_max_workers() -> int:
+    # How many processes to use when drawing samples for multiple contests at
+    # once (see audit_math.sampler.draw_samples). Defaults to one per CPU,
+    # except in tests, where spawning worker processes for every round would
+    # only slow the suite down.
+    max_workers = os.environ.get("ARLO_SAMPLE_DRAW_MAX_WORKERS", None)
+    if max_workers:
+        return int(max_workers)
+    if FLASK_ENV == "test":
+        return 1
+    return os.cpu_count() or 1
+
+
+SAMPLE_DRAW_MAX_WORKERS = read_sample_draw_max_workers()
+
+
+def read_bgcompute_num_workers() -> int:
+    # How many bgcompute worker processes to run. With more than one worker,
+    # one is reserved for small files (e.g. manifests), so they never wait
+    # behind large CVR files.
+    num_workers = os.environ.get("ARLO_BGCOMPUTE_NUM_WORKERS", None)
+    if num_workers:
+        return int(num_workers)
+    return 2
+
+
+BGCOMPUTE_NUM_WORKERS = read_bgcompute_num_workers()
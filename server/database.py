@@ -6,7 +6,10 @@ from .config import DATABASE_URL
 
 # Based on https://flask.palletsprojects.com/en/1.1.x/patterns/sqlalchemy/#declarative
 
-engine = create_engine(DATABASE_URL)
+# executemany_mode="values" makes bulk inserts (e.g. of sampled ballots) use
+# psycopg2's execute_values, which sends many rows per INSERT statement
+# instead of one statement per row.
+engine = create_engine(DATABASE_URL, executemany_mode="values")
 db_session = scoped_session(sessionmaker(autocommit=False, autoflush=True, bind=engine))
 
 meta = MetaData(
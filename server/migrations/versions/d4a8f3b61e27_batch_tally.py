@@ -0,0 +1,89 @@
+# pylint: disable=invalid-name
+"""BatchTally
+
+Revision ID: d4a8f3b61e27
+Revises: 9b1e4c7a2d35
+Create Date: 2026-10-17 07:41:09.637218+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d4a8f3b61e27"
+down_revision = "9b1e4c7a2d35"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "batch_tally",
+        sa.Column("batch_id", sa.String(length=200), nullable=False),
+        sa.Column("contest_choice_id", sa.String(length=200), nullable=False),
+        sa.Column("votes", sa.Integer(), nullable=False),
+        sa.Column("row_index", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["batch_id"],
+            ["batch.id"],
+            name=op.f("batch_tally_batch_id_fkey"),
+            ondelete="cascade",
+        ),
+        sa.ForeignKeyConstraint(
+            ["contest_choice_id"],
+            ["contest_choice.id"],
+            name=op.f("batch_tally_contest_choice_id_fkey"),
+            ondelete="cascade",
+        ),
+        sa.PrimaryKeyConstraint(
+            "batch_id", "contest_choice_id", name=op.f("batch_tally_pkey")
+        ),
+    )
+
+    # Copy over the existing batch tallies from the JSON blobs, which are of
+    # the form { batch_name: { contest_id: { choice_id: votes, "ballots": n }}}
+    # JSON (unlike JSONB) keeps the keys in the order they were written,
+    # which is the order of the rows in the batch tallies file.
+    op.execute(
+        """
+        INSERT INTO batch_tally (batch_id, contest_choice_id, votes, row_index)
+        SELECT
+            batch.id,
+            choice_tally.key,
+            choice_tally.value::integer,
+            batch_tally.ordinality - 1
+        FROM jurisdiction
+        JOIN LATERAL json_each(jurisdiction.batch_tallies) WITH ORDINALITY
+            AS batch_tally(key, value, ordinality) ON true
+        JOIN batch
+            ON batch.jurisdiction_id = jurisdiction.id
+            AND batch.name = batch_tally.key
+        JOIN LATERAL json_each(batch_tally.value)
+            AS contest_tally(key, value) ON true
+        JOIN LATERAL json_each_text(contest_tally.value)
+            AS choice_tally(key, value) ON true
+        JOIN contest_choice
+            ON contest_choice.id = choice_tally.key
+            AND contest_choice.contest_id = contest_tally.key
+        WHERE json_typeof(jurisdiction.batch_tallies) = 'object'
+        """
+    )
+
+    op.drop_column("jurisdiction", "batch_tallies")
+
+
+def downgrade():  # pragma: no cover
+    pass
+    # ### commands auto generated by Alembic - please adjust! ###
+    # op.add_column(
+    #     "jurisdiction",
+    #     sa.Column(
+    #         "batch_tallies",
+    #         postgresql.JSON(astext_type=sa.Text()),
+    #         autoincrement=False,
+    #         nullable=True,
+    #     ),
+    # )
+    # op.drop_table("batch_tally")
+    # ### end Alembic commands ###
@@ -0,0 +1,168 @@
+# pylint: disable=invalid-name
+"""JurisdictionRoundProgress
+
+Revision ID: e6c2d9a7f413
+Revises: d4a8f3b61e27
+Create Date: 2026-10-17 09:12:44.205178+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e6c2d9a7f413"
+down_revision = "d4a8f3b61e27"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "jurisdiction_round_progress",
+        sa.Column("round_id", sa.String(length=200), nullable=False),
+        sa.Column("jurisdiction_id", sa.String(length=200), nullable=False),
+        sa.Column("num_samples", sa.Integer(), nullable=False),
+        sa.Column("num_samples_audited", sa.Integer(), nullable=False),
+        sa.Column("num_unique", sa.Integer(), nullable=False),
+        sa.Column("num_unique_audited", sa.Integer(), nullable=False),
+        sa.Column("num_audit_boards", sa.Integer(), nullable=False),
+        sa.Column("num_audit_boards_not_signed_off", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["jurisdiction_id"],
+            ["jurisdiction.id"],
+            name=op.f("jurisdiction_round_progress_jurisdiction_id_fkey"),
+            ondelete="cascade",
+        ),
+        sa.ForeignKeyConstraint(
+            ["round_id"],
+            ["round.id"],
+            name=op.f("jurisdiction_round_progress_round_id_fkey"),
+            ondelete="cascade",
+        ),
+        sa.PrimaryKeyConstraint(
+            "round_id", "jurisdiction_id", name=op.f("jurisdiction_round_progress_pkey")
+        ),
+    )
+    op.add_column(
+        "audit_board", sa.Column("num_sampled_ballots", sa.Integer(), nullable=True)
+    )
+    op.add_column(
+        "audit_board", sa.Column("num_audited_ballots", sa.Integer(), nullable=True)
+    )
+
+    # Count the progress of existing rounds
+    op.execute(
+        """
+        UPDATE audit_board
+        SET num_sampled_ballots = (
+                SELECT count(*) FROM sampled_ballot
+                WHERE sampled_ballot.audit_board_id = audit_board.id
+            ),
+            num_audited_ballots = (
+                SELECT count(*) FROM sampled_ballot
+                WHERE sampled_ballot.audit_board_id = audit_board.id
+                AND sampled_ballot.status != 'NOT_AUDITED'
+            )
+        """
+    )
+    op.alter_column("audit_board", "num_sampled_ballots", nullable=False)
+    op.alter_column("audit_board", "num_audited_ballots", nullable=False)
+
+    op.execute(
+        """
+        INSERT INTO jurisdiction_round_progress (
+            round_id,
+            jurisdiction_id,
+            num_samples,
+            num_samples_audited,
+            num_unique,
+            num_unique_audited,
+            num_audit_boards,
+            num_audit_boards_not_signed_off,
+            created_at,
+            updated_at
+        )
+        SELECT
+            round.id,
+            jurisdiction.id,
+            COALESCE(ballot_counts.num_samples, batch_counts.num_samples, 0),
+            COALESCE(
+                ballot_counts.num_samples_audited, batch_counts.num_samples_audited, 0
+            ),
+            COALESCE(ballot_counts.num_unique, batch_counts.num_unique, 0),
+            COALESCE(
+                ballot_counts.num_unique_audited, batch_counts.num_unique_audited, 0
+            ),
+            COALESCE(audit_board_counts.num_audit_boards, 0),
+            COALESCE(audit_board_counts.num_audit_boards_not_signed_off, 0),
+            now(),
+            now()
+        FROM round
+        JOIN jurisdiction ON jurisdiction.election_id = round.election_id
+        LEFT JOIN (
+            SELECT
+                sampled_ballot_draw.round_id,
+                batch.jurisdiction_id,
+                count(*) AS num_samples,
+                count(*) FILTER (
+                    WHERE sampled_ballot.status != 'NOT_AUDITED'
+                ) AS num_samples_audited,
+                count(DISTINCT sampled_ballot.id) AS num_unique,
+                count(DISTINCT sampled_ballot.id) FILTER (
+                    WHERE sampled_ballot.status != 'NOT_AUDITED'
+                ) AS num_unique_audited
+            FROM sampled_ballot_draw
+            JOIN sampled_ballot ON sampled_ballot.id = sampled_ballot_draw.ballot_id
+            JOIN batch ON batch.id = sampled_ballot.batch_id
+            GROUP BY sampled_ballot_draw.round_id, batch.jurisdiction_id
+        ) ballot_counts
+            ON ballot_counts.round_id = round.id
+            AND ballot_counts.jurisdiction_id = jurisdiction.id
+        LEFT JOIN (
+            SELECT
+                sampled_batch_draw.round_id,
+                batch.jurisdiction_id,
+                count(*) AS num_samples,
+                count(*) FILTER (
+                    WHERE audited_batch.batch_id IS NOT NULL
+                ) AS num_samples_audited,
+                count(DISTINCT batch.id) AS num_unique,
+                count(DISTINCT batch.id) FILTER (
+                    WHERE audited_batch.batch_id IS NOT NULL
+                ) AS num_unique_audited
+            FROM sampled_batch_draw
+            JOIN batch ON batch.id = sampled_batch_draw.batch_id
+            LEFT JOIN (
+                SELECT DISTINCT batch_id FROM batch_result
+            ) audited_batch ON audited_batch.batch_id = batch.id
+            GROUP BY sampled_batch_draw.round_id, batch.jurisdiction_id
+        ) batch_counts
+            ON batch_counts.round_id = round.id
+            AND batch_counts.jurisdiction_id = jurisdiction.id
+        LEFT JOIN (
+            SELECT
+                round_id,
+                jurisdiction_id,
+                count(*) AS num_audit_boards,
+                count(*) FILTER (
+                    WHERE signed_off_at IS NULL AND num_sampled_ballots > 0
+                ) AS num_audit_boards_not_signed_off
+            FROM audit_board
+            GROUP BY round_id, jurisdiction_id
+        ) audit_board_counts
+            ON audit_board_counts.round_id = round.id
+            AND audit_board_counts.jurisdiction_id = jurisdiction.id
+        """
+    )
+
+
+def downgrade():  # pragma: no cover
+    pass
+    # ### commands auto generated by Alembic - please adjust! ###
+    # op.drop_column("audit_board", "num_audited_ballots")
+    # op.drop_column("audit_board", "num_sampled_ballots")
+    # op.drop_table("jurisdiction_round_progress")
+    # ### end Alembic commands ###
@@ -145,9 +145,8 @@ class Jurisdiction(BaseModel):
     manifest_num_batches = Column(Integer)
 
     # The batch tallies file (only used in batch comparison audits), tells us
-    # how many votes each contest choice got in a batch. We process it and
-    # store it as a JSON blob in batch_tallies to be able to easily pass it
-    # into the audit math for batch audits.
+    # how many votes each contest choice got in a batch. We load this file and
+    # create a BatchTally for each batch and contest choice.
     batch_tallies_file_id = Column(
         String(200), ForeignKey("file.id", ondelete="set null")
     )
@@ -157,7 +156,11 @@ class Jurisdiction(BaseModel):
         single_parent=True,
         cascade="all, delete-orphan",
     )
-    batch_tallies = Column(JSON)
+    # When we process the batch tallies file, we also compute the maximum
+    # possible error in each batch, which the batch audit math needs every
+    # time it draws a sample or measures risk. The max errors depend on the
+    # contest's reported vote totals, so we save those alongside them.
+    batch_max_errors = deferred(Column(JSON))
 
     # The CVR file (only used in ballot comparison audits), tells us all of the
     # recorded votes for each ballot in the election. We load this file and
@@ -392,6 +395,12 @@ class AuditBoard(BaseModel):
     passphrase = Column(String(1000), unique=True)
     signed_off_at = Column(DateTime)
 
+    # Counts of the ballots assigned to this audit board, set when the
+    # ballots are assigned and kept up to date as they are audited, so that
+    # we don't have to count sampled ballots to report progress.
+    num_sampled_ballots = Column(Integer, default=0, nullable=False)
+    num_audited_ballots = Column(Integer, default=0, nullable=False)
+
     sampled_ballots = relationship(
         "SampledBallot",
         back_populates="audit_board",
@@ -426,6 +435,33 @@ class Round(BaseModel):
     )
 
 
+# Progress counters for each jurisdiction in a round, which the audit admin's
+# dashboard polls throughout the audit. The totals are set when the sample is
+# drawn, and the other counters are updated in the same transaction as the
+# change they count (auditing a ballot, signing off, recording batch
+# results), so reading them doesn't require scanning the sample.
+# For batch comparison audits, samples are batch draws and unique samples
+# are batches; otherwise, samples are ballot draws and unique samples are
+# ballots.
+class JurisdictionRoundProgress(BaseModel):
+    round_id = Column(
+        String(200), ForeignKey("round.id", ondelete="cascade"), nullable=False
+    )
+    jurisdiction_id = Column(
+        String(200), ForeignKey("jurisdiction.id", ondelete="cascade"), nullable=False,
+    )
+
+    num_samples = Column(Integer, default=0, nullable=False)
+    num_samples_audited = Column(Integer, default=0, nullable=False)
+    num_unique = Column(Integer, default=0, nullable=False)
+    num_unique_audited = Column(Integer, default=0, nullable=False)
+    num_audit_boards = Column(Integer, default=0, nullable=False)
+    # Audit boards that were assigned ballots and haven't signed off yet
+    num_audit_boards_not_signed_off = Column(Integer, default=0, nullable=False)
+
+    __table_args__ = (PrimaryKeyConstraint("round_id", "jurisdiction_id"),)
+
+
 class BallotStatus(str, enum.Enum):
     NOT_AUDITED = "NOT_AUDITED"
     AUDITED = "AUDITED"
@@ -567,6 +603,16 @@ class RoundContest(BaseModel):
     is_complete = Column(Boolean)
     sample_size = Column(Integer)
 
+    # The sampler's state after drawing this round's sample for this contest
+    # (see audit_math.sampler.SamplerState), so that the next round can pick
+    # up where this one left off instead of redrawing every earlier ticket.
+    sampler_state = deferred(Column(JSON))
+
+    # For BRAVO audits, the cumulative sample and test statistics at the end
+    # of this round for this contest (see audit_math.bravo.BravoState), so
+    # that the next round only has to fold in its own results.
+    bravo_state = deferred(Column(JSON))
+
 
 class RoundContestResult(BaseModel):
     round_id = Column(
@@ -692,6 +738,29 @@ class BatchResult(BaseModel):
     __table_args__ = (PrimaryKeyConstraint("batch_id", "contest_choice_id"),)
 
 
+# Only used in batch comparison audits, a BatchTally stores the reported vote
+# count for one batch for one contest choice, from the batch tallies file
+# uploaded by a jurisdiction. Like CvrBallot, there can be a lot of these, so
+# we load them using COPY.
+class BatchTally(Base):
+    batch_id = Column(
+        String(200), ForeignKey("batch.id", ondelete="cascade"), nullable=False,
+    )
+    contest_choice_id = Column(
+        String(200),
+        ForeignKey("contest_choice.id", ondelete="cascade"),
+        nullable=False,
+    )
+
+    votes = Column(Integer, nullable=False)
+    # The position of the batch's row in the batch tallies file. We draw the
+    # sample from the batches in this order, so it has to be preserved for
+    # the sample to be reproducible.
+    row_index = Column(Integer, nullable=False)
+
+    __table_args__ = (PrimaryKeyConstraint("batch_id", "contest_choice_id"),)
+
+
 # Only used in ballot comparison audits, a CvrBallot stores one row from the
 # cast-vote record (CVR) uploaded by a jurisdiction. We compare this record to
 # the audit board's interpretation of the ballot.
@@ -702,10 +771,12 @@ class CvrBallot(Base):
     batch = relationship("Batch")
     ballot_position = Column(Integer, nullable=False)
     imprinted_id = Column(String(200), nullable=False)
-    # We store the raw string of 0s and 1s from the CVR row to make insertion
-    # fast. We parse them when needed by the audit math using the contest
-    # headers saved in Juridsiction.cvr_contests_metadata.
-    interpretations = Column(Text, nullable=False)
+    # We store the interpretation columns from the CVR row (0s and 1s, or -1
+    # for blank cells, i.e. the contest wasn't on the ballot) as an array, so
+    # that the audit math can pick out just the columns for a contest in the
+    # db, using the column indexes saved in
+    # Jurisdiction.cvr_contests_metadata.
+    interpretations = Column(ARRAY(SmallInteger, zero_indexes=True), nullable=False)
 
     __table_args__ = (PrimaryKeyConstraint("batch_id", "ballot_position"),)
 
@@ -713,7 +784,9 @@ class CvrBallot(Base):
 class File(BaseModel):
     id = Column(String(200), primary_key=True)
     name = Column(String(250), nullable=False)
-    contents = deferred(Column(Text, nullable=False))
+    # Large files (i.e. CVRs) are stored as FileChunks instead, in which case
+    # contents is null.
+    contents = deferred(Column(Text))
     uploaded_at = Column(DateTime, nullable=False)
 
     # Metadata for processing files in the background.
@@ -722,6 +795,18 @@ class File(BaseModel):
     processing_error = Column(Text)
 
 
+# Stores the contents of a large file in pieces, so that we can stream it in
+# and out of the db without ever holding the whole file in memory.
+class FileChunk(BaseModel):
+    file_id = Column(
+        String(200), ForeignKey("file.id", ondelete="cascade"), nullable=False
+    )
+    chunk_index = Column(Integer, nullable=False)
+    contents = Column(Text, nullable=False)
+
+    __table_args__ = (PrimaryKeyConstraint("file_id", "chunk_index"),)
+
+
 class ProcessingStatus(str, enum.Enum):
     READY_TO_PROCESS = "READY_TO_PROCESS"
     PROCESSING = "PROCESSING"
@@ -97,3 +97,10 @@ def sampler(
     output: Literal["id", "tuple", "ticket"] = ...,
     digits: int = ...,
 ) -> Union[Iterable[Id], Iterable[Tuple[str, str, int]], Iterable[Ticket]]: ...
+
+# Lower-level building blocks of `sampler`, used to generate the same tickets
+# without materializing the full list of ids.
+def sha256_hex(hash_input: Any) -> str: ...
+def first_fraction(id: Any, seed: Any, seed_hash: str = ...) -> str: ...
+def next_ticket(ticket: Ticket[Id]) -> Ticket[Id]: ...
+def trim(x: str, mantissa_display_length: int = ...) -> str: ...
@@ -3,11 +3,14 @@ from typing import List, Tuple
 from datetime import datetime
 from collections import defaultdict
 from flask.testing import FlaskClient
+from sqlalchemy.orm import sessionmaker
 
 from ..helpers import *  # pylint: disable=wildcard-import
 from ...models import *  # pylint: disable=wildcard-import
 from ...auth import UserType
+from ...api.audit_boards import record_sign_off
 from ...api.rounds import count_audited_votes
+from ...database import engine as db_engine
 from ...util.jsonschema import JSONDict
 
 
@@ -843,6 +846,26 @@ def test_count_audited_votes(
     )
 
 
+def test_audit_boards_sign_off_concurrently(
+    jurisdiction_ids: List[str], round_1_id: str, audit_board_round_1_ids: List[str],
+):
+    # Load the audit board in a separate session before it signs off, as a
+    # concurrent sign-off request would
+    other_session = sessionmaker(bind=db_engine)()
+    stale_audit_board = other_session.query(AuditBoard).get(audit_board_round_1_ids[0])
+    assert stale_audit_board.signed_off_at is None
+
+    record_sign_off(AuditBoard.query.get(audit_board_round_1_ids[0]))
+    db_session.commit()
+    record_sign_off(stale_audit_board)
+    db_session.commit()
+    other_session.close()
+
+    # The audit board should only be counted as signed off once
+    progress = JurisdictionRoundProgress.query.get((round_1_id, jurisdiction_ids[0]))
+    assert progress.num_audit_boards_not_signed_off == 1
+
+
 def test_audit_boards_sign_off_missing_name(
     client: FlaskClient,
     election_id: str,
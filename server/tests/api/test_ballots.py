@@ -619,6 +619,59 @@ def test_ab_audit_ballot_wrong_audit_board(
     assert rv.status_code == 404
 
 
+def test_ab_audit_ballot_progress(
+    client: FlaskClient,
+    election_id: str,
+    jurisdiction_ids: List[str],
+    round_1_id: str,
+    audit_board_round_1_ids: List[str],
+):
+    def progress():
+        set_logged_in_user(client, UserType.AUDIT_ADMIN, DEFAULT_AA_EMAIL)
+        rv = client.get(f"/api/election/{election_id}/jurisdiction")
+        round_status = json.loads(rv.data)["jurisdictions"][0]["currentRoundStatus"]
+        set_logged_in_user(client, UserType.JURISDICTION_ADMIN, DEFAULT_JA_EMAIL)
+        rv = client.get(
+            f"/api/election/{election_id}/jurisdiction/{jurisdiction_ids[0]}/round/{round_1_id}/audit-board"
+        )
+        audit_board_status = json.loads(rv.data)["auditBoards"][0]["currentRoundStatus"]
+        return (
+            round_status["numSamplesAudited"],
+            round_status["numUniqueAudited"],
+            audit_board_status["numAuditedBallots"],
+        )
+
+    def set_status(ballot_id: str, status: str):
+        set_logged_in_user(client, UserType.AUDIT_BOARD, audit_board_round_1_ids[0])
+        rv = put_json(
+            client,
+            f"/api/election/{election_id}/jurisdiction/{jurisdiction_ids[0]}/round/{round_1_id}/audit-board/{audit_board_round_1_ids[0]}/ballots/{ballot_id}",
+            {"status": status, "interpretations": []},
+        )
+        assert_ok(rv)
+
+    # Pick a ballot that was drawn more than once, so we can check that each
+    # draw counts as an audited sample
+    ballot_id, num_draws = list(
+        SampledBallot.query.filter_by(audit_board_id=audit_board_round_1_ids[0])
+        .join(SampledBallotDraw)
+        .group_by(SampledBallot.id)
+        .having(func.count() > 1)
+        .values(SampledBallot.id, func.count())
+    )[0]
+    assert progress() == (0, 0, 0)
+
+    set_status(ballot_id, "NOT_FOUND")
+    assert progress() == (num_draws, 1, 1)
+
+    # Changing the status of an audited ballot shouldn't count it again
+    set_status(ballot_id, "NOT_FOUND")
+    assert progress() == (num_draws, 1, 1)
+
+    set_status(ballot_id, "NOT_AUDITED")
+    assert progress() == (0, 0, 0)
+
+
 def test_ab_audit_ballot_invalid(
     client: FlaskClient,
     election_id: str,
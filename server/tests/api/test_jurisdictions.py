@@ -1,5 +1,4 @@
 import json, io
-from datetime import datetime
 from typing import List
 from flask.testing import FlaskClient
 
@@ -8,6 +7,7 @@ from ...auth import UserType
 from ...database import db_session
 from ...models import *  # pylint: disable=wildcard-import
 from ...bgcompute import bgcompute_update_ballot_manifest_file
+from ...api.audit_boards import record_sign_off
 
 AB1_SAMPLES = 23  # Arbitrary num of ballots to assign to audit board 1
 
@@ -240,8 +240,9 @@ def test_jurisdictions_status_round_1_with_audit_boards(
     # Simulate one audit board auditing all its ballots and signing off
     audit_board_1 = AuditBoard.query.get(audit_board_round_1_ids[0])
     for ballot in audit_board_1.sampled_ballots:
+        count_audited_ballot(ballot, 1)
         ballot.status = BallotStatus.AUDITED
-    audit_board_1.signed_off_at = datetime.utcnow()
+    record_sign_off(audit_board_1)
     db_session.commit()
 
     rv = client.get(f"/api/election/{election_id}/jurisdiction")
@@ -252,8 +253,9 @@ def test_jurisdictions_status_round_1_with_audit_boards(
     # Simulate the other audit board auditing all its ballots and signing off
     audit_board_2 = AuditBoard.query.get(audit_board_round_1_ids[1])
     for ballot in audit_board_2.sampled_ballots:
+        count_audited_ballot(ballot, 1)
         ballot.status = BallotStatus.AUDITED
-    audit_board_2.signed_off_at = datetime.utcnow()
+    record_sign_off(audit_board_2)
     db_session.commit()
 
     rv = client.get(f"/api/election/{election_id}/jurisdiction")
@@ -263,29 +265,62 @@ def test_jurisdictions_status_round_1_with_audit_boards(
 
 
 def test_jurisdictions_status_round_1_with_audit_boards_without_ballots(
-    client: FlaskClient, election_id: str, audit_board_round_1_ids: List[str],
+    client: FlaskClient,
+    election_id: str,
+    jurisdiction_ids: List[str],
+    contest_ids: List[str],
+    round_1_id: str,
 ):
-    # Unassign all ballots for one audit board. This audit board shouldn't
-    # factor into the jurisdiction's status
-    SampledBallot.query.filter_by(audit_board_id=audit_board_round_1_ids[0]).delete()
-    db_session.commit()
+    # J1's manifest only has four batches, so with five audit boards at least
+    # one won't be assigned any ballots. Audit boards without ballots shouldn't
+    # factor into the jurisdiction's status.
+    set_logged_in_user(client, UserType.JURISDICTION_ADMIN, DEFAULT_JA_EMAIL)
+    rv = post_json(
+        client,
+        f"/api/election/{election_id}/jurisdiction/{jurisdiction_ids[0]}/round/{round_1_id}/audit-board",
+        [{"name": f"Audit Board #{i}"} for i in range(1, 6)],
+    )
+    assert_ok(rv)
+    audit_boards = AuditBoard.query.filter_by(
+        jurisdiction_id=jurisdiction_ids[0], round_id=round_1_id
+    ).all()
+    audit_board_with_ballots_ids = [ab.id for ab in audit_boards if ab.sampled_ballots]
+    assert len(audit_board_with_ballots_ids) < len(audit_boards)
 
     set_logged_in_user(client, UserType.AUDIT_ADMIN, DEFAULT_AA_EMAIL)
     rv = client.get(f"/api/election/{election_id}/jurisdiction")
     jurisdictions = json.loads(rv.data)["jurisdictions"]
     assert jurisdictions[0]["currentRoundStatus"]["status"] == "IN_PROGRESS"
 
-    # Simulate the other audit board auditing all its ballots and signing off
-    audit_board_2 = AuditBoard.query.get(audit_board_round_1_ids[1])
-    for ballot in audit_board_2.sampled_ballots:
-        ballot.status = BallotStatus.AUDITED
-    audit_board_2.signed_off_at = datetime.utcnow()
-    db_session.commit()
+    # Audit all the ballots and sign off each audit board that has ballots
+    for audit_board_id in audit_board_with_ballots_ids:
+        contest = Contest.query.get(contest_ids[0])
+        for ballot in AuditBoard.query.get(audit_board_id).sampled_ballots:
+            audit_ballot(ballot, contest.id, Interpretation.VOTE, [contest.choices[0]])
+        db_session.commit()
+
+        set_logged_in_user(client, UserType.AUDIT_BOARD, audit_board_id)
+        audit_board_url = f"/api/election/{election_id}/jurisdiction/{jurisdiction_ids[0]}/round/{round_1_id}/audit-board/{audit_board_id}"
+        rv = put_json(
+            client,
+            f"{audit_board_url}/members",
+            [{"name": "Joe Schmo", "affiliation": None}],
+        )
+        assert_ok(rv)
+        rv = post_json(
+            client,
+            f"{audit_board_url}/sign-off",
+            {"memberName1": "Joe Schmo", "memberName2": ""},
+        )
+        assert_ok(rv)
 
+    set_logged_in_user(client, UserType.AUDIT_ADMIN, DEFAULT_AA_EMAIL)
     rv = client.get(f"/api/election/{election_id}/jurisdiction")
     jurisdictions = json.loads(rv.data)["jurisdictions"]
     assert jurisdictions[0]["currentRoundStatus"]["status"] == "COMPLETE"
 
+    assert_round_progress_matches(round_1_id)
+
 
 def test_jurisdictions_round_status_offline(
     client: FlaskClient,
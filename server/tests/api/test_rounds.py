@@ -1,9 +1,12 @@
 from typing import List
 import json
 from flask.testing import FlaskClient
+import pytest
 
 from ...models import *  # pylint: disable=wildcard-import
 from ...auth import UserType
+from ...api import rounds
+from ...audit_math import bravo, sampler_contest
 from ..helpers import *  # pylint: disable=wildcard-import
 
 
@@ -140,6 +143,55 @@ def test_rounds_create_two(
     assert sorted(sampled_jurisdictions) == sorted(jurisdiction_ids[:2])
 
 
+def test_rounds_saves_bravo_state(
+    client: FlaskClient, election_id: str, contest_ids: List[str], round_1_id: str,
+):
+    run_audit_round(round_1_id, contest_ids[0], contest_ids, 0.5)
+    rv = post_json(client, f"/api/election/{election_id}/round", {"roundNum": 2},)
+    assert_ok(rv)
+    round_2 = Round.query.filter_by(election_id=election_id, round_num=2).one()
+    run_audit_round(round_2.id, contest_ids[0], contest_ids, 0.55)
+
+    # The state saved at the end of each round should match the state computed
+    # from all of the rounds' results so far
+    contest = Contest.query.get(contest_ids[0])
+    sampler_contest_ = sampler_contest.from_db_contest(contest)
+    round_contest_1 = RoundContest.query.get((round_1_id, contest.id))
+    round_contest_2 = RoundContest.query.get((round_2.id, contest.id))
+    results_by_round = rounds.contest_results_by_round(contest)
+    expected_state = bravo.update_state(sampler_contest_, None, results_by_round)
+    saved_state = bravo.BravoState.from_json(round_contest_2.bravo_state)
+    assert saved_state.sample_results == expected_state.sample_results
+    assert saved_state.log_test_statistics == pytest.approx(
+        expected_state.log_test_statistics
+    )
+    assert round_contest_1.bravo_state != round_contest_2.bravo_state
+
+    p_values, _ = bravo.compute_risk(10, sampler_contest_, results_by_round)
+    assert round_contest_2.end_p_value == pytest.approx(max(p_values.values()))
+
+
+def test_rounds_saves_bravo_state_with_vote_for_loser_without_votes(
+    contest_ids: List[str], round_1_id: str,
+):
+    # If a loser with no reported votes gets votes in the sample, log(T*) for
+    # that pair is -inf, which still needs to be saved.
+    contest = Contest.query.get(contest_ids[0])
+    winner, loser = contest.choices[0], contest.choices[1]
+    loser.num_votes = 0
+    db_session.commit()
+
+    run_audit_round(round_1_id, contest.id, contest_ids, 0.5)
+
+    round_1 = Round.query.get(round_1_id)
+    assert round_1.ended_at is not None
+    round_contest = RoundContest.query.get((round_1_id, contest.id))
+    saved_state = bravo.BravoState.from_json(round_contest.bravo_state)
+    assert saved_state.log_test_statistics[(winner.id, loser.id)] == float("-inf")
+    assert round_contest.end_p_value == float("inf")
+    assert not round_contest.is_complete
+
+
 def test_rounds_complete_audit(
     client: FlaskClient, election_id: str, contest_ids: List[str], round_1_id: str,
 ):
@@ -3,6 +3,8 @@ from typing import List
 from flask.testing import FlaskClient
 
 from ...models import *  # pylint: disable=wildcard-import
+from ...api import sample_sizes as sample_sizes_module
+from ..helpers import *  # pylint: disable=wildcard-import
 
 
 def test_sample_sizes_without_contests(client: FlaskClient, election_id: str):
@@ -50,6 +52,53 @@ def test_sample_sizes_round_1(
     )
 
 
+def test_sample_sizes_cached(
+    client: FlaskClient,
+    election_id: str,
+    contest_ids: List[str],  # pylint: disable=unused-argument
+    election_settings,  # pylint: disable=unused-argument
+    monkeypatch,
+):
+    num_computations = 0
+    compute_sample_size_options = sample_sizes_module.sample_size_options
+
+    def counting_sample_size_options(*args, **kwargs):
+        nonlocal num_computations
+        num_computations += 1
+        return compute_sample_size_options(*args, **kwargs)
+
+    monkeypatch.setattr(
+        sample_sizes_module, "sample_size_options", counting_sample_size_options
+    )
+
+    rv = client.get(f"/api/election/{election_id}/sample-sizes")
+    sample_sizes = json.loads(rv.data)["sampleSizes"]
+    assert num_computations == 1
+
+    # If nothing changed, we should use the cached sample sizes
+    rv = client.get(f"/api/election/{election_id}/sample-sizes")
+    assert json.loads(rv.data)["sampleSizes"] == sample_sizes
+    assert num_computations == 1
+
+    # If an input changes, we should recompute
+    rv = put_json(
+        client,
+        f"/api/election/{election_id}/settings",
+        {
+            "electionName": "Test Election",
+            "online": True,
+            "randomSeed": "1234567890",
+            "riskLimit": 20,
+            "state": USState.California,
+        },
+    )
+    assert_ok(rv)
+
+    rv = client.get(f"/api/election/{election_id}/sample-sizes")
+    assert json.loads(rv.data)["sampleSizes"] != sample_sizes
+    assert num_computations == 2
+
+
 def test_sample_sizes_round_2(
     client: FlaskClient,
     election_id: str,
@@ -85,6 +85,19 @@ snapshots["test_draw_sample 1"] = [
     ("0.138772253094235762", ("pct 4", 20), 1),
 ]
 
+snapshots["test_draw_weighted_macro_sample 1"] = [
+    ("0.726350830", "pct 12", 1),
+    ("0.618713252", "pct 8", 1),
+    ("0.581502362", "pct 8", 2),
+    ("0.185025820", "pct 2", 1),
+    ("0.9686818452", "pct 19", 1),
+    ("0.436046764", "pct 6", 1),
+    ("0.261214707", "pct 3", 1),
+    ("0.819534652", "pct 14", 1),
+    ("0.104472733", "pct 1", 1),
+    ("0.224214015", "pct 3", 2),
+]
+
 snapshots["test_macro_recount_sample 1"] = []
 
 snapshots["test_macro_recount_sample 2"] = []
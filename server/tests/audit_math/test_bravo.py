@@ -1,6 +1,8 @@
 # pylint: disable=invalid-name
 from decimal import Decimal
+import json
 import math
+import random
 import pytest
 
 from ...audit_math import bravo
@@ -404,6 +406,91 @@ def test_tied_contest():
     assert res
 
 
+def test_compute_risk_log_space_matches_exact(contests):
+    # The fast (log space) and exact (Decimal) risk computations should agree
+    # on the test contests, as well as on a bunch of random contests and
+    # samples, including large samples
+    cases = [
+        (contest, round1_sample_results[contest.name]) for contest in contests.values()
+    ]
+
+    rand = random.Random(12345)
+    for i in range(200):
+        num_candidates = rand.randint(2, 6)
+        num_winners = rand.randint(1, num_candidates - 1)
+        votes = {f"cand{c}": rand.randint(1, 1_000_000) for c in range(num_candidates)}
+        ballots = sum(votes.values()) + rand.randint(0, 100_000)
+        contest = Contest(
+            f"random{i}",
+            {**votes, "ballots": ballots, "numWinners": num_winners, "votesAllowed": 1},
+        )
+        # Sample roughly in proportion to the reported results, with some noise
+        sample_size = rand.choice([10, 100, 1000, 10_000, 50_000])
+        sample = {
+            "round1": {
+                cand: max(
+                    0,
+                    round(sample_size * cand_votes / ballots * rand.uniform(0.7, 1.3)),
+                )
+                for cand, cand_votes in votes.items()
+            }
+        }
+        cases.append((contest, sample))
+
+    for contest, sample in cases:
+        risks, finished = bravo.compute_risk(RISK_LIMIT, contest, sample)
+        exact_risks, exact_finished = bravo.compute_risk(
+            RISK_LIMIT, contest, sample, exact=True
+        )
+        assert finished == exact_finished, contest
+        assert risks.keys() == exact_risks.keys()
+        for pair, risk in risks.items():
+            assert risk == pytest.approx(exact_risks[pair], rel=1e-9), (contest, pair)
+
+
+def test_compute_risk_from_saved_state(contests):
+    # Folding each round into a saved state should give the same results as
+    # computing them from every round's results
+    contest = contests["test2"]
+    rounds = [
+        {"cand1": 10, "cand2": 8, "cand3": 2},
+        {"cand1": 15, "cand2": 12, "cand3": 3},
+        {"cand1": 60, "cand2": 20, "cand3": 5},
+    ]
+
+    state = None
+    for round_num, round_results in enumerate(rounds, start=1):
+        sample_results = {f"round{r}": rounds[r - 1] for r in range(1, round_num + 1)}
+        new_results = {f"round{round_num}": round_results}
+
+        risks, finished = bravo.compute_risk(
+            RISK_LIMIT, contest, new_results, state=state
+        )
+        expected_risks, expected_finished = bravo.compute_risk(
+            RISK_LIMIT, contest, sample_results
+        )
+        assert finished == expected_finished
+        assert risks == pytest.approx(expected_risks)
+
+        assert bravo.get_sample_size(
+            RISK_LIMIT, contest, new_results, state=state
+        ) == bravo.get_sample_size(RISK_LIMIT, contest, sample_results)
+
+        # Save the state as JSON, like we do at the end of each round
+        state = bravo.BravoState.from_json(
+            json.loads(
+                json.dumps(bravo.update_state(contest, state, new_results).to_json())
+            )
+        )
+        assert state.sample_results == bravo.compute_cumulative_sample(sample_results)
+
+    assert finished
+    # Computing the sample size from the saved state alone
+    assert bravo.get_sample_size(
+        RISK_LIMIT, contest, {}, state=state
+    ) == bravo.get_sample_size(RISK_LIMIT, contest, sample_results)
+
+
 bravo_contests = {
     "test1": {
         "cand1": 600,
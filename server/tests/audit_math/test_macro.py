@@ -243,6 +243,34 @@ def test_compute_risk(contests, batches):
         assert result, "Audit did not terminate but should have"
 
 
+def test_precomputed_max_errors(contests, batches):
+    sample = {
+        "Batch {}".format(i): {
+            "Contest A": {"winner": 190, "loser": 190,},
+            "Contest B": {"winner": 200, "loser": 160,},
+            "Contest C": {"winner": 200, "loser": 140,},
+        }
+        for i in range(10)
+    }
+
+    for contest in contests:
+        max_errors = macro.compute_max_errors(batches, contests[contest])
+        assert max_errors == {
+            batch: macro.compute_max_error(batches[batch], contests[contest])
+            for batch in batches
+        }
+
+        assert macro.compute_U(
+            batches, sample, contests[contest], max_errors
+        ) == macro.compute_U(batches, sample, contests[contest])
+        assert macro.get_sample_sizes(
+            RISK_LIMIT, contests[contest], batches, sample, max_errors
+        ) == macro.get_sample_sizes(RISK_LIMIT, contests[contest], batches, sample)
+        assert macro.compute_risk(
+            RISK_LIMIT, contests[contest], batches, sample, max_errors
+        ) == macro.compute_risk(RISK_LIMIT, contests[contest], batches, sample)
+
+
 def test_tied_contest():
 
     contest_data = {
@@ -1,9 +1,14 @@
 # pylint: disable=invalid-name
 from decimal import Decimal
+import itertools
+from typing import List
+import numpy as np
 import pytest
+from scipy import stats
 
-from ...audit_math import minerva
+from ...audit_math import minerva, simulator
 from ...audit_math.sampler_contest import Contest
+from ...models import AuditMathType
 
 SEED = "12345678901234567890abcdefghijklmnopqrstuvwxyz😊"
 RISK_LIMIT = 10
@@ -20,23 +25,205 @@ def contests():
     return contests
 
 
-def test_unused_sample_size(contests):
-    for contest in contests:
-        pytest.raises(
-            Exception,
-            minerva.get_sample_size,
-            RISK_LIMIT,
-            contests[contest],
-            None,
-            {0: 0},
+def minerva_risk_reference(
+    alpha: float, p: float, round_sizes: List[int], winner_votes: List[int]
+) -> float:
+    # A straightforward implementation of the Minerva risk for one (winner,
+    # loser) pair, using direct convolution, to check the FFT-based one
+    # against. Assumes the audit didn't stop before the last round.
+    null_pmf, alt_pmf = np.array([1.0]), np.array([1.0])
+    for round_num, round_size in enumerate(round_sizes):
+        votes = np.arange(round_size + 1)
+        null_pmf = np.convolve(null_pmf, stats.binom.pmf(votes, round_size, 0.5))
+        alt_pmf = np.convolve(alt_pmf, stats.binom.pmf(votes, round_size, p))
+        null_tail = np.array([null_pmf[k:].sum() for k in range(len(null_pmf))])
+        alt_tail = np.array([alt_pmf[k:].sum() for k in range(len(alt_pmf))])
+        if round_num == len(round_sizes) - 1:
+            k = winner_votes[-1]
+            return null_tail[k] / alt_tail[k]
+        for k in range(len(null_pmf)):
+            if alpha * alt_tail[k] >= null_tail[k]:
+                null_pmf[k:] = 0
+                alt_pmf[k:] = 0
+                break
+    raise Exception("No rounds")  # pragma: no cover
+
+
+def test_compute_risk_one_round(contests):
+    # With one round, the risk is the ratio of the binomial tails
+    for contest_name in ["test1", "test2", "test6", "test7", "test8", "test10"]:
+        contest = contests[contest_name]
+        sample = round1_sample_results[contest_name]["round1"]
+        risks, finished = minerva.compute_risk(
+            RISK_LIMIT, contest, round1_sample_results[contest_name], {1: 100}
         )
+        for (winner, loser), risk in risks.items():
+            n = sample[winner] + sample[loser]
+            p = contest.margins["winners"][winner]["swl"][loser]
+            expected = stats.binom.sf(sample[winner] - 1, n, 0.5) / stats.binom.sf(
+                sample[winner] - 1, n, p
+            )
+            assert risk == pytest.approx(expected)
+        assert finished == all(risk <= ALPHA for risk in risks.values())
 
+    risks, finished = minerva.compute_risk(
+        RISK_LIMIT, contests["test1"], round1_sample_results["test1"], {1: 119}
+    )
+    assert risks == {("cand1", "cand2"): pytest.approx(0.02765354)}
+    assert finished
 
-def test_unused_compute_risk(contests):
-    for contest in contests:
-        pytest.raises(
-            Exception, minerva.compute_risk, RISK_LIMIT, contests[contest], {}, {0: 0}
+
+def test_compute_risk_multiple_rounds(contests):
+    contest = contests["test2"]
+    sample_results = {
+        "round1": {"cand1": 25, "cand2": 18, "cand3": 5},
+        "round2": {"cand1": 30, "cand2": 20, "cand3": 6},
+        "round3": {"cand1": 40, "cand2": 31, "cand3": 9},
+    }
+    for num_rounds in [2, 3]:
+        rounds = dict(list(sample_results.items())[:num_rounds])
+        risks, finished = minerva.compute_risk(
+            RISK_LIMIT, contest, rounds, {n: 100 for n in range(1, num_rounds + 1)}
+        )
+        round_sizes = [
+            results["cand1"] + results["cand2"] for results in rounds.values()
+        ]
+        winner_votes = list(
+            itertools.accumulate(results["cand1"] for results in rounds.values())
         )
+        expected = minerva_risk_reference(
+            float(ALPHA),
+            contest.margins["winners"]["cand1"]["swl"]["cand2"],
+            round_sizes,
+            winner_votes,
+        )
+        assert risks[("cand1", "cand2")] == pytest.approx(expected)
+        assert not finished
+
+    # If the audit would have stopped in an earlier round, we use the risk
+    # from that round
+    risks, finished = minerva.compute_risk(
+        RISK_LIMIT,
+        contests["test1"],
+        {**round1_sample_results["test1"], "round2": {"cand1": 0, "cand2": 50}},
+        {1: 119, 2: 50},
+    )
+    assert risks == {("cand1", "cand2"): pytest.approx(0.02765354)}
+    assert finished
+
+
+def test_compute_risk_uses_cached_rounds(contests):
+    minerva.minerva_round.cache_clear()
+    contest = contests["test1"]
+    round1 = {"round1": {"cand1": 30, "cand2": 25}}
+    minerva.compute_risk(RISK_LIMIT, contest, round1, {1: 55})
+    assert minerva.minerva_round.cache_info().misses == 1
+
+    # Computing the sample size for the next round reuses the first round
+    minerva.get_sample_size(RISK_LIMIT, contest, round1, {1: 55})
+    assert minerva.minerva_round.cache_info().misses == 1
+
+    # Adding a round only computes the new round
+    minerva.compute_risk(
+        RISK_LIMIT,
+        contest,
+        {**round1, "round2": {"cand1": 70, "cand2": 50}},
+        {1: 55, 2: 120},
+    )
+    assert minerva.minerva_round.cache_info().misses == 2
+
+
+def test_compute_risk_edge_cases(contests):
+    # Full hand count
+    risks, finished = minerva.compute_risk(
+        RISK_LIMIT, contests["test5"], round1_sample_results["test5"], {1: 1000}
+    )
+    assert risks == {("cand1", "cand2"): 0.0}
+    assert finished
+
+    # No losers
+    risks, finished = minerva.compute_risk(
+        RISK_LIMIT, contests["test9"], round1_sample_results["test9"], {1: 2}
+    )
+    assert risks == {("cand1", ""): 0.0, ("cand2", ""): 0.0}
+    assert finished
+
+    # Nothing sampled for the pair yet
+    risks, finished = minerva.compute_risk(
+        RISK_LIMIT, contests["test11"], round1_sample_results["test11"], {1: 0}
+    )
+    assert risks == {("cand1", "cand2"): 1.0}
+    assert not finished
+
+    # Tie
+    risks, finished = minerva.compute_risk(
+        RISK_LIMIT,
+        Contest(
+            "tie",
+            {
+                "cand1": 500,
+                "cand2": 500,
+                "ballots": 2000,
+                "numWinners": 1,
+                "votesAllowed": 1,
+            },
+        ),
+        {"round1": {"cand1": 100, "cand2": 0}},
+        {1: 100},
+    )
+    assert risks == {("cand1", "cand2"): 1.0}
+    assert not finished
+
+
+def test_get_sample_size(contests):
+    for contest_name, expected in true_sample_sizes.items():
+        computed = minerva.get_sample_size(RISK_LIMIT, contests[contest_name], None, {})
+        assert computed == expected, contest_name
+
+
+def test_get_sample_size_second_round(contests):
+    computed = minerva.get_sample_size(
+        RISK_LIMIT, contests["test2"], round1_sample_results["test2"], {1: 48}
+    )
+    assert computed == {
+        "0.7": {"type": None, "size": 41, "prob": 0.7},
+        "0.8": {"type": None, "size": 45, "prob": 0.8},
+        "0.9": {"type": None, "size": 57, "prob": 0.9},
+    }
+
+
+def test_get_sample_size_stopping_probability(contests):
+    # Simulate audits of each sample size to check that they stop with the
+    # expected probability
+    contest = contests["test_small_third_candidate"]
+    sample_sizes = minerva.get_sample_size(RISK_LIMIT, contest, None, {})
+    stopping_probabilities = simulator.ballot_polling_stopping_probabilities(
+        RISK_LIMIT,
+        contest,
+        [option["size"] for option in sample_sizes.values()],
+        math_type=AuditMathType.MINERVA,
+        num_trials=1000,
+    )
+    for option in sample_sizes.values():
+        assert stopping_probabilities[option["size"]] == pytest.approx(
+            option["prob"], abs=0.04
+        )
+
+
+def test_get_sample_size_large_election():
+    contest = Contest(
+        "large",
+        {
+            "cand1": 502_000,
+            "cand2": 498_000,
+            "ballots": 1_000_000,
+            "numWinners": 1,
+            "votesAllowed": 1,
+        },
+    )
+    assert minerva.get_sample_size(RISK_LIMIT, contest, None, {}) == {
+        "all-ballots": {"type": "all-ballots", "size": 1_000_000, "prob": None}
+    }
 
 
 bravo_contests = {
@@ -165,46 +352,39 @@ round1_sample_results = {
 
 true_sample_sizes = {
     "test1": {
-        "asn": {"type": "ASN", "size": 119, "prob": 0.52},
-        "0.7": {"type": None, "size": 184, "prob": 0.7},
-        "0.8": {"type": None, "size": 244, "prob": 0.8},
-        "0.9": {"type": None, "size": 351, "prob": 0.9},
+        "0.7": {"type": None, "size": 102, "prob": 0.7},
+        "0.8": {"type": None, "size": 133, "prob": 0.8},
+        "0.9": {"type": None, "size": 179, "prob": 0.9},
     },
     "test2": {
-        "asn": {"type": "ASN", "size": 22, "prob": 0.55},
-        "0.7": {"type": None, "size": 32, "prob": 0.7},
-        "0.8": {"type": None, "size": 41, "prob": 0.8},
-        "0.9": {"type": None, "size": 57, "prob": 0.9},
+        "0.7": {"type": None, "size": 20, "prob": 0.7},
+        "0.8": {"type": None, "size": 25, "prob": 0.8},
+        "0.9": {"type": None, "size": 30, "prob": 0.9},
     },
-    "test3": {"asn": {"type": "ASN", "size": 1, "prob": 1.0},},
-    "test4": {"asn": {"type": "ASN", "size": 1, "prob": 1.0},},
+    "test3": {"asn": {"type": "ASN", "size": 1, "prob": 1.0}},
     "test5": {
-        "asn": {"type": "ASN", "size": 1000, "prob": 1},
         "0.7": {"type": None, "size": 1000, "prob": 0.7},
         "0.8": {"type": None, "size": 1000, "prob": 0.8},
         "0.9": {"type": None, "size": 1000, "prob": 0.9},
     },
     "test6": {
-        "asn": {"type": "ASN", "size": 238, "prob": 0.52},
-        "0.7": {"type": None, "size": 368, "prob": 0.7},
-        "0.8": {"type": None, "size": 488, "prob": 0.8},
-        "0.9": {"type": None, "size": 702, "prob": 0.9},
-    },
-    "test7": {"asn": {"type": "ASN", "size": 101, "prob": None,},},
-    "test8": {"asn": {"type": "ASN", "size": 34, "prob": None,},},
-    "test9": {"asn": {"type": "ASN", "size": -1, "prob": None,},},
-    "test10": {"asn": {"type": "ASN", "size": 48, "prob": None,},},
-    "test11": {"asn": {"type": "ASN", "size": 1, "prob": 1.0,},},
-    "test12": {
-        "asn": {"type": "ASN", "size": 119, "prob": 0.52},
-        "0.7": {"type": None, "size": 184, "prob": 0.7},
-        "0.8": {"type": None, "size": 244, "prob": 0.8},
-        "0.9": {"type": None, "size": 351, "prob": 0.9},
+        "0.7": {"type": None, "size": 204, "prob": 0.7},
+        "0.8": {"type": None, "size": 266, "prob": 0.8},
+        "0.9": {"type": None, "size": 358, "prob": 0.9},
+    },
+    "test7": {
+        "0.7": {"type": None, "size": 101, "prob": 0.7},
+        "0.8": {"type": None, "size": 115, "prob": 0.8},
+        "0.9": {"type": None, "size": 145, "prob": 0.9},
+    },
+    "test11": {
+        "0.7": {"type": None, "size": 4, "prob": 0.7},
+        "0.8": {"type": None, "size": 4, "prob": 0.8},
+        "0.9": {"type": None, "size": 4, "prob": 0.9},
     },
     "test_small_third_candidate": {
-        "asn": {"type": "ASN", "size": 1769, "prob": 0.5},
-        "0.7": {"type": None, "size": 2837, "prob": 0.7},
-        "0.8": {"type": None, "size": 3760, "prob": 0.8},
-        "0.9": {"type": None, "size": 5426, "prob": 0.9},
+        "0.7": {"type": None, "size": 1542, "prob": 0.7},
+        "0.8": {"type": None, "size": 1944, "prob": 0.8},
+        "0.9": {"type": None, "size": 2617, "prob": 0.9},
     },
 }
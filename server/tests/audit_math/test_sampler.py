@@ -1,6 +1,10 @@
+import json
 import random
+from collections import Counter
+from decimal import Decimal
 import pytest
-from ...audit_math import sampler
+import consistent_sampler
+from ...audit_math import sampler, macro
 from ...audit_math.sampler_contest import Contest
 
 SEED = "12345678901234567890abcdefghijklmnopqrstuvwxyz😊"
@@ -98,7 +102,7 @@ def test_draw_more_samples(snapshot):
 def test_draw_macro_sample(macro_batches, macro_contest, snapshot):
     # Test getting a sample
     sample = sampler.draw_ppeb_sample(
-        SEED, macro_contest, 10, 0, batch_results=macro_batches
+        SEED, macro_contest, 10, 0, batch_results=macro_batches, replicated=True
     )
     snapshot.assert_match(sample)
 
@@ -106,12 +110,17 @@ def test_draw_macro_sample(macro_batches, macro_contest, snapshot):
 def test_draw_more_macro_sample(macro_batches, macro_contest, snapshot):
     # Test getting a sample
     sample = sampler.draw_ppeb_sample(
-        SEED, macro_contest, 5, 0, batch_results=macro_batches,
+        SEED, macro_contest, 5, 0, batch_results=macro_batches, replicated=True
     )
     snapshot.assert_match(sample)
 
     sample = sampler.draw_ppeb_sample(
-        SEED, macro_contest, 5, num_sampled=5, batch_results=macro_batches
+        SEED,
+        macro_contest,
+        5,
+        num_sampled=5,
+        batch_results=macro_batches,
+        replicated=True,
     )
     snapshot.assert_match(sample)
 
@@ -145,3 +154,192 @@ def test_ballot_labels():
         sample = sampler.draw_sample(SEED, manifest, 100, 0)
         for (_, (batch, ballot_number), _) in sample:
             assert 1 <= ballot_number <= manifest[batch]
+
+
+def test_lazy_sampler_matches_consistent_sampler():
+    rand = random.Random(12345)
+    for _ in range(20):
+        manifest = {f"pct {n}": rand.randint(0, 10) for n in range(rand.randint(1, 10))}
+        ballots = [(batch, i + 1) for batch in manifest for i in range(manifest[batch])]
+        for take, drop in [(10, 0), (5, 7), (100, 0), (30, 30)]:
+            expected = list(
+                consistent_sampler.sampler(
+                    ballots,
+                    seed=SEED,
+                    take=take,
+                    drop=drop,
+                    with_replacement=True,
+                    output="tuple",
+                    digits=18,
+                )
+            )
+            assert list(sampler.lazy_sampler(SEED, manifest, take, drop)) == expected
+
+
+def test_ballot_at_index():
+    manifest = {"pct 1": 3, "pct 2": 0, "pct 3": 2}
+    index = sampler.ticket_index(manifest)
+    assert [sampler.ballot_at_index(index, n) for n in range(5)] == [
+        ("pct 1", 1),
+        ("pct 1", 2),
+        ("pct 1", 3),
+        ("pct 3", 1),
+        ("pct 3", 2),
+    ]
+
+
+def test_draw_sample_resume_from_state():
+    manifest = {"pct 1": 25, "pct 2": 25, "pct 3": 25, "pct 4": 25}
+    expected = sampler.draw_sample(SEED, manifest, 60, 0)
+
+    state = sampler.SamplerState()
+    samples = []
+    num_sampled = 0
+    for sample_size in [10, 20, 30]:
+        # Round trip through JSON like we do when saving to the db
+        state = sampler.SamplerState.from_json(json.loads(json.dumps(state.to_json())))
+        samples += sampler.draw_sample(
+            SEED, manifest, sample_size, num_sampled, state=state, prefetch=sample_size
+        )
+        num_sampled += sample_size
+        assert state.num_sampled == num_sampled
+
+    assert samples == expected
+
+
+def test_draw_sample_state_mismatch():
+    manifest = {"pct 1": 25, "pct 2": 25}
+    state = sampler.SamplerState()
+    sampler.draw_sample(SEED, manifest, 10, 0, state=state)
+
+    # If the manifest or seed changes, the state is thrown out
+    other_manifest = {"pct 1": 25, "pct 2": 24}
+    assert sampler.draw_sample(
+        SEED, other_manifest, 10, 10, state=state
+    ) == sampler.draw_sample(SEED, other_manifest, 10, 10)
+    assert sampler.draw_sample("other seed", manifest, 10, 10, state=state) == (
+        sampler.draw_sample("other seed", manifest, 10, 10)
+    )
+
+    # If the state is ahead of where we want to start sampling, it's thrown out
+    assert sampler.draw_sample(SEED, manifest, 5, 0, state=state) == (
+        sampler.draw_sample(SEED, manifest, 5, 0)
+    )
+
+
+def test_draw_samples_parallel_matches_serial():
+    requests = [
+        sampler.SampleRequest(
+            manifest={"pct 1": 25, "pct 2": 25, "pct 3": 10},
+            sample_size=20,
+            num_sampled=0,
+            state=sampler.SamplerState(),
+            prefetch=20,
+        ),
+        sampler.SampleRequest(
+            manifest={"pct 1": 25, "pct 3": 10},
+            sample_size=5,
+            num_sampled=3,
+            state=None,
+            prefetch=0,
+        ),
+        sampler.SampleRequest(
+            manifest={"pct 2": 25},
+            sample_size=30,
+            num_sampled=0,
+            state=sampler.SamplerState(),
+            prefetch=0,
+        ),
+    ]
+
+    serial = sampler.draw_samples(SEED, requests, max_workers=1)
+    parallel = sampler.draw_samples(SEED, requests, max_workers=3)
+
+    # Results come back in request order regardless of how they're scheduled
+    assert [sample for sample, _ in parallel] == [sample for sample, _ in serial]
+    assert [state.to_json() for _, state in parallel] == [
+        state.to_json() for _, state in serial
+    ]
+    for request, (sample, _) in zip(requests, serial):
+        assert sample == sampler.draw_sample(
+            SEED, request.manifest, request.sample_size, request.num_sampled
+        )
+
+
+@pytest.mark.parametrize("replicated", [True, False])
+def test_draw_macro_sample_resume_from_state(macro_batches, macro_contest, replicated):
+    expected = sampler.draw_ppeb_sample(
+        SEED, macro_contest, 10, 0, macro_batches, replicated=replicated
+    )
+
+    state = sampler.SamplerState()
+    sample = sampler.draw_ppeb_sample(
+        SEED, macro_contest, 5, 0, macro_batches, state=state, replicated=replicated
+    )
+    assert state.weighted == (not replicated)
+    state = sampler.SamplerState.from_json(json.loads(json.dumps(state.to_json())))
+    sample += sampler.draw_ppeb_sample(
+        SEED, macro_contest, 5, 5, macro_batches, state=state, replicated=replicated
+    )
+
+    assert sample == expected
+
+
+def test_draw_macro_sample_replicated_matches_batch_list(macro_batches, macro_contest):
+    # The replicated mode should reproduce draws from the full list of
+    # replicated batches, which is how PPEB samples used to be drawn.
+    U = macro.compute_U(macro_batches, {}, macro_contest)
+    batch_to_prob = {
+        batch: macro.compute_max_error(macro_batches[batch], macro_contest) / U
+        for batch in macro_batches
+    }
+    min_prob = min(batch_to_prob.values())
+    sample_from = [
+        (batch, i)
+        for batch, prob in batch_to_prob.items()
+        for i in range(int(prob / min_prob))
+    ]
+    expected = [
+        (ticket_number, batch, times_sampled)
+        for ticket_number, (batch, _), times_sampled in consistent_sampler.sampler(
+            sample_from, seed=SEED, take=50, with_replacement=True, output="tuple",
+        )
+    ]
+
+    assert (
+        sampler.draw_ppeb_sample(
+            SEED, macro_contest, 50, 0, macro_batches, replicated=True
+        )
+        == expected
+    )
+
+
+def test_draw_weighted_macro_sample(macro_batches, macro_contest, snapshot):
+    sample = sampler.draw_ppeb_sample(SEED, macro_contest, 10, 0, macro_batches)
+    snapshot.assert_match(sample)
+
+    assert (
+        sampler.draw_ppeb_sample(SEED, macro_contest, 5, 5, macro_batches) == sample[5:]
+    )
+
+
+def test_weighted_sampler_proportional():
+    weights = {
+        "a": Decimal(1),
+        "b": Decimal(3),
+        "c": Decimal("0.0001"),
+        "d": Decimal(6),
+    }
+    sample = list(sampler.weighted_sampler(SEED, weights, 10000))
+
+    counts = Counter(batch for _, batch, _ in sample)
+    assert abs(counts["a"] / 10000 - 0.1) < 0.02
+    assert abs(counts["b"] / 10000 - 0.3) < 0.02
+    assert counts["c"] < 5
+    assert abs(counts["d"] / 10000 - 0.6) < 0.02
+
+    # The last value is the number of times the batch has been drawn so far
+    for batch in weights:
+        assert [times_sampled for _, b, times_sampled in sample if b == batch] == list(
+            range(1, counts[batch] + 1)
+        )
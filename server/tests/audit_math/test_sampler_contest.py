@@ -1,6 +1,7 @@
+from types import SimpleNamespace
 import pytest
 
-from ...audit_math.sampler_contest import Contest
+from ...audit_math.sampler_contest import Contest, from_db_contest
 
 
 @pytest.fixture
@@ -13,6 +14,33 @@ def contests():
     return contests
 
 
+def test_from_db_contest_cache():
+    db_contest = SimpleNamespace(
+        id="contest-1",
+        total_ballots_cast=1000,
+        num_winners=1,
+        votes_allowed=1,
+        choices=[
+            SimpleNamespace(id="choice-1", num_votes=600),
+            SimpleNamespace(id="choice-2", num_votes=400),
+        ],
+    )
+    contest = from_db_contest(db_contest)
+    assert contest.candidates == {"choice-1": 600, "choice-2": 400}
+    assert contest.diluted_margin == 0.2
+    assert from_db_contest(db_contest) is contest
+
+    # Changing the vote counts or total ballots should give us a new Contest
+    db_contest.choices[1].num_votes = 300
+    updated_contest = from_db_contest(db_contest)
+    assert updated_contest is not contest
+    assert updated_contest.candidates == {"choice-1": 600, "choice-2": 300}
+    assert updated_contest.diluted_margin == 0.3
+
+    db_contest.total_ballots_cast = 2000
+    assert from_db_contest(db_contest).diluted_margin == 0.15
+
+
 def test_compute_margins(contests):
     for contest in contests:
         true_margins_for_contest = true_margins[contest.name]
@@ -0,0 +1,124 @@
+import pytest
+
+from ...audit_math import simulator, bravo, supersimple, macro
+from ...audit_math.sampler_contest import Contest
+
+RISK_LIMIT = 10
+
+
+@pytest.fixture
+def contest():
+    return Contest(
+        "contest",
+        {
+            "winner": 55000,
+            "loser": 45000,
+            "ballots": 100000,
+            "numWinners": 1,
+            "votesAllowed": 1,
+        },
+    )
+
+
+def test_ballot_polling_matches_bravo_sample_sizes(contest):
+    options = bravo.get_sample_size(RISK_LIMIT, contest, None)
+    round_sizes = [options[quant]["size"] for quant in ["0.7", "0.8", "0.9"]]
+
+    stopping_probabilities = simulator.ballot_polling_stopping_probabilities(
+        RISK_LIMIT, contest, round_sizes, num_trials=1000
+    )
+
+    for quant in ["0.7", "0.8", "0.9"]:
+        assert stopping_probabilities[options[quant]["size"]] == pytest.approx(
+            float(quant), abs=0.05
+        )
+
+
+def test_ballot_polling_every_ballot_has_a_vote():
+    # The candidates' vote shares add up to (just over, after rounding) 1
+    contest = Contest(
+        "contest",
+        {
+            "c1": 11846,
+            "c2": 441,
+            "c3": 58,
+            "ballots": 12345,
+            "numWinners": 1,
+            "votesAllowed": 1,
+        },
+    )
+    stopping_probabilities = simulator.ballot_polling_stopping_probabilities(
+        RISK_LIMIT, contest, [10, 20], num_trials=10
+    )
+    assert stopping_probabilities[20] >= stopping_probabilities[10]
+
+
+def test_parallel_matches_serial(contest):
+    serial = simulator.ballot_polling_stopping_probabilities(
+        RISK_LIMIT, contest, [100, 300, 500], num_trials=100, seed=1234
+    )
+    parallel = simulator.ballot_polling_stopping_probabilities(
+        RISK_LIMIT, contest, [100, 300, 500], num_trials=100, seed=1234, max_workers=2
+    )
+    assert serial == parallel
+
+    different_seed = simulator.ballot_polling_stopping_probabilities(
+        RISK_LIMIT, contest, [100, 300, 500], num_trials=100, seed=5678
+    )
+    assert different_seed != serial
+
+
+def test_supersimple(contest):
+    sample_size = supersimple.get_sample_sizes(RISK_LIMIT, contest, None)
+
+    # With no discrepancies, the audit should always stop at the sample size we
+    # computed
+    assert simulator.supersimple_stopping_probabilities(
+        RISK_LIMIT, contest, [sample_size // 2, sample_size], num_trials=10
+    ) == {sample_size // 2: 0.0, sample_size: 1.0}
+
+    # Overstatements make it less likely we'll stop
+    stopping_probabilities = simulator.supersimple_stopping_probabilities(
+        RISK_LIMIT,
+        contest,
+        [sample_size, sample_size * 2],
+        discrepancy_rates={"1-over": 0.01, "2-over": 0.001},
+        num_trials=100,
+    )
+    assert 0 < stopping_probabilities[sample_size] < 1
+    assert stopping_probabilities[sample_size * 2] > stopping_probabilities[sample_size]
+
+
+def test_macro():
+    contest = Contest(
+        "contest",
+        {
+            "winner": 550000,
+            "loser": 450000,
+            "ballots": 1000000,
+            "numWinners": 1,
+            "votesAllowed": 1,
+        },
+    )
+    reported_results = {
+        f"batch{batch}": {
+            "contest": {
+                "winner": 550 + batch % 50,
+                "loser": 450 - batch % 50,
+                "ballots": 1000,
+            }
+        }
+        for batch in range(1000)
+    }
+    sample_size = macro.get_sample_sizes(RISK_LIMIT, contest, reported_results, {})
+
+    stopping_probabilities = simulator.macro_stopping_probabilities(
+        RISK_LIMIT,
+        contest,
+        reported_results,
+        [sample_size // 2, sample_size, sample_size * 2],
+        num_trials=100,
+    )
+    assert stopping_probabilities[sample_size // 2] == 0
+    assert stopping_probabilities[sample_size] > 0.5
+    assert stopping_probabilities[sample_size * 2] == 1
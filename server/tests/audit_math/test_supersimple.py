@@ -1,5 +1,6 @@
 # pylint: disable=invalid-name
 from decimal import Decimal
+import random
 import pytest
 
 from ...audit_math import supersimple
@@ -84,6 +85,9 @@ def test_find_no_discrepancies(contests, cvrs):
         )
         assert not discrepancies
 
+        # Test an empty sample
+        assert not supersimple.compute_discrepancies(contests[contest], cvrs, {})
+
 
 def test_find_one_discrepancy(contests, cvrs):
 
@@ -177,6 +181,104 @@ def test_ballot_not_found_discrepancy(contests, cvrs):
     assert discrepancies[0]["discrepancy_cvr"]["audited_as"] is None
 
 
+def reference_discrepancies(contest, cvrs, sample_cvr):
+    # A straightforward implementation of compute_discrepancies, looping over
+    # each ballot and (winner, loser) pair, to check the array-based one
+    # against
+    discrepancies = {}
+    for ballot, sample in sample_cvr.items():
+        audited, reported = sample["cvr"], cvrs[ballot]
+        if audited is None:
+            discrepancies[ballot] = (
+                2,
+                Decimal(2) / Decimal(contest.diluted_margin * contest.ballots),
+            )
+            continue
+        e_r, e_int, found = Decimal(0), 0, False
+        for winner in contest.winners:
+            for loser in contest.losers:
+                v = reported.get(contest.name, {winner: 0, loser: 0})
+                a = audited.get(contest.name, {winner: 0, loser: 0})
+                e = (v[winner] - a[winner]) - (v[loser] - a[loser])
+                found = found or e != 0
+                V_wl = contest.candidates[winner] - contest.candidates[loser]
+                e_weighted = Decimal("inf") if V_wl == 0 else Decimal(e) / V_wl
+                if e_weighted > e_r:
+                    e_r, e_int = e_weighted, e
+        if found:
+            discrepancies[ballot] = (e_int, e_weighted)
+    return discrepancies
+
+
+def test_compute_risk_matches_exact():
+    # The array-based discrepancies and float p-values should match the
+    # straightforward Decimal computation on random multi-candidate contests
+    rand = random.Random(12345)
+    for i in range(50):
+        num_candidates = rand.randint(2, 5)
+        num_winners = rand.randint(1, num_candidates - 1)
+        num_ballots = rand.randint(100, 2000)
+        contest_name = f"Contest {i}"
+
+        cvrs = {}
+        for ballot in range(num_ballots):
+            if rand.random() < 0.1:
+                cvrs[ballot] = {}  # Contest not on ballot
+            else:
+                votes = {f"cand{c}": 0 for c in range(num_candidates)}
+                # Skew votes towards the lower numbered candidates
+                votes[
+                    f"cand{min(rand.randrange(num_candidates) for _ in range(2))}"
+                ] = 1
+                cvrs[ballot] = {contest_name: votes}
+        totals = {
+            f"cand{c}": sum(
+                cvr.get(contest_name, {}).get(f"cand{c}", 0) for cvr in cvrs.values()
+            )
+            for c in range(num_candidates)
+        }
+        contest = Contest(
+            contest_name,
+            {
+                **totals,
+                "ballots": num_ballots,
+                "numWinners": num_winners,
+                "votesAllowed": 1,
+            },
+        )
+        if contest.diluted_margin <= 0:
+            continue
+
+        sample_cvr = {}
+        for ballot in rand.sample(
+            range(num_ballots), rand.randint(1, num_ballots // 2)
+        ):
+            audited = cvrs[ballot]
+            if rand.random() < 0.05:
+                audited = None  # Ballot not found
+            elif rand.random() < 0.2:
+                # Change the audited vote
+                votes = {f"cand{c}": 0 for c in range(num_candidates)}
+                votes[f"cand{rand.randrange(num_candidates)}"] = rand.randint(0, 1)
+                audited = {contest_name: votes}
+            sample_cvr[ballot] = {"times_sampled": rand.randint(1, 3), "cvr": audited}
+
+        discrepancies = supersimple.compute_discrepancies(contest, cvrs, sample_cvr)
+        assert {
+            ballot: (discrepancy["counted_as"], discrepancy["weighted_error"])
+            for ballot, discrepancy in discrepancies.items()
+        } == reference_discrepancies(contest, cvrs, sample_cvr)
+
+        p_value, finished = supersimple.compute_risk(
+            RISK_LIMIT, contest, cvrs, sample_cvr
+        )
+        exact_p_value, exact_finished = supersimple.compute_risk(
+            RISK_LIMIT, contest, cvrs, sample_cvr, exact=True
+        )
+        assert p_value == pytest.approx(exact_p_value, rel=1e-9)
+        assert finished == exact_finished
+
+
 def test_get_sample_sizes(contests):
     for contest in contests:
         computed = supersimple.get_sample_sizes(RISK_LIMIT, contests[contest], None)
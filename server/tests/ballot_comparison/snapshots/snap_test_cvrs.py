@@ -12,105 +12,105 @@ snapshots["test_cvr_upload 1"] = [
         "ballot_position": 1,
         "batch_name": "BATCH1",
         "imprinted_id": "1-1-1",
-        "interpretations": "0,1,1,1,0",
+        "interpretations": [0, 1, 1, 1, 0],
         "tabulator": "TABULATOR1",
     },
     {
         "ballot_position": 2,
         "batch_name": "BATCH1",
         "imprinted_id": "1-1-2",
-        "interpretations": "1,0,1,0,1",
+        "interpretations": [1, 0, 1, 0, 1],
         "tabulator": "TABULATOR1",
     },
     {
         "ballot_position": 3,
         "batch_name": "BATCH1",
         "imprinted_id": "1-1-3",
-        "interpretations": "0,1,1,1,0",
+        "interpretations": [0, 1, 1, 1, 0],
         "tabulator": "TABULATOR1",
     },
     {
         "ballot_position": 1,
         "batch_name": "BATCH2",
         "imprinted_id": "1-2-1",
-        "interpretations": "1,0,1,0,1",
+        "interpretations": [1, 0, 1, 0, 1],
         "tabulator": "TABULATOR1",
     },
     {
         "ballot_position": 2,
         "batch_name": "BATCH2",
         "imprinted_id": "1-2-2",
-        "interpretations": "0,1,1,1,0",
+        "interpretations": [0, 1, 1, 1, 0],
         "tabulator": "TABULATOR1",
     },
     {
         "ballot_position": 3,
         "batch_name": "BATCH2",
         "imprinted_id": "1-2-3",
-        "interpretations": "1,0,1,0,1",
+        "interpretations": [1, 0, 1, 0, 1],
         "tabulator": "TABULATOR1",
     },
     {
         "ballot_position": 1,
         "batch_name": "BATCH1",
         "imprinted_id": "2-1-1",
-        "interpretations": "0,1,1,1,0",
+        "interpretations": [0, 1, 1, 1, 0],
         "tabulator": "TABULATOR2",
     },
     {
         "ballot_position": 2,
         "batch_name": "BATCH1",
         "imprinted_id": "2-1-2",
-        "interpretations": "1,0,1,0,1",
+        "interpretations": [1, 0, 1, 0, 1],
         "tabulator": "TABULATOR2",
     },
     {
         "ballot_position": 3,
         "batch_name": "BATCH1",
         "imprinted_id": "2-1-3",
-        "interpretations": "1,0,1,1,0",
+        "interpretations": [1, 0, 1, 1, 0],
         "tabulator": "TABULATOR2",
     },
     {
         "ballot_position": 1,
         "batch_name": "BATCH2",
         "imprinted_id": "2-2-1",
-        "interpretations": "1,0,1,0,1",
+        "interpretations": [1, 0, 1, 0, 1],
         "tabulator": "TABULATOR2",
     },
     {
         "ballot_position": 2,
         "batch_name": "BATCH2",
         "imprinted_id": "2-2-2",
-        "interpretations": "1,1,1,1,1",
+        "interpretations": [1, 1, 1, 1, 1],
         "tabulator": "TABULATOR2",
     },
     {
         "ballot_position": 3,
         "batch_name": "BATCH2",
         "imprinted_id": "2-2-3",
-        "interpretations": "1,0,1,0,1",
+        "interpretations": [1, 0, 1, 0, 1],
         "tabulator": "TABULATOR2",
     },
     {
         "ballot_position": 4,
         "batch_name": "BATCH2",
         "imprinted_id": "2-2-4",
-        "interpretations": ",,1,0,1",
+        "interpretations": [-1, -1, 1, 0, 1],
         "tabulator": "TABULATOR2",
     },
     {
         "ballot_position": 5,
         "batch_name": "BATCH2",
         "imprinted_id": "2-2-5",
-        "interpretations": ",,1,1,0",
+        "interpretations": [-1, -1, 1, 1, 0],
         "tabulator": "TABULATOR2",
     },
     {
         "ballot_position": 6,
         "batch_name": "BATCH2",
         "imprinted_id": "2-2-6",
-        "interpretations": ",,1,0,1",
+        "interpretations": [-1, -1, 1, 0, 1],
         "tabulator": "TABULATOR2",
     },
 ]
@@ -140,105 +140,105 @@ snapshots["test_cvrs_counting_group 1"] = [
         "ballot_position": 1,
         "batch_name": "BATCH1",
         "imprinted_id": "1-1-1",
-        "interpretations": "0,1,1,1,0",
+        "interpretations": [0, 1, 1, 1, 0],
         "tabulator": "TABULATOR1",
     },
     {
         "ballot_position": 2,
         "batch_name": "BATCH1",
         "imprinted_id": "1-1-2",
-        "interpretations": "1,0,1,0,1",
+        "interpretations": [1, 0, 1, 0, 1],
         "tabulator": "TABULATOR1",
     },
     {
         "ballot_position": 3,
         "batch_name": "BATCH1",
         "imprinted_id": "1-1-3",
-        "interpretations": "0,1,1,1,0",
+        "interpretations": [0, 1, 1, 1, 0],
         "tabulator": "TABULATOR1",
     },
     {
         "ballot_position": 1,
         "batch_name": "BATCH2",
         "imprinted_id": "1-2-1",
-        "interpretations": "1,0,1,0,1",
+        "interpretations": [1, 0, 1, 0, 1],
         "tabulator": "TABULATOR1",
     },
     {
         "ballot_position": 2,
         "batch_name": "BATCH2",
         "imprinted_id": "1-2-2",
-        "interpretations": "0,1,1,1,0",
+        "interpretations": [0, 1, 1, 1, 0],
         "tabulator": "TABULATOR1",
     },
     {
         "ballot_position": 3,
         "batch_name": "BATCH2",
         "imprinted_id": "1-2-3",
-        "interpretations": "1,0,1,0,1",
+        "interpretations": [1, 0, 1, 0, 1],
         "tabulator": "TABULATOR1",
     },
     {
         "ballot_position": 1,
         "batch_name": "BATCH1",
         "imprinted_id": "2-1-1",
-        "interpretations": "0,1,1,1,0",
+        "interpretations": [0, 1, 1, 1, 0],
         "tabulator": "TABULATOR2",
     },
     {
         "ballot_position": 2,
         "batch_name": "BATCH1",
         "imprinted_id": "2-1-2",
-        "interpretations": "1,0,1,0,1",
+        "interpretations": [1, 0, 1, 0, 1],
         "tabulator": "TABULATOR2",
     },
     {
         "ballot_position": 3,
         "batch_name": "BATCH1",
         "imprinted_id": "2-1-3",
-        "interpretations": "1,0,1,1,0",
+        "interpretations": [1, 0, 1, 1, 0],
         "tabulator": "TABULATOR2",
     },
     {
         "ballot_position": 1,
         "batch_name": "BATCH2",
         "imprinted_id": "2-2-1",
-        "interpretations": "1,0,1,0,1",
+        "interpretations": [1, 0, 1, 0, 1],
         "tabulator": "TABULATOR2",
     },
     {
         "ballot_position": 2,
         "batch_name": "BATCH2",
         "imprinted_id": "2-2-2",
-        "interpretations": "1,1,1,1,0",
+        "interpretations": [1, 1, 1, 1, 0],
         "tabulator": "TABULATOR2",
     },
     {
         "ballot_position": 3,
         "batch_name": "BATCH2",
         "imprinted_id": "2-2-3",
-        "interpretations": "1,0,1,0,1",
+        "interpretations": [1, 0, 1, 0, 1],
         "tabulator": "TABULATOR2",
     },
     {
         "ballot_position": 4,
         "batch_name": "BATCH2",
         "imprinted_id": "2-2-4",
-        "interpretations": ",,1,0,1",
+        "interpretations": [-1, -1, 1, 0, 1],
         "tabulator": "TABULATOR2",
     },
     {
         "ballot_position": 5,
         "batch_name": "BATCH2",
         "imprinted_id": "2-2-5",
-        "interpretations": ",,1,1,0",
+        "interpretations": [-1, -1, 1, 1, 0],
         "tabulator": "TABULATOR2",
     },
     {
         "ballot_position": 6,
         "batch_name": "BATCH2",
         "imprinted_id": "2-2-6",
-        "interpretations": ",,1,0,1",
+        "interpretations": [-1, -1, 1, 0, 1],
         "tabulator": "TABULATOR2",
     },
 ]
@@ -268,105 +268,105 @@ snapshots["test_cvrs_newlines 1"] = [
         "ballot_position": 1,
         "batch_name": "BATCH1",
         "imprinted_id": "1-1-1",
-        "interpretations": "0,1,1,1,0",
+        "interpretations": [0, 1, 1, 1, 0],
         "tabulator": "TABULATOR1",
     },
     {
         "ballot_position": 2,
         "batch_name": "BATCH1",
         "imprinted_id": "1-1-2",
-        "interpretations": "1,0,1,0,1",
+        "interpretations": [1, 0, 1, 0, 1],
         "tabulator": "TABULATOR1",
     },
     {
         "ballot_position": 3,
         "batch_name": "BATCH1",
         "imprinted_id": "1-1-3",
-        "interpretations": "0,1,1,1,0",
+        "interpretations": [0, 1, 1, 1, 0],
         "tabulator": "TABULATOR1",
     },
     {
         "ballot_position": 1,
         "batch_name": "BATCH2",
         "imprinted_id": "1-2-1",
-        "interpretations": "1,0,1,0,1",
+        "interpretations": [1, 0, 1, 0, 1],
         "tabulator": "TABULATOR1",
     },
     {
         "ballot_position": 2,
         "batch_name": "BATCH2",
         "imprinted_id": "1-2-2",
-        "interpretations": "0,1,1,1,0",
+        "interpretations": [0, 1, 1, 1, 0],
         "tabulator": "TABULATOR1",
     },
     {
         "ballot_position": 3,
         "batch_name": "BATCH2",
         "imprinted_id": "1-2-3",
-        "interpretations": "1,0,1,0,1",
+        "interpretations": [1, 0, 1, 0, 1],
         "tabulator": "TABULATOR1",
     },
     {
         "ballot_position": 1,
         "batch_name": "BATCH1",
         "imprinted_id": "2-1-1",
-        "interpretations": "0,1,1,1,0",
+        "interpretations": [0, 1, 1, 1, 0],
         "tabulator": "TABULATOR2",
     },
     {
         "ballot_position": 2,
         "batch_name": "BATCH1",
         "imprinted_id": "2-1-2",
-        "interpretations": "1,0,1,0,1",
+        "interpretations": [1, 0, 1, 0, 1],
         "tabulator": "TABULATOR2",
     },
     {
         "ballot_position": 3,
         "batch_name": "BATCH1",
         "imprinted_id": "2-1-3",
-        "interpretations": "1,0,1,1,0",
+        "interpretations": [1, 0, 1, 1, 0],
         "tabulator": "TABULATOR2",
     },
     {
         "ballot_position": 1,
         "batch_name": "BATCH2",
         "imprinted_id": "2-2-1",
-        "interpretations": "1,0,1,0,1",
+        "interpretations": [1, 0, 1, 0, 1],
         "tabulator": "TABULATOR2",
     },
     {
         "ballot_position": 2,
         "batch_name": "BATCH2",
         "imprinted_id": "2-2-2",
-        "interpretations": "1,1,1,1,0",
+        "interpretations": [1, 1, 1, 1, 0],
         "tabulator": "TABULATOR2",
     },
     {
         "ballot_position": 3,
         "batch_name": "BATCH2",
         "imprinted_id": "2-2-3",
-        "interpretations": "1,0,1,0,1",
+        "interpretations": [1, 0, 1, 0, 1],
         "tabulator": "TABULATOR2",
     },
     {
         "ballot_position": 4,
         "batch_name": "BATCH2",
         "imprinted_id": "2-2-4",
-        "interpretations": ",,1,0,1",
+        "interpretations": [-1, -1, 1, 0, 1],
         "tabulator": "TABULATOR2",
     },
     {
         "ballot_position": 5,
         "batch_name": "BATCH2",
         "imprinted_id": "2-2-5",
-        "interpretations": ",,1,1,0",
+        "interpretations": [-1, -1, 1, 1, 0],
         "tabulator": "TABULATOR2",
     },
     {
         "ballot_position": 6,
         "batch_name": "BATCH2",
         "imprinted_id": "2-2-6",
-        "interpretations": ",,1,0,1",
+        "interpretations": [-1, -1, 1, 0, 1],
         "tabulator": "TABULATOR2",
     },
 ]
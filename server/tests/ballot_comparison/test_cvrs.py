@@ -1,10 +1,12 @@
-import io, json
+import io, json, random
 from typing import List
 from flask.testing import FlaskClient
+import pytest
 
 from ...models import *  # pylint: disable=wildcard-import
 from ..helpers import *  # pylint: disable=wildcard-import
 from ...bgcompute import bgcompute_update_cvr_file
+from ...api.cvrs import tally_interpretations, parse_interpretations, MISSING
 from ...util.process_file import ProcessingStatus
 from .conftest import TEST_CVRS
 
@@ -441,3 +443,92 @@ def test_cvrs_newlines(
     snapshot.assert_match(
         Jurisdiction.query.get(jurisdiction_ids[0]).cvr_contests_metadata
     )
+
+
+def test_tally_interpretations_matches_row_by_row():
+    contest_names = ["Contest 1"] * 2 + ["Contest 2"] * 3 + ["Contest 3"]
+    contest_choices = ["A", "B", "C", "D", "E", "F"]
+    votes_allowed = {"Contest 1": 1, "Contest 2": 2, "Contest 3": 1}
+
+    def new_metadata():
+        return {
+            contest_name: dict(
+                votes_allowed=votes_allowed[contest_name],
+                total_ballots_cast=0,
+                choices={
+                    choice: dict(num_votes=0)
+                    for name, choice in zip(contest_names, contest_choices)
+                    if name == contest_name
+                },
+            )
+            for contest_name in votes_allowed
+        }
+
+    rand = random.Random(12345)
+    rows = [
+        [rand.choice(["0", "1", "1", "", "40000"]) for _ in contest_choices][
+            : rand.choice([6, 6, 6, 5, 2])
+        ]
+        for _ in range(1000)
+    ]
+
+    # Tally row by row
+    expected = new_metadata()
+    for row in rows:
+        for contest_name in votes_allowed:
+            cells = [
+                (choice, interpretation)
+                for name, choice, interpretation in zip(
+                    contest_names, contest_choices, row
+                )
+                if name == contest_name
+            ]
+            if not cells or any(interpretation == "" for _, interpretation in cells):
+                continue
+            expected[contest_name]["total_ballots_cast"] += 1
+            if sum(int(i) for _, i in cells) > votes_allowed[contest_name]:
+                continue
+            for choice, interpretation in cells:
+                expected[contest_name]["choices"][choice]["num_votes"] += int(
+                    interpretation
+                )
+
+    contest_columns = {
+        "Contest 1": [0, 1],
+        "Contest 2": [2, 3, 4],
+        "Contest 3": [5],
+    }
+    actual = new_metadata()
+    for chunk_start in range(0, len(rows), 300):
+        tally_interpretations(
+            actual,
+            contest_columns,
+            contest_choices,
+            [
+                ",".join((row + [str(MISSING)] * 6)[:6])
+                for row in rows[chunk_start : chunk_start + 300]
+            ],
+        )
+
+    assert actual == expected
+
+
+def test_parse_interpretations_large_values():
+    # Values that don't fit in an int16 shouldn't wrap around to negative
+    # values (which would read as BLANK or MISSING)
+    interpretations = parse_interpretations(["40000,65535,1", "0,,99999999999"])
+    assert interpretations.tolist() == [[32767, 32767, 1], [0, -1, 32767]]
+
+
+def test_parse_interpretations_invalid():
+    for rows in [
+        ["1,a,0"],
+        ["1,0,0a"],
+        ["1,0.5,0"],
+        ["1,-5,0"],
+        ["1,0", "1,0,0"],
+        # Stopping at the bad cell would leave a multiple of the number of rows
+        ["1,0", "a,0"],
+    ]:
+        with pytest.raises(ValueError):
+            parse_interpretations(rows)
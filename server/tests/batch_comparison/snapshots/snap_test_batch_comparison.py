@@ -8,17 +8,17 @@ from snapshottest import Snapshot
 snapshots = Snapshot()
 
 snapshots["test_batch_comparison_round_1 1"] = {
-    "numSamples": 14,
+    "numSamples": 11,
     "numSamplesAudited": 0,
-    "numUnique": 5,
+    "numUnique": 6,
     "numUniqueAudited": 0,
     "status": "NOT_STARTED",
 }
 
 snapshots["test_batch_comparison_round_1 2"] = {
-    "numSamples": 6,
+    "numSamples": 9,
     "numSamplesAudited": 0,
-    "numUnique": 3,
+    "numUnique": 4,
     "numUniqueAudited": 0,
     "status": "NOT_STARTED",
 }
@@ -56,10 +56,10 @@ snapshots["test_batch_comparison_round_2 4"] = {
 }
 
 snapshots["test_batch_comparison_round_2 5"] = {
-    "numSamples": 2,
-    "numSamplesAudited": 0,
-    "numUnique": 2,
-    "numUniqueAudited": 0,
+    "numSamples": 1,
+    "numSamplesAudited": 1,
+    "numUnique": 1,
+    "numUniqueAudited": 1,
     "status": "NOT_STARTED",
 }
 
@@ -74,7 +74,6 @@ snapshots["test_batch_comparison_round_2 6"] = {
 snapshots[
     "test_batch_comparison_round_2 7"
 ] = """Batch Name,Container,Tabulator,Audit Board
-Batch 2,,,Audit Board #1
 Batch 4,,,Audit Board #2
 """
 
@@ -95,35 +94,31 @@ Test Audit test_batch_comparison_round_2,BATCH_COMPARISON,MACRO,10%,1234567890,Y
 ######## AUDIT BOARDS ########\r
 Jurisdiction Name,Audit Board Name,Member 1 Name,Member 1 Affiliation,Member 2 Name,Member 2 Affiliation\r
 J1,Audit Board #1,,,,\r
-J1,Audit Board #1,,,,\r
-J1,Audit Board #2,,,,\r
 J1,Audit Board #2,,,,\r
 J2,Audit Board #1,,,,\r
+J2,Audit Board #1,,,,\r
+J2,Audit Board #2,,,,\r
 \r
 ######## ROUNDS ########\r
 Round Number,Contest Name,Targeted?,Sample Size,Risk Limit Met?,P-Value,Start Time,End Time,Audited Votes\r
 1,Contest 1,Targeted,6,No,0.189590948,DATETIME,DATETIME,candidate 1: 2400; candidate 2: 300; candidate 3: 240\r
-2,Contest 1,Targeted,4,No,,DATETIME,,candidate 1: 0; candidate 2: 0; candidate 3: 0\r
+2,Contest 1,Targeted,3,No,,DATETIME,,candidate 1: 0; candidate 2: 0; candidate 3: 0\r
 \r
 ######## SAMPLED BATCHES ########\r
 Jurisdiction Name,Batch Name,Ticket Numbers,Audited?,Audit Result\r
-J1,Batch 1,Round 1: 0.025053745,Yes,candidate 1: 400; candidate 2: 50; candidate 3: 40\r
-J1,Batch 3,"Round 1: 0.023650366, 0.122600189, 0.150810694",Yes,candidate 1: 400; candidate 2: 50; candidate 3: 40\r
-J2,Batch 1,Round 1: 0.128219632,Yes,candidate 1: 400; candidate 2: 50; candidate 3: 40\r
-J2,Batch 5,"Round 1: 0.121751602, Round 2: 0.172408497",Yes,candidate 1: 400; candidate 2: 50; candidate 3: 40\r
-J1,Batch 2,Round 2: 0.203857756,No,candidate 1: 0; candidate 2: 0; candidate 3: 0\r
-J1,Batch 4,Round 2: 0.169018243,No,candidate 1: 0; candidate 2: 0; candidate 3: 0\r
-J2,Batch 3,Round 2: 0.176814880,No,candidate 1: 0; candidate 2: 0; candidate 3: 0\r
+J1,Batch 1,"Round 1: 0.041358122, 0.046043967, Round 2: 0.027713514",Yes,candidate 1: 400; candidate 2: 50; candidate 3: 40\r
+J1,Batch 3,"Round 1: 0.218559661, 0.271699265",Yes,candidate 1: 400; candidate 2: 50; candidate 3: 40\r
+J2,Batch 2,Round 1: 0.662511590,Yes,candidate 1: 400; candidate 2: 50; candidate 3: 40\r
+J2,Batch 3,"Round 1: 0.802004979, Round 2: 0.816024523",Yes,candidate 1: 400; candidate 2: 50; candidate 3: 40\r
+J2,Batch 4,Round 2: 0.836751336,No,candidate 1: 0; candidate 2: 0; candidate 3: 0\r
 """
 
 snapshots[
     "test_batch_comparison_round_2 9"
 ] = """######## SAMPLED BATCHES ########\r
 Jurisdiction Name,Batch Name,Ticket Numbers,Audited?,Audit Result\r
-J1,Batch 1,Round 1: 0.025053745,Yes,candidate 1: 400; candidate 2: 50; candidate 3: 40\r
-J1,Batch 3,"Round 1: 0.023650366, 0.122600189, 0.150810694",Yes,candidate 1: 400; candidate 2: 50; candidate 3: 40\r
-J1,Batch 2,Round 2: 0.203857756,No,candidate 1: 0; candidate 2: 0; candidate 3: 0\r
-J1,Batch 4,Round 2: 0.169018243,No,candidate 1: 0; candidate 2: 0; candidate 3: 0\r
+J1,Batch 1,"Round 1: 0.041358122, 0.046043967, Round 2: 0.027713514",Yes,candidate 1: 400; candidate 2: 50; candidate 3: 40\r
+J1,Batch 3,"Round 1: 0.218559661, 0.271699265",Yes,candidate 1: 400; candidate 2: 50; candidate 3: 40\r
 """
 
 snapshots["test_batch_comparison_sample_size 1"] = [
@@ -371,7 +371,7 @@ def test_batch_comparison_round_2(
 
     # Check that we automatically select the sample size
     batch_draws = SampledBatchDraw.query.filter_by(round_id=rounds[1]["id"]).all()
-    assert len(batch_draws) == 4
+    assert len(batch_draws) == 3
 
     # Check that we're sampling batches from the jurisdiction that uploaded manifests
     sampled_jurisdictions = {draw.batch.jurisdiction_id for draw in batch_draws}
@@ -380,14 +380,14 @@ def test_batch_comparison_round_2(
     set_logged_in_user(client, UserType.JURISDICTION_ADMIN, DEFAULT_JA_EMAIL)
     rv = post_json(
         client,
-        f"/api/election/{election_id}/jurisdiction/{jurisdiction_ids[0]}/round/{rounds[1]['id']}/audit-board",
+        f"/api/election/{election_id}/jurisdiction/{jurisdiction_ids[1]}/round/{rounds[1]['id']}/audit-board",
         [{"name": "Audit Board #1"}, {"name": "Audit Board #2"},],
     )
     assert_ok(rv)
 
     # Test the retrieval list correctly marks ballots that were sampled last round
     rv = client.get(
-        f"/api/election/{election_id}/jurisdiction/{jurisdiction_ids[0]}/round/{rounds[1]['id']}/batches/retrieval-list"
+        f"/api/election/{election_id}/jurisdiction/{jurisdiction_ids[1]}/round/{rounds[1]['id']}/batches/retrieval-list"
     )
     retrieval_list = rv.data.decode("utf-8").replace("\r\n", "\n")
     snapshot.assert_match(retrieval_list)
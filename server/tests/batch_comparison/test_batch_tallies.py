@@ -10,6 +10,15 @@ from ...bgcompute import (
     bgcompute_update_ballot_manifest_file,
 )
 from ...util.process_file import ProcessingStatus
+from ...api.batch_tallies import load_batch_max_errors, stream_batch_tallies
+from ...audit_math import macro, sampler_contest
+
+
+def jurisdiction_batch_tallies(jurisdiction: Jurisdiction, contest: Contest):
+    return {
+        batch_name: tally
+        for _, batch_name, tally in stream_batch_tallies(contest, [jurisdiction.id])
+    }
 
 
 @pytest.fixture
@@ -89,7 +98,7 @@ def test_batch_tallies_upload(
 
     jurisdiction = Jurisdiction.query.get(jurisdiction_ids[0])
     contest = Contest.query.get(contest_id)
-    assert jurisdiction.batch_tallies == {
+    assert jurisdiction_batch_tallies(jurisdiction, contest) == {
         "Batch 1": {
             contest_id: {
                 contest.choices[0].id: 1,
@@ -198,7 +207,7 @@ def test_batch_tallies_replace(
 
     jurisdiction = Jurisdiction.query.get(jurisdiction_ids[0])
     contest = Contest.query.get(contest_id)
-    assert jurisdiction.batch_tallies == {
+    assert jurisdiction_batch_tallies(jurisdiction, contest) == {
         "Batch 1": {
             contest_id: {
                 contest.choices[0].id: 11,
@@ -267,7 +276,11 @@ def test_batch_tallies_clear(
     jurisdiction = Jurisdiction.query.get(jurisdiction_ids[0])
     assert jurisdiction.batch_tallies_file_id is None
     assert File.query.get(file_id) is None
-    assert jurisdiction.batch_tallies is None
+    assert (
+        BatchTally.query.join(Batch).filter_by(jurisdiction_id=jurisdiction.id).count()
+        == 0
+    )
+    assert jurisdiction.batch_max_errors is None
 
     set_logged_in_user(client, UserType.AUDIT_ADMIN, DEFAULT_AA_EMAIL)
     rv = client.get(
@@ -276,6 +289,139 @@ def test_batch_tallies_clear(
     assert rv.status_code == 404
 
 
+def test_batch_tallies_cleared_by_manifest_upload(
+    client: FlaskClient,
+    election_id: str,
+    jurisdiction_ids: List[str],
+    contest_id: str,
+    manifests,  # pylint: disable=unused-argument
+):
+    set_logged_in_user(client, UserType.JURISDICTION_ADMIN, DEFAULT_JA_EMAIL)
+    rv = client.put(
+        f"/api/election/{election_id}/jurisdiction/{jurisdiction_ids[0]}/batch-tallies",
+        data={
+            "batchTallies": (
+                io.BytesIO(
+                    b"Batch Name,candidate 1,candidate 2,candidate 3\n"
+                    b"Batch 1,1,10,100\n"
+                    b"Batch 2,2,20,200\n"
+                    b"Batch 3,3,30,300\n"
+                ),
+                "batchTallies.csv",
+            )
+        },
+    )
+    assert_ok(rv)
+    bgcompute_update_batch_tallies_file()
+
+    # The batch tallies are stored per batch, so uploading a new manifest
+    # clears them
+    rv = client.put(
+        f"/api/election/{election_id}/jurisdiction/{jurisdiction_ids[0]}/ballot-manifest",
+        data={
+            "manifest": (
+                io.BytesIO(b"Batch Name,Number of Ballots\n" b"Batch 1,200\n"),
+                "manifest.csv",
+            )
+        },
+    )
+    assert_ok(rv)
+
+    rv = client.get(
+        f"/api/election/{election_id}/jurisdiction/{jurisdiction_ids[0]}/batch-tallies"
+    )
+    assert json.loads(rv.data) == {"file": None, "processing": None}
+
+    jurisdiction = Jurisdiction.query.get(jurisdiction_ids[0])
+    assert jurisdiction.batch_max_errors is None
+    assert jurisdiction_batch_tallies(jurisdiction, Contest.query.get(contest_id)) == {}
+
+
+def test_batch_tallies_max_errors(
+    client: FlaskClient,
+    election_id: str,
+    jurisdiction_ids: List[str],
+    contest_id: str,
+    manifests,  # pylint: disable=unused-argument
+):
+    set_logged_in_user(client, UserType.JURISDICTION_ADMIN, DEFAULT_JA_EMAIL)
+    rv = client.put(
+        f"/api/election/{election_id}/jurisdiction/{jurisdiction_ids[0]}/batch-tallies",
+        data={
+            "batchTallies": (
+                io.BytesIO(
+                    b"Batch Name,candidate 1,candidate 2,candidate 3\n"
+                    b"Batch 1,1,10,100\n"
+                    b"Batch 2,2,20,200\n"
+                    b"Batch 3,3,30,300\n"
+                ),
+                "batchTallies.csv",
+            )
+        },
+    )
+    assert_ok(rv)
+    bgcompute_update_batch_tallies_file()
+
+    # The max errors are saved when the file is processed
+    jurisdiction = Jurisdiction.query.get(jurisdiction_ids[0])
+    contest = Contest.query.get(contest_id)
+    expected_max_errors = macro.compute_max_errors(
+        jurisdiction_batch_tallies(jurisdiction, contest),
+        sampler_contest.from_db_contest(contest),
+    )
+    assert jurisdiction.batch_max_errors["maxErrors"] == {
+        batch: str(error) for batch, error in expected_max_errors.items()
+    }
+    assert load_batch_max_errors(jurisdiction, contest) == expected_max_errors
+
+    # If the contest's vote totals change, the saved max errors are stale, so
+    # they get recomputed
+    contest.choices[0].num_votes += 1000
+    new_max_errors = load_batch_max_errors(jurisdiction, contest)
+    assert new_max_errors != expected_max_errors
+    assert new_max_errors == macro.compute_max_errors(
+        jurisdiction_batch_tallies(jurisdiction, contest),
+        sampler_contest.from_db_contest(contest),
+    )
+    db_session.rollback()
+
+
+def test_batch_tallies_file_order(
+    client: FlaskClient,
+    election_id: str,
+    jurisdiction_ids: List[str],
+    contest_id: str,
+    manifests,  # pylint: disable=unused-argument
+):
+    # The sample is drawn from the batches in the order of the rows in the
+    # batch tallies file, even if it's different from the ballot manifest
+    set_logged_in_user(client, UserType.JURISDICTION_ADMIN, DEFAULT_JA_EMAIL)
+    rv = client.put(
+        f"/api/election/{election_id}/jurisdiction/{jurisdiction_ids[0]}/batch-tallies",
+        data={
+            "batchTallies": (
+                io.BytesIO(
+                    b"Batch Name,candidate 1,candidate 2,candidate 3\n"
+                    b"Batch 3,3,30,300\n"
+                    b"Batch 1,1,10,100\n"
+                    b"Batch 2,2,20,200\n"
+                ),
+                "batchTallies.csv",
+            )
+        },
+    )
+    assert_ok(rv)
+    bgcompute_update_batch_tallies_file()
+
+    jurisdiction = Jurisdiction.query.get(jurisdiction_ids[0])
+    contest = Contest.query.get(contest_id)
+    assert list(jurisdiction_batch_tallies(jurisdiction, contest)) == [
+        "Batch 3",
+        "Batch 1",
+        "Batch 2",
+    ]
+
+
 def test_batch_tallies_upload_missing_file(
     client: FlaskClient,
     election_id: str,
@@ -182,6 +182,7 @@ def test_record_batch_results(
     assert rv.status_code == 200
     batches = json.loads(rv.data)["batches"]
     assert len(batches) == J2_BATCHES_ROUND_1
+    round_1_batch_ids += [batch["id"] for batch in batches]
 
     rv = client.get(
         f"/api/election/{election_id}/jurisdiction/{jurisdiction_ids[1]}/round/{round_1_id}/batches/results"
@@ -220,6 +221,8 @@ def test_record_batch_results(
     rounds = json.loads(rv.data)["rounds"]
     assert rounds[0]["endedAt"] is not None
 
+    assert_round_progress_matches(round_1_id)
+
     snapshot.assert_match(
         {
             f"{result.contest.name} - {result.contest_choice.name}": result.result
@@ -234,7 +237,7 @@ def test_record_batch_results(
 
     set_logged_in_user(client, UserType.JURISDICTION_ADMIN, DEFAULT_JA_EMAIL)
     rv = client.get(
-        f"/api/election/{election_id}/jurisdiction/{jurisdiction_ids[0]}/round"
+        f"/api/election/{election_id}/jurisdiction/{jurisdiction_ids[1]}/round"
     )
     assert rv.status_code == 200
     rounds = json.loads(rv.data)["rounds"]
@@ -242,23 +245,23 @@ def test_record_batch_results(
 
     rv = post_json(
         client,
-        f"/api/election/{election_id}/jurisdiction/{jurisdiction_ids[0]}/round/{round_2_id}/audit-board",
+        f"/api/election/{election_id}/jurisdiction/{jurisdiction_ids[1]}/round/{round_2_id}/audit-board",
         [{"name": "Audit Board #1"}],
     )
     assert_ok(rv)
 
     rv = client.get(
-        f"/api/election/{election_id}/jurisdiction/{jurisdiction_ids[0]}/round/{round_2_id}/batches"
+        f"/api/election/{election_id}/jurisdiction/{jurisdiction_ids[1]}/round/{round_2_id}/batches"
     )
     assert rv.status_code == 200
     batches = json.loads(rv.data)["batches"]
-    assert len(batches) == 2
+    assert len(batches) == 1
     # Batches that were sampled in round 1 should be filtered out
     for batch in batches:
         assert batch["id"] not in round_1_batch_ids
 
     rv = client.get(
-        f"/api/election/{election_id}/jurisdiction/{jurisdiction_ids[0]}/round/{round_2_id}/batches/results"
+        f"/api/election/{election_id}/jurisdiction/{jurisdiction_ids[1]}/round/{round_2_id}/batches/results"
     )
     assert rv.status_code == 200
     results = json.loads(rv.data)
@@ -271,18 +274,20 @@ def test_record_batch_results(
 
     rv = put_json(
         client,
-        f"/api/election/{election_id}/jurisdiction/{jurisdiction_ids[0]}/round/{round_2_id}/batches/results",
+        f"/api/election/{election_id}/jurisdiction/{jurisdiction_ids[1]}/round/{round_2_id}/batches/results",
         results,
     )
     assert_ok(rv)
 
     rv = client.get(
-        f"/api/election/{election_id}/jurisdiction/{jurisdiction_ids[0]}/round/{round_2_id}/batches/results"
+        f"/api/election/{election_id}/jurisdiction/{jurisdiction_ids[1]}/round/{round_2_id}/batches/results"
     )
     assert rv.status_code == 200
     new_results = json.loads(rv.data)
     assert new_results == results
 
+    assert_round_progress_matches(round_2_id)
+
 
 def test_record_batch_results_without_audit_boards(
     client: FlaskClient, election_id: str, jurisdiction_ids: List[str], round_1_id: str
@@ -13,6 +13,8 @@ from ..auth.lib import (
 from ..database import db_session
 from ..models import *  # pylint: disable=wildcard-import
 from ..api.audit_boards import end_round
+from ..api.ballots import count_audited_ballot
+from ..api.rounds import record_round_progress
 
 
 DEFAULT_AA_EMAIL = "admin@example.com"
@@ -163,6 +165,8 @@ def audit_ballot(
                 is_overvote=is_overvote,
             )
         ]
+        if ballot.status == BallotStatus.NOT_AUDITED:
+            count_audited_ballot(ballot, 1)
         ballot.status = BallotStatus.AUDITED
 
 
@@ -210,6 +214,50 @@ def run_audit_round(
     db_session.commit()
 
 
+def assert_round_progress_matches(round_id: str):
+    # The progress counters are kept up to date as the audit goes on, so check
+    # them against counts computed from scratch from the sample. We recompute
+    # the sample counters in a savepoint so we can roll them back afterward.
+    round = Round.query.get(round_id)
+
+    def sample_counts():
+        return {
+            progress.jurisdiction_id: (
+                progress.num_samples,
+                progress.num_samples_audited,
+                progress.num_unique,
+                progress.num_unique_audited,
+            )
+            for progress in JurisdictionRoundProgress.query.filter_by(round_id=round_id)
+        }
+
+    counts = sample_counts()
+    db_session.begin_nested()
+    JurisdictionRoundProgress.query.filter_by(round_id=round_id).delete()
+    record_round_progress(round.election, round)
+    expected_counts = sample_counts()
+    db_session.rollback()
+    assert counts == expected_counts
+
+    for progress in JurisdictionRoundProgress.query.filter_by(round_id=round_id):
+        audit_boards = AuditBoard.query.filter_by(
+            round_id=round_id, jurisdiction_id=progress.jurisdiction_id
+        ).all()
+        assert progress.num_audit_boards == len(audit_boards)
+        assert progress.num_audit_boards_not_signed_off == len(
+            [ab for ab in audit_boards if ab.sampled_ballots and not ab.signed_off_at]
+        )
+        for audit_board in audit_boards:
+            assert audit_board.num_sampled_ballots == len(audit_board.sampled_ballots)
+            assert audit_board.num_audited_ballots == len(
+                [
+                    ballot
+                    for ballot in audit_board.sampled_ballots
+                    if ballot.status != BallotStatus.NOT_AUDITED
+                ]
+            )
+
+
 DATETIME_REGEX = re.compile(
     r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}(:\d{2}.\d{6})?(\+\d\d:\d\d)?"
 )
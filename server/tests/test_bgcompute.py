@@ -0,0 +1,75 @@
+import io, time
+from typing import List, Optional, Tuple
+from flask.testing import FlaskClient
+
+from ..bgcompute import (
+    bgcompute_next_file,
+    BGCOMPUTE_TASKS,
+    SMALL_FILE_BGCOMPUTE_TASKS,
+    bgcompute_update_cvr_file,
+    listen_for_uploads,
+    wait_for_upload,
+)
+from .helpers import *  # pylint: disable=wildcard-import
+
+
+def test_bgcompute_next_file():
+    calls: List[Tuple[str, Optional[int]]] = []
+
+    def task(name: str, num_files: int):
+        def run(limit: Optional[int] = None) -> int:
+            calls.append((name, limit))
+            return num_files
+
+        return run
+
+    # Stops at the first task that finds a file, taking one file at a time
+    assert bgcompute_next_file([task("a", 0), task("b", 1), task("c", 1)])
+    assert calls == [("a", 1), ("b", 1)]
+
+    calls.clear()
+    assert not bgcompute_next_file([task("a", 0), task("b", 0)])
+    assert calls == [("a", 1), ("b", 1)]
+
+
+def test_bgcompute_task_priority():
+    # CVRs are processed last, and never by the small file worker
+    assert BGCOMPUTE_TASKS[-1] == bgcompute_update_cvr_file
+    assert bgcompute_update_cvr_file not in SMALL_FILE_BGCOMPUTE_TASKS
+
+
+def test_bgcompute_wakes_on_upload(
+    client: FlaskClient, election_id: str, jurisdiction_ids: List[str],
+):
+    def upload_manifest():
+        rv = client.put(
+            f"/api/election/{election_id}/jurisdiction/{jurisdiction_ids[0]}/ballot-manifest",
+            data={
+                "manifest": (
+                    io.BytesIO(b"Batch Name,Number of Ballots\n1,23\n"),
+                    "manifest.csv",
+                )
+            },
+        )
+        assert_ok(rv)
+
+    connection = listen_for_uploads()
+    try:
+        set_logged_in_user(client, UserType.JURISDICTION_ADMIN, DEFAULT_JA_EMAIL)
+        upload_manifest()
+        file_id = Jurisdiction.query.get(jurisdiction_ids[0]).manifest_file_id
+
+        # Other tests may be uploading files at the same time, so look through
+        # all the notifications we get for ours.
+        connection.poll()
+        assert file_id in [notify.payload for notify in connection.notifies]
+        connection.notifies.clear()
+
+        # A waiting worker wakes up as soon as a file is uploaded
+        upload_manifest()
+        start = time.monotonic()
+        wait_for_upload(connection, 10)
+        assert time.monotonic() - start < 10
+        assert connection.notifies == []
+    finally:
+        connection.close()
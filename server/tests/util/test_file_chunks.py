@@ -0,0 +1,81 @@
+import io, os
+import pytest
+from werkzeug.exceptions import BadRequest
+
+from ...util.file_chunks import file_lines
+from ...util.csv_parse import decode_csv_file, decode_csv_file_chunks
+
+
+def test_file_lines():
+    assert list(file_lines([])) == []
+    assert list(file_lines(["a,b\nc,d\n"])) == ["a,b\n", "c,d\n"]
+    assert list(file_lines(["a,b\nc,", "d\ne,f"])) == ["a,b\n", "c,d\n", "e,f"]
+    # Line endings split across chunks
+    assert list(file_lines(["a,b\r", "\nc,d\r", "\r\n"])) == [
+        "a,b\r\n",
+        "c,d\r",
+        "\r\n",
+    ]
+    # Lines longer than a chunk
+    assert list(file_lines(["a", "b", ",", "c\n", "d"])) == ["ab,c\n", "d"]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 1024])
+def test_decode_csv_file_chunks(chunk_size):
+    for csv in [
+        "Batch Name,Number of Ballots\n1,23\n",
+        "\ufeffBatch Name,Number of Ballots\n1,23\n",
+        "Contest,Choice\nÉlection,Ça va\n",
+    ]:
+        chunks = decode_csv_file_chunks(io.BytesIO(csv.encode()), chunk_size)
+        assert "".join(chunks) == decode_csv_file(csv.encode())
+
+    windows1252_csv = io.FileIO(
+        os.path.join(os.path.dirname(__file__), "windows1252-encoded.csv")
+    ).read()
+    chunks = decode_csv_file_chunks(io.BytesIO(windows1252_csv), chunk_size)
+    assert "".join(chunks) == decode_csv_file(windows1252_csv)
+
+
+def test_decode_csv_file_chunks_excel_file():
+    excel_file_path = os.path.join(
+        os.path.dirname(__file__), "test-ballot-manifest.xlsx"
+    )
+    with open(excel_file_path, "rb") as excel_file:
+        with pytest.raises(BadRequest) as error:
+            list(decode_csv_file_chunks(excel_file))
+        assert error.value.description == (
+            "Please submit a valid CSV."
+            " If you are working with an Excel spreadsheet,"
+            " make sure you export it as a .csv file before uploading"
+        )
+
+
+def test_decode_large_latin1_file():
+    # A big file where the only non-ASCII characters are far past the part of
+    # the file we always feed to the encoding detector.
+    latin1_csv = (
+        "Contest,Choice\n"
+        + "Contest 1,Choice 1\n" * 500000
+        + "Élection municipale,Ça va\n" * 10
+        + "Contest 2,Choice 2\n" * 500000
+    ).encode("latin-1")
+    expected = latin1_csv.decode("latin-1")
+
+    assert decode_csv_file(latin1_csv) == expected
+    assert "".join(decode_csv_file_chunks(io.BytesIO(latin1_csv))) == expected
+
+
+def test_decode_latin1_file_with_long_lines():
+    # CVR rows can have thousands of columns. Here the only non-ASCII
+    # character is more than a sample's length into a long row, past the
+    # beginning of the file.
+    header = ",".join(f"Column {column}" for column in range(1500)) + "\n"
+    row = ",".join(
+        "Ça va" if column == 1400 else str(column % 2) for column in range(1500)
+    )
+    latin1_csv = (header * 20 + row + "\n" + header * 20).encode("latin-1")
+    expected = latin1_csv.decode("latin-1")
+
+    assert decode_csv_file(latin1_csv) == expected
+    assert "".join(decode_csv_file_chunks(io.BytesIO(latin1_csv))) == expected
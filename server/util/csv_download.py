@@ -1,4 +1,5 @@
 import re
+from typing import Iterable, Union
 from datetime import datetime
 from flask import Response
 
@@ -20,7 +21,7 @@ def jurisdiction_timestamp_name(election: Election, jurisdiction: Jurisdiction)
     return f"{jurisdiction_name}-{election_name}-{now}"
 
 
-def csv_response(csv_text: str, filename: str) -> Response:
+def csv_response(csv_text: Union[str, Iterable[str]], filename: str) -> Response:
     return Response(
         csv_text,
         mimetype="text/csv",
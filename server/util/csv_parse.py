@@ -1,8 +1,19 @@
 # pylint: disable=stop-iteration-return
 from enum import Enum
-from typing import List, Iterator, Dict, Any, NamedTuple, Tuple
+from typing import (
+    List,
+    Iterator,
+    Dict,
+    Any,
+    NamedTuple,
+    Tuple,
+    BinaryIO,
+    Callable,
+    Optional,
+)
 import csv as py_csv
-import io, re, locale, chardet
+import io, re, locale, codecs, itertools
+from chardet.universaldetector import UniversalDetector
 from werkzeug.exceptions import BadRequest
 from .process_file import UserError
 
@@ -41,19 +52,7 @@ def parse_csv(csv_string: str, columns: List[CSVColumnType]) -> CSVDictIterator:
     csv: CSVIterator = py_csv.reader(
         io.StringIO(csv_string, newline=None), delimiter=","
     )
-    csv = strip_whitespace(csv)
-    csv = reject_no_rows(csv)
-    csv = skip_empty_trailing_columns(csv)
-    csv = validate_and_normalize_headers(csv, columns)
-    dict_csv = convert_rows_to_dicts(csv)
-    dict_csv = reject_empty_cells(dict_csv)
-    dict_csv = reject_total_rows(dict_csv)
-    dict_csv = validate_and_parse_values(dict_csv, columns)
-    dict_csv = reject_duplicate_values(dict_csv, columns)
-    # Filter out empty rows last so we can get accurate row numbers in all the
-    # other checkers
-    dict_csv = skip_empty_rows(dict_csv)
-    return dict_csv
+    return parse_rows(csv, columns)
 
 
 def validate_is_csv(csv: str):
@@ -77,21 +76,11 @@ def validate_is_csv(csv: str):
     )
 
 
-def strip_whitespace(csv: CSVIterator) -> CSVIterator:
-    return ([cell.strip() for cell in row] for row in csv)
-
-
-def reject_no_rows(csv: CSVIterator) -> CSVIterator:
-    yield next(csv)
-    second = next(csv, None)
-    if second is None:
-        raise CSVParseError("CSV must contain at least one row after headers.")
-    yield second
-    yield from csv
-
-
-def skip_empty_trailing_columns(csv: CSVIterator) -> CSVIterator:
-    headers = next(csv)
+# Parses the headers, then parses each row in a single pass using a row parser
+# built for those headers (see compile_row_parser). Rows stay as lists until
+# they've passed every check, and empty rows are skipped.
+def parse_rows(csv: CSVIterator, columns: List[CSVColumnType]) -> CSVDictIterator:
+    headers = [cell.strip() for cell in next(csv)]
 
     # Count empty trailing columns so we can ignore them.
     empty_trailing_header_count = 0
@@ -100,32 +89,30 @@ def skip_empty_trailing_columns(csv: CSVIterator) -> CSVIterator:
             empty_trailing_header_count += 1
         else:
             break
+    num_headers_with_trailing = len(headers)
+    if empty_trailing_header_count > 0:
+        headers = headers[0:-empty_trailing_header_count]
 
-    if empty_trailing_header_count == 0:
-        # No empty trailing columns, just send the data through as-is.
-        yield headers
-        yield from csv
-    else:
-        yield headers[0:-empty_trailing_header_count]
-        for r, row in enumerate(csv):  # pylint: disable=invalid-name
-            for (empty_trailing_column_index, cell) in enumerate(
-                row[-empty_trailing_header_count:]
-            ):
-                if len(cell) > 0:
-                    raise CSVParseError(
-                        f"Empty trailing column {len(headers) - empty_trailing_header_count + empty_trailing_column_index + 1}"
-                        f" expected to have no values, but row {r+2} has a value: {cell}."
-                    )
+    headers = validate_and_normalize_headers(headers, columns)
+
+    first_row = next(csv, None)
+    if first_row is None:
+        raise CSVParseError("CSV must contain at least one row after headers.")
 
-            # Pass only cells for non-empty columns.
-            yield row[0:-empty_trailing_header_count]
+    parse_row = compile_row_parser(
+        headers, columns, empty_trailing_header_count, num_headers_with_trailing
+    )
+    for r, row in enumerate(
+        itertools.chain([first_row], csv)
+    ):  # pylint: disable=invalid-name
+        parsed_row = parse_row(row, r)
+        if parsed_row is not None:
+            yield parsed_row
 
 
 def validate_and_normalize_headers(
-    csv: CSVIterator, columns: List[CSVColumnType]
-) -> CSVIterator:
-    headers = next(csv)
-
+    headers: CSVRow, columns: List[CSVColumnType]
+) -> CSVRow:
     normalized_headers = [
         next((c.name for c in columns if c.name.lower() == header.lower()), header)
         for header in headers
@@ -150,149 +137,257 @@ def validate_and_normalize_headers(
             f"Found unexpected columns. Allowed columns: {', '.join(sorted(allowed_headers))}."
         )
 
-    yield normalized_headers
-    yield from csv
-
-
-def is_empty_row(row: Dict[str, Any]) -> bool:
-    return all(value == "" for value in row.values())
+    return normalized_headers
+
+
+TOTAL_ROW_VALUES = {"total", "totals", "total ballots"}
+
+
+def compile_row_parser(
+    headers: CSVRow,
+    columns: List[CSVColumnType],
+    empty_trailing_header_count: int,
+    num_headers_with_trailing: int,
+) -> Callable[[CSVRow, int], Optional[Dict[str, Any]]]:
+    """
+    Builds a function that runs all of our checks on a single row and parses
+    its values. The function takes a row and its index (not counting the
+    header row) and returns the parsed row as a dict, or None if the row is
+    empty. The checks run in this order, and the first one that fails raises
+    a CSVParseError:
+        - empty trailing columns have no values
+        - the row has the same number of cells as the headers
+        - no cells are empty
+        - it's not a total row
+        - values have the right type
+        - the unique columns don't duplicate an earlier row
+    """
+    columns_by_header = {column.name: column for column in columns}
+    typed_columns = [
+        (c, header, columns_by_header[header].value_type)
+        for c, header in enumerate(headers)
+        if columns_by_header[header].value_type
+        in (CSVValueType.NUMBER, CSVValueType.EMAIL)
+    ]
+    num_headers = len(headers)
 
+    # For our purposes, we want all the columns with unique=True to be used as
+    # one composite unique key for the rows.
+    unique_columns = tuple(sorted(column.name for column in columns if column.unique))
+    seen = set()
 
-def skip_empty_rows(csv: CSVDictIterator) -> CSVDictIterator:
-    for row in csv:
-        if not is_empty_row(row):
-            yield row
+    def parse_row(row: CSVRow, r: int) -> Optional[Dict[str, Any]]:
+        row = [cell.strip() for cell in row]
 
+        if empty_trailing_header_count > 0:
+            for (empty_trailing_column_index, cell) in enumerate(
+                row[-empty_trailing_header_count:]
+            ):
+                if len(cell) > 0:
+                    raise CSVParseError(
+                        f"Empty trailing column {num_headers_with_trailing - empty_trailing_header_count + empty_trailing_column_index + 1}"
+                        f" expected to have no values, but row {r+2} has a value: {cell}."
+                    )
+            # Only keep cells for non-empty columns.
+            row = row[0:-empty_trailing_header_count]
 
-def reject_empty_cells(csv: CSVDictIterator) -> CSVDictIterator:
-    for r, row in enumerate(csv):  # pylint: disable=invalid-name
-        # Skip empty rows, we filter them out later
-        if is_empty_row(row):
-            yield row
-            continue
+        # Skip empty rows
+        if len(row) == 0:
+            return None
+        if len(row) != num_headers:
+            raise CSVParseError(
+                f"Wrong number of cells in row {r+2}."
+                f" Expected {num_headers} {pluralize('cell', num_headers)},"
+                f" got {len(row)} {pluralize('cell', len(row))}."
+            )
+        if not any(row):
+            return None
 
-        for header, value in row.items():  # pylint: disable=invalid-name
+        for c, value in enumerate(row):  # pylint: disable=invalid-name
             if value == "":
                 raise CSVParseError(
                     "All cells must have values."
-                    f" Got empty cell at column {header}, row {r+2}."
+                    f" Got empty cell at column {headers[c]}, row {r+2}."
                 )
-        yield row
 
+        for value in row:
+            if value.lower() in TOTAL_ROW_VALUES:
+                raise CSVParseError(f"Remove total row (row {r+2})")
 
-def validate_and_parse_values(
-    csv: CSVDictIterator, columns: List[CSVColumnType]
-) -> CSVDictIterator:
-    columns_by_header = {column.name: column for column in columns}
-
-    def parse_and_validate_value(header, value, r):  # pylint: disable=invalid-name
-        where = f"column {header}, row {r+2}"
-        column = columns_by_header[header]
+        values: List[Any] = row
+        for c, header, value_type in typed_columns:  # pylint: disable=invalid-name
+            value = row[c]
+            if value_type is CSVValueType.NUMBER:
+                # Most numbers are plain digits, which we can parse without
+                # going through the locale.
+                if value.isdigit() and value.isascii():
+                    values[c] = int(value)
+                    continue
+                try:
+                    values[c] = locale.atoi(value)
+                except ValueError:
+                    # pylint: disable=raise-missing-from
+                    raise CSVParseError(
+                        f"Expected a number in column {header}, row {r+2}. Got: {value}."
+                    )
+            elif not EMAIL_REGEX.match(value):
+                raise CSVParseError(
+                    f"Expected an email address in column {header}, row {r+2}. Got: {value}."
+                )
 
-        if column.value_type is CSVValueType.NUMBER:
-            try:
-                return locale.atoi(value)
-            except ValueError:
-                # pylint: disable=raise-missing-from
-                raise CSVParseError(f"Expected a number in {where}. Got: {value}.")
+        parsed_row = dict(zip(headers, values))
 
-        if column.value_type is CSVValueType.EMAIL:
-            if not EMAIL_REGEX.match(value):
+        if unique_columns:
+            row_key = tuple(parsed_row[column] for column in unique_columns)
+            if row_key in seen:
                 raise CSVParseError(
-                    f"Expected an email address in {where}. Got: {value}."
+                    f"Each row must be uniquely identified by {format_tuple(unique_columns)}."
+                    + f" Found duplicate: {format_tuple(row_key)}."
                 )
+            seen.add(row_key)
 
-        return value
-
-    for r, row in enumerate(csv):  # pylint: disable=invalid-name
-        # Skip empty rows, we filter them out later
-        if is_empty_row(row):
-            yield row
-            continue
+        return parsed_row
 
-        yield {
-            header: parse_and_validate_value(header, value, r)
-            for header, value in row.items()
-        }
+    return parse_row
 
 
 def format_tuple(tup: Tuple) -> str:
     return str(tup[0]) if len(tup) == 1 else str(tup)
 
 
-def reject_duplicate_values(
-    csv: CSVDictIterator, columns: List[CSVColumnType]
-) -> CSVDictIterator:
-    # For our purposes, we want all the columns with unique=True to be used as
-    # one composite unique key for the rows.
-    unique_columns = tuple(sorted(column.name for column in columns if column.unique))
-    if len(unique_columns) == 0:
-        yield from csv
-        return
+def pluralize(word: str, num: int) -> str:
+    return word if num == 1 else f"{word}s"
 
-    seen = set()
-    for row in csv:
-        # Skip empty rows, we filter them out later
-        if is_empty_row(row):
-            yield row
-            continue
-
-        row_key = tuple(row[column] for column in unique_columns)
-        if row_key in seen:
-            raise CSVParseError(
-                f"Each row must be uniquely identified by {format_tuple(unique_columns)}."
-                + f" Found duplicate: {format_tuple(row_key)}."
-            )
-        else:
-            seen.add(row_key)
 
-        yield row
+INVALID_CSV_ENCODING_ERROR = (
+    "Please submit a valid CSV."
+    " If you are working with an Excel spreadsheet,"
+    " make sure you export it as a .csv file before uploading"
+)
 
 
-def reject_total_rows(csv: CSVDictIterator) -> CSVDictIterator:
-    for r, row in enumerate(csv):  # pylint: disable=invalid-name
-        for value in row.values():
-            if value.lower() in ["total", "totals", "total ballots"]:
-                raise CSVParseError(f"Remove total row (row {r+2})")
+def decode_csv_file(file: bytes) -> str:
+    try:
+        try:
+            return file.decode("utf-8-sig")
+        except UnicodeDecodeError as error:
+            encoding = detect_non_utf8_encoding(io.BytesIO(file), error.start)
+            if not encoding:
+                raise
+            return file.decode(encoding)
+    except UnicodeDecodeError:
+        # pylint: disable=raise-missing-from
+        raise BadRequest(INVALID_CSV_ENCODING_ERROR)
 
-        yield row
 
+DECODE_CHUNK_SIZE = 1024 * 1024  # bytes
 
-def convert_rows_to_dicts(csv: CSVIterator) -> CSVDictIterator:
-    headers = next(csv)
 
-    for r, row in enumerate(csv):  # pylint: disable=invalid-name
-        # Normalize empty rows to make sure we can turn them into dicts.
-        # We'll filter them out later.
-        if len(row) == 0:
-            row = ["" for _ in headers]
-        if len(row) != len(headers):
-            raise CSVParseError(
-                f"Wrong number of cells in row {r+2}."
-                f" Expected {len(headers)} {pluralize('cell', len(headers))},"
-                f" got {len(row)} {pluralize('cell', len(row))}."
-            )
-
-        yield dict(zip(headers, row))
+# Like decode_csv_file, but for files too big to hold in memory. Reads the
+# file (which must be seekable) a chunk at a time and yields the decoded text
+# in chunks.
+def decode_csv_file_chunks(
+    file: BinaryIO, chunk_size: int = DECODE_CHUNK_SIZE
+) -> Iterator[str]:
+    encoding = detect_csv_file_encoding(file, chunk_size)
+    file.seek(0)
+    decoder = codecs.getincrementaldecoder(encoding)()
+    try:
+        while True:
+            chunk = file.read(chunk_size)
+            text = decoder.decode(chunk, final=not chunk)
+            if text:
+                yield text
+            if not chunk:
+                return
+    except UnicodeDecodeError:
+        # pylint: disable=raise-missing-from
+        raise BadRequest(INVALID_CSV_ENCODING_ERROR)
 
 
-def pluralize(word: str, num: int) -> str:
-    return word if num == 1 else f"{word}s"
+def detect_csv_file_encoding(file: BinaryIO, chunk_size: int) -> str:
+    # Most files are UTF-8, so first check if the whole file decodes as UTF-8.
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    offset = 0
+    try:
+        while True:
+            chunk = file.read(chunk_size)
+            decoder.decode(chunk, final=not chunk)
+            if not chunk:
+                return "utf-8-sig"
+            offset += len(chunk)
+    except UnicodeDecodeError as error:
+        invalid_utf8_offset = offset + error.start
+
+    encoding = detect_non_utf8_encoding(file, invalid_utf8_offset)
+    if not encoding:
+        raise BadRequest(INVALID_CSV_ENCODING_ERROR)
+    return encoding
+
+
+ENCODING_DETECTION_PREFIX_SIZE = 16 * 1024  # bytes
+ENCODING_DETECTION_SAMPLE_SIZE = 4 * 1024  # bytes
+ENCODING_DETECTION_NUM_SAMPLES = 16
+
+
+# Running chardet over a whole file takes a long time for big files (minutes
+# for a 100MB file), so instead we feed it a bounded amount of the file: the
+# beginning, the part where UTF-8 decoding failed (which we know has
+# non-ASCII characters in it), and samples spread out over the rest of the
+# file. If that isn't enough for chardet to figure out the encoding, we fall
+# back to feeding it the whole file. Returns None if chardet can't figure out
+# the encoding.
+def detect_non_utf8_encoding(file: BinaryIO, invalid_utf8_offset: int) -> Optional[str]:
+    file_size = file.seek(0, io.SEEK_END)
+    sample_spacing = max(
+        (file_size - ENCODING_DETECTION_PREFIX_SIZE) // ENCODING_DETECTION_NUM_SAMPLES,
+        ENCODING_DETECTION_SAMPLE_SIZE,
+    )
 
+    detector = UniversalDetector()
+    file.seek(0)
+    detector.feed(file.read(ENCODING_DETECTION_PREFIX_SIZE))
 
-def decode_csv_file(file: bytes) -> str:
-    try:
-        try:
-            return file.decode("utf-8-sig")
-        except UnicodeDecodeError:
-            detect_result = chardet.detect(file)
-            if not detect_result["encoding"]:
-                raise
-            return file.decode(detect_result["encoding"])
-    except UnicodeDecodeError:
-        # pylint: disable=raise-missing-from
-        raise BadRequest(
-            "Please submit a valid CSV."
-            " If you are working with an Excel spreadsheet,"
-            " make sure you export it as a .csv file before uploading"
-        )
+    # Start the sample around the invalid UTF-8 at the beginning of its line,
+    # or at the invalid byte itself if the line starts before the sample, so
+    # that we don't cut it off (CVR rows can be longer than a sample).
+    invalid_sample_offset = max(
+        invalid_utf8_offset - ENCODING_DETECTION_SAMPLE_SIZE // 2, 0
+    )
+    file.seek(invalid_sample_offset)
+    sample = file.read(ENCODING_DETECTION_SAMPLE_SIZE)
+    invalid_sample_index = invalid_utf8_offset - invalid_sample_offset
+    line_start = sample.rfind(b"\n", 0, invalid_sample_index) + 1
+    if line_start == 0 and invalid_sample_offset > 0:
+        line_start = invalid_sample_index
+    detector.feed(sample[line_start:])
+
+    for sample_offset in range(
+        ENCODING_DETECTION_PREFIX_SIZE, file_size, sample_spacing
+    ):
+        if detector.done:
+            break
+        file.seek(sample_offset)
+        sample = file.read(ENCODING_DETECTION_SAMPLE_SIZE)
+        # Start the sample on a new line so we don't feed chardet half of a
+        # multi-byte character.
+        sample = sample[sample.find(b"\n") + 1 :]
+        detector.feed(sample)
+    detector.close()
+    encoding: Optional[str] = detector.result["encoding"]
+
+    # The file failed to decode as UTF-8, so it can't be ASCII - chardet just
+    # didn't see the non-ASCII characters.
+    if not encoding or encoding == "ascii":
+        detector = UniversalDetector()
+        file.seek(0)
+        while not detector.done:
+            chunk = file.read(DECODE_CHUNK_SIZE)
+            if not chunk:
+                break
+            detector.feed(chunk)
+        detector.close()
+        encoding = detector.result["encoding"]
+
+    file.seek(0)
+    return None if encoding == "ascii" else encoding
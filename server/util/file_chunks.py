@@ -0,0 +1,50 @@
+import io
+from typing import Iterable, Iterator
+from sqlalchemy.orm.session import Session
+
+from ..models import *  # pylint: disable=wildcard-import
+
+
+# Large files (e.g. CVRs) can be bigger than we can hold in memory (or store
+# in a single Postgres text value), so we store them in chunks instead of in
+# File.contents.
+def save_file_chunks(session: Session, file: File, chunks: Iterable[str]):
+    # Make sure the file exists before we insert chunks that reference it
+    session.flush()
+    for chunk_index, chunk in enumerate(chunks):
+        session.execute(
+            FileChunk.__table__.insert().values(  # pylint: disable=no-member
+                file_id=file.id, chunk_index=chunk_index, contents=chunk
+            )
+        )
+
+
+# Streams the contents of a file out of the db, one chunk at a time. Files
+# that were saved whole (in File.contents) come out as a single chunk.
+def read_file_chunks(session: Session, file: File) -> Iterator[str]:
+    if file.contents is not None:
+        yield file.contents
+        return
+
+    chunks = (
+        session.query(FileChunk.contents)
+        .filter_by(file_id=file.id)
+        .order_by(FileChunk.chunk_index)
+        .yield_per(1)
+    )
+    for (chunk,) in chunks:
+        yield chunk
+
+
+# Splits a stream of text chunks into lines (keeping the line endings, as
+# csv.reader expects), without joining the chunks back together.
+def file_lines(chunks: Iterable[str]) -> Iterator[str]:
+    partial_line = ""
+    for chunk in chunks:
+        lines = io.StringIO(partial_line + chunk, newline="").readlines()
+        # The last line may continue in the next chunk (including the case
+        # where a \r\n is split between chunks).
+        partial_line = lines.pop() if lines else ""
+        yield from lines
+    if partial_line:
+        yield partial_line
@@ -1,7 +1,7 @@
 import datetime
 import traceback
 from typing import Callable, Optional
-from sqlalchemy import update
+from sqlalchemy import update, text
 from sqlalchemy.orm.session import Session
 
 from ..models import *  # pylint: disable=wildcard-import
@@ -13,6 +13,20 @@ class UserError(Exception):
     pass
 
 
+# The Postgres channel that bgcompute listens on for newly uploaded files
+BGCOMPUTE_CHANNEL = "bgcompute"
+
+
+# Wakes up bgcompute to process a newly uploaded file. Postgres only delivers
+# the notification once the current transaction commits, so by the time
+# bgcompute hears about the file, it can see it.
+def notify_file_uploaded(session: Session, file: File):
+    session.execute(
+        text("SELECT pg_notify(:channel, :file_id)"),
+        dict(channel=BGCOMPUTE_CHANNEL, file_id=file.id),
+    )
+
+
 def process_file(session: Session, file: File, callback: Callable[[], None]) -> bool:
     if file.processing_started_at:
         return False
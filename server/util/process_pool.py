@@ -0,0 +1,11 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+
+def spawn_process_pool(max_workers: int) -> ProcessPoolExecutor:
+    # Start fresh worker processes rather than forking. We use these pools from
+    # the server and background worker processes, and forked workers would
+    # inherit their database connections and threads.
+    return ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+    )